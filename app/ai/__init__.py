@@ -1,14 +1,28 @@
 # app/ai/__init__.py
+from functools import lru_cache
+
 from app.config import settings
 from app.ai.base import AIProvider
-from app.ai.gemini_provider import GeminiProvider
 
+@lru_cache(maxsize=1)
 def get_ai_provider() -> AIProvider:
+    """
+    One provider per process: reuses the genai client (and its HTTP
+    connection pools) across requests.
+
+    Providers are imported here: google-genai is slow to import and is
+    only needed once the first chat (or the startup warm-up) runs.
+    """
     provider = settings.ai_provider.lower()
-    if provider == "gemini":
-        return GeminiProvider()
+    if provider == "fake":
+        # Offline, deterministic (local runs / tests)
+        from app.ai.fake_provider import FakeProvider
+
+        return FakeProvider(latency_ms=settings.fake_llm_latency_ms)
     # elif provider == "openai":
     #     return OpenAIProvider()
 
     # default to gemini
+    from app.ai.gemini_provider import GeminiProvider
+
     return GeminiProvider()
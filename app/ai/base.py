@@ -1,6 +1,7 @@
 # app/ai/base.py
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Iterator, AsyncIterator
 
 class AIProvider(ABC):
     @abstractmethod
@@ -16,3 +17,24 @@ class AIProvider(ABC):
         Returns assistant text.
         """
         raise NotImplementedError
+
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        Streaming chat completion: yields pieces of the assistant text as
+        they are generated. Providers without native streaming fall back to
+        a single piece containing the full answer.
+        """
+        yield self.chat(messages)
+
+    async def achat(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Async chat completion. Providers with a native async client should
+        override this; the default runs chat() in a worker thread.
+        """
+        return await asyncio.to_thread(self.chat, messages)
+
+    async def achat_stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """
+        Async streaming chat completion. Default: one piece from achat().
+        """
+        yield await self.achat(messages)
@@ -0,0 +1,82 @@
+# app/ai/fake_provider.py
+import asyncio
+import hashlib
+import math
+import time
+
+from app.ai.base import AIProvider
+
+
+class FakeProvider(AIProvider):
+    """
+    Deterministic, offline provider for local runs and tests.
+
+    - chat(): echoes the question back with the amount of context it got
+    - chat_stream(): same answer, one word at a time
+    - embed(): hash-based unit vectors (stable across runs and processes)
+    """
+
+    def __init__(self, latency_ms: int = 0, dim: int = 384):
+        self.latency_seconds = latency_ms / 1000
+        self.dim = dim
+
+    def _answer(self, messages: list[dict]) -> str:
+        user = next(
+            (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"),
+            "",
+        )
+        question = user.rsplit("Question:", 1)[-1].strip()
+        return f"[fake] Answer to '{question}' using {len(user)} characters of context."
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for text in texts:
+            digest = b""
+            counter = 0
+            while len(digest) < self.dim:
+                digest += hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+                counter += 1
+            raw = [b / 255.0 - 0.5 for b in digest[: self.dim]]
+            norm = math.sqrt(sum(x * x for x in raw)) or 1.0
+            vectors.append([x / norm for x in raw])
+        return vectors
+
+    def chat(self, messages: list[dict]) -> str:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._answer(messages)
+
+    def chat_stream(self, messages: list[dict]):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
+    async def achat(self, messages: list[dict]) -> str:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._answer(messages)
+
+    async def achat_stream(self, messages: list[dict]):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
+
+class FakeEmbeddings:
+    """
+    LangChain-style embeddings (embed_documents / embed_query) over
+    FakeProvider.embed, used when EMBEDDING_BACKEND=fake.
+    """
+
+    def __init__(self, dim: int = 384):
+        self._provider = FakeProvider(dim=dim)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._provider.embed(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._provider.embed([text])[0]
@@ -1,6 +1,7 @@
 from google import genai
 from app.ai.base import AIProvider
 from app.config import settings
+from app.services import tracing
 # import os
 
 class GeminiProvider(AIProvider):
@@ -23,16 +24,18 @@ class GeminiProvider(AIProvider):
             return []
 
         # Single call for all chunks (batch)
-        resp = self.client.models.embed_content(
-            model=self.embed_model,
-            contents=texts,
-        )
+        with tracing.span("gemini.embed_content", model=self.embed_model, texts=len(texts)):
+            resp = self.client.models.embed_content(
+                model=self.embed_model,
+                contents=texts,
+            )
 
         # resp.embeddings is a list of embedding objects; each has `.values`
         vectors: list[list[float]] = [e.values for e in resp.embeddings]
         return vectors
 
-    def chat(self, messages: list[dict]) -> str:
+    @staticmethod
+    def _build_prompt(messages: list[dict]) -> str:
         lines: list[str] = []
         for msg in messages:
             role = msg.get("role", "user")
@@ -45,10 +48,52 @@ class GeminiProvider(AIProvider):
                 prefix = "USER"
             lines.append(f"{prefix}: {content}")
 
-        prompt = "\n".join(lines)
+        return "\n".join(lines)
+
+    def chat(self, messages: list[dict]) -> str:
+        prompt = self._build_prompt(messages)
+
+        with tracing.span("gemini.generate_content", model=self.chat_model, prompt_chars=len(prompt)):
+            resp = self.client.models.generate_content(
+                model=self.chat_model,
+                contents=prompt,
+            )
+        return resp.text
+
+    def chat_stream(self, messages: list[dict]):
+        """
+        Yield answer text chunk by chunk as Gemini generates it.
+        """
+        prompt = self._build_prompt(messages)
+
+        # Spans the whole generation, so streamed answers show their LLM time
+        with tracing.span("gemini.generate_content_stream", model=self.chat_model, prompt_chars=len(prompt)):
+            for chunk in self.client.models.generate_content_stream(
+                model=self.chat_model,
+                contents=prompt,
+            ):
+                # Safety / finish chunks can carry no text
+                if chunk.text:
+                    yield chunk.text
 
-        resp = self.client.models.generate_content(
-            model=self.chat_model,
-            contents=prompt,
-        )
+    async def achat(self, messages: list[dict]) -> str:
+        prompt = self._build_prompt(messages)
+
+        with tracing.span("gemini.generate_content", model=self.chat_model, prompt_chars=len(prompt)):
+            resp = await self.client.aio.models.generate_content(
+                model=self.chat_model,
+                contents=prompt,
+            )
         return resp.text
+
+    async def achat_stream(self, messages: list[dict]):
+        prompt = self._build_prompt(messages)
+
+        with tracing.span("gemini.generate_content_stream", model=self.chat_model, prompt_chars=len(prompt)):
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.chat_model,
+                contents=prompt,
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
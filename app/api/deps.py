@@ -1,19 +1,23 @@
 # app/api/deps.py
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from sqlalchemy.orm import Session
 
-from app.db import SessionLocal
+from app.config import settings
+from app.db import SessionLocal, get_async_sessionmaker
 from app.models.user import User
+from app.services import principal_cache, profiling, tracing
 from app.services.auth_service import decode_token
+from app.services.principal_cache import Principal
 
 bearer_scheme = HTTPBearer()
 
 
 def get_db() -> Generator[Session, None, None]:
+    # Lazy: a pooled connection is only checked out on the first query
     db = SessionLocal()
     try:
         yield db
@@ -21,38 +25,119 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
+async def get_async_db() -> AsyncGenerator:
+    """
+    AsyncSession for async routes, or None when DB_ASYNC_ENABLED is off
+    (the route then uses its sync session in the threadpool). Like
+    get_db, no connection is checked out before the first query.
+    """
+    if not settings.db_async_enabled:
+        yield None
+        return
+    async with get_async_sessionmaker()() as db:
+        yield db
+
 
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _load_principal(user_id: int) -> Principal | None:
+    db = SessionLocal()
     try:
-        payload = decode_token(token)
-        user_id: str | None = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        user = db.get(User, user_id)
+        return Principal.from_user(user) if user is not None else None
+    finally:
+        db.close()
+
+
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> Principal:
+    """
+    Authenticated user as (id, tenant_id, role, token_version).
+
+    Served from the in-process principal cache; the users table is only
+    read on a cache miss, so routes that only need tenant/role don't open
+    a DB session. Tokens issued before a role / password change or user
+    deletion carry an old "ver" and are rejected.
+    """
+    credentials_exception = _credentials_exception()
+
+    try:
+        with tracing.span("auth.decode_jwt"):
+            payload = decode_token(credentials.credentials)
+            user_id = int(payload.get("sub"))
+            token_version = int(payload.get("ver", 0))
     except Exception:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    principal = principal_cache.cache.get(user_id)
+    if principal is None:
+        with tracing.span("auth.user_lookup", cache="miss"):
+            principal = _load_principal(user_id)
+        if principal is None:
+            raise credentials_exception
+        principal_cache.cache.put(principal)
+
+    if principal.token_version != token_version:
         raise credentials_exception
+
+    tracing.set_root_attribute("tenant_id", principal.tenant_id)
+    tracing.set_root_attribute("user_id", principal.id)
+    return principal
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+) -> User:
+    """
+    Full User row, for routes that need more than tenant / role.
+    """
+    with tracing.span("auth.user_row"):
+        user = db.get(User, principal.id)
+    if user is None:
+        raise _credentials_exception()
     return user
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+
+def require_admin(
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
     """
     Dependency to ensure the current user is an admin.
     """
-    if current_user.role != "admin":
+    if principal.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges required",
         )
-    return current_user
\ No newline at end of file
+    return principal
+
+
+def request_profiling(label: str):
+    """
+    Dependency factory: profile this request when an admin asks for it
+    (`X-Profile: 1` header or `?profile=1`) or when it is sampled
+    (settings.profile_sample_rate). Async so the contextvar it sets is
+    visible to the route and everything it calls. The profile id is
+    returned in the `X-Profile-Id` response header.
+    """
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        principal: Principal = Depends(get_current_principal),
+    ) -> None:
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        requested = flag in ("1", "true", "yes")
+        if profiling.should_profile(requested, principal.role == "admin"):
+            session = profiling.start(principal.tenant_id, label)
+            response.headers["X-Profile-Id"] = session.profile_id
+
+    return dependency
@@ -1,6 +1,8 @@
 # app/api/routes_auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api import deps
 from app.models.tenant import Tenant
@@ -13,20 +15,20 @@ from app.schemas.auth import (
     ChangePasswordRequest
 )
 from app.schemas.tenant import TenantResponse
+from app.services import principal_cache
 from app.services.auth_service import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password_async,
     create_access_token,
 )
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# The routes that hash are async: they await the hashing pool without
+# holding a threadpool slot, and only the DB work runs in the threadpool.
 
-@router.post("/register-tenant", response_model=TenantResponse)
-def register_tenant(
-    data: TenantRegisterRequest,
-    db: Session = Depends(deps.get_db),
-):
+
+def _check_registration(db: Session, data: TenantRegisterRequest) -> None:
     # 1. Check if tenant name exists
     existing_tenant = db.query(Tenant).filter(Tenant.name == data.tenant_name).first()
     if existing_tenant:
@@ -43,6 +45,8 @@ def register_tenant(
             detail="User with this email already exists",
         )
 
+
+def _create_tenant(db: Session, data: TenantRegisterRequest, password_hash: str) -> Tenant:
     # 3. Create tenant
     tenant = Tenant(name=data.tenant_name)
     db.add(tenant)
@@ -52,32 +56,73 @@ def register_tenant(
     user = User(
         tenant_id=tenant.id,
         email=data.admin_email,
-        password_hash=hash_password(data.admin_password),
+        password_hash=password_hash,
         role="admin",
     )
     db.add(user)
     db.commit()
     db.refresh(tenant)
-
     return tenant
 
 
+@router.post("/register-tenant", response_model=TenantResponse)
+async def register_tenant(
+    data: TenantRegisterRequest,
+    db: Session = Depends(deps.get_db),
+):
+    await run_in_threadpool(_check_registration, db, data)
+    password_hash = await hash_password_async(data.admin_password)
+    return await run_in_threadpool(_create_tenant, db, data, password_hash)
+
+
+def _user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _store_password_hash(db: Session, user: User, password_hash: str) -> None:
+    user.password_hash = password_hash
+    db.commit()
+    db.refresh(user)  # reload here, not lazily on the event loop
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     data: LoginRequest,
     db: Session = Depends(deps.get_db),
+    # AsyncSession | None; not annotated so sqlalchemy.ext.asyncio (and
+    # greenlet) are only imported when DB_ASYNC_ENABLED is set
+    async_db=Depends(deps.get_async_db),
 ):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.password_hash):
+    # With DB_ASYNC_ENABLED the queries run on the event loop (asyncpg /
+    # aiosqlite) and login takes no threadpool slot at all
+    if async_db is not None:
+        user = await async_db.scalar(select(User).where(User.email == data.email).limit(1))
+    else:
+        user = await run_in_threadpool(_user_by_email, db, data.email)
+    if user:
+        valid, new_hash = await verify_and_update_password_async(data.password, user.password_hash)
+    else:
+        valid, new_hash = False, None
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    # Hash parameters changed since this password was stored: upgrade it
+    if new_hash and async_db is not None:
+        await async_db.execute(
+            update(User).where(User.id == user.id).values(password_hash=new_hash)
+        )
+        await async_db.commit()
+    elif new_hash:
+        await run_in_threadpool(_store_password_hash, db, user, new_hash)
+
     access_token = create_access_token(
         subject=str(user.id),
         tenant_id=user.tenant_id,
         role=user.role,
+        token_version=user.token_version or 0,
     )
 
     return TokenResponse(access_token=access_token)
@@ -97,8 +142,17 @@ def get_me(
         created_at=current_user.created_at,
     )
 
+def _save_new_password(db: Session, user: User, password_hash: str) -> None:
+    # Revokes every token issued so far
+    user.password_hash = password_hash
+    user.token_version = (user.token_version or 0) + 1
+    db.add(user)
+    db.commit()
+    db.refresh(user)  # reload here, not lazily on the event loop
+
+
 @router.post("/change-password")
-def change_password(
+async def change_password(
     payload: ChangePasswordRequest,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
@@ -108,7 +162,8 @@ def change_password(
     """
 
     # 1. Verify current password
-    if not verify_password(payload.current_password, current_user.password_hash):
+    valid, _ = await verify_and_update_password_async(payload.current_password, current_user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -128,9 +183,17 @@ def change_password(
             detail="New password must be at least 8 characters long",
         )
 
-    # 2. Update password hash
-    current_user.password_hash = hash_password(payload.new_password)
-    db.add(current_user)
-    db.commit()
+    # 2. Update password hash; revokes every token issued so far
+    new_hash = await hash_password_async(payload.new_password)
+    await run_in_threadpool(_save_new_password, db, current_user, new_hash)
+    principal_cache.invalidate(current_user.id)
+
+    # Fresh token so the caller's own session survives the revocation
+    access_token = create_access_token(
+        subject=str(current_user.id),
+        tenant_id=current_user.tenant_id,
+        role=current_user.role,
+        token_version=current_user.token_version,
+    )
 
-    return {"detail": "Password changed successfully"}
\ No newline at end of file
+    return {"detail": "Password changed successfully", "access_token": access_token}
\ No newline at end of file
@@ -1,29 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import json
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from app.schemas.chat import ChatRequest, ChatResponse
-from app.services.chat_service import rag_answer
+from app.services.chat_service import arag_answer, arag_answer_stream, LLMBusyError
+from app.services import metrics
 from app.api import deps
-from app.models.user import User
+from app.services.principal_cache import Principal
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.post("/query", response_model=ChatResponse)
-def chat_query(
+async def chat_query(
     payload: ChatRequest,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
+    _profile: None = Depends(deps.request_profiling("chat")),
 ):
     """
     RAG Chat endpoint - uses Chroma + Gemini
     """
     try:
-        result = rag_answer(
+        result = await arag_answer(
             query=payload.query,
-            tenant_id=current_user.tenant_id
+            tenant_id=current_user.tenant_id,
+            use_cache=not payload.bypass_cache,
         )
         return result
 
+    except LLMBusyError as e:
+        metrics.inc(metrics.errors, "chat_busy", tenant_id=current_user.tenant_id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
+        metrics.inc(metrics.errors, "chat", tenant_id=current_user.tenant_id)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/query/stream")
+async def chat_query_stream(
+    payload: ChatRequest,
+    current_user: Principal = Depends(deps.get_current_principal),
+    _profile: None = Depends(deps.request_profiling("chat_stream")),
+):
+    """
+    Streaming RAG chat (Server-Sent Events).
+
+    Emits `sources` first, then `token` events as the answer is generated,
+    then `done`. Failures after the stream has started are sent as an
+    `error` event (the HTTP status is already 200 at that point).
+    """
+    tenant_id = current_user.tenant_id
+
+    async def event_stream():
+        try:
+            async for event in arag_answer_stream(
+                query=payload.query,
+                tenant_id=tenant_id,
+                use_cache=not payload.bypass_cache,
+            ):
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            logger.exception("Streaming chat failed")
+            metrics.inc(metrics.errors, "chat_stream", tenant_id=tenant_id)
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable response buffering in nginx-style proxies
+            "X-Accel-Buffering": "no",
+        },
+    )
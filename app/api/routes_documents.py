@@ -1,102 +1,272 @@
 # app/api/routes_documents.py
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, HTTPException, Query, Request, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List  # (still here if PaginatedDocumentsResponse uses List internally)
+from typing import List, Optional  # (still here if PaginatedDocumentsResponse uses List internally)
 
-from app.services.ingestion_service import ingest_with_langchain
 from app.models.document import Document
-from app.models.user import User
+from app.services.principal_cache import Principal
 from app.schemas.document import (
     DocumentResponse,
     UrlUploadRequest,
     PaginatedDocumentsResponse,
+    IngestJobResponse,
+    BulkIngestJobResponse,
 )
-from app.services.document_service import save_document, save_url_document
+from app.services.document_service import (
+    register_upload,
+    save_url_document,
+    upload_temp_path,
+    FileTooLargeError,
+    EmptyFileError,
+    MalformedUploadError,
+    document_counts,
+)
+from app.services import ingestion_jobs, profiling
+from app.services.pagination import keyset_page
+from app.services.bulk_ingest_service import stage_bulk_upload
+from app.services.upload_stream import receive_upload, reject_oversized
 from app.api import deps
 from app.config import settings
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 MAX_FILE_SIZE_BYTES = settings.max_file_size_mb * 1024 * 1024
+BULK_MAX_REQUEST_BYTES = settings.bulk_max_request_mb * 1024 * 1024
+
+
+_BINARY = {"type": "string", "format": "binary"}
+
+
+def _multipart_body(field: str, schema: dict) -> dict:
+    # The routes read the body themselves; describe it for /docs
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {field: schema},
+                        "required": [field],
+                    }
+                }
+            },
+        }
+    }
+
+
+def _too_large(limit_mb: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Max allowed size is {limit_mb} MB.",
+    )
 
 
-@router.post("/upload", response_model=DocumentResponse)
+@router.post(
+    "/upload",
+    response_model=DocumentResponse,
+    openapi_extra=_multipart_body("file", _BINARY),
+)
 async def upload_document(
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),  # 👈 admin-only
+    admin_user: Principal = Depends(deps.require_admin),  # 👈 admin-only
 ):
     """
-    Upload a document for the current tenant (admin-only).
+    Upload a document for the current tenant (admin-only), as the `file`
+    field of a multipart form.
+    The body is parsed as it arrives and the file streamed to storage once:
+    a Content-Length over the limit is refused before anything is read,
+    and the limit is enforced while streaming. Size + sha256 are recorded
+    on the Document.
     """
-    # Read file into memory once
-    content = await file.read()
+    tmp_path = await run_in_threadpool(upload_temp_path, admin_user.tenant_id)
+    try:
+        filename, size_bytes, content_hash = await receive_upload(
+            request, tmp_path, MAX_FILE_SIZE_BYTES
+        )
+    except FileTooLargeError:
+        # 🚨 1. Enforce file size limit
+        raise _too_large(settings.max_file_size_mb)
+    except EmptyFileError:
+        # 🚨 2. Reject empty files
+        raise HTTPException(status_code=400, detail="Empty file is not allowed.")
+    except MalformedUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Blocking DB work + rename: keep it off the event loop
+    return await run_in_threadpool(
+        register_upload,
+        db=db,
+        tenant_id=admin_user.tenant_id,
+        filename=filename,
+        tmp_path=tmp_path,
+        size_bytes=size_bytes,
+        content_hash=content_hash,
+    )
 
-    # 🚨 1. Enforce file size limit
-    if len(content) > MAX_FILE_SIZE_BYTES:
+
+@router.post(
+    "/bulk",
+    response_model=BulkIngestJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=_multipart_body("files", {"type": "array", "items": _BINARY}),
+)
+async def bulk_upload_documents(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    Upload many files at once (`files` fields of a multipart form) and
+    queue them as one ingestion job (admin-only).
+    ZIP archives are expanded; each contained file counts as one document.
+    Returns the job with a per-file summary (QUEUED, or REJECTED with reason);
+    poll GET /documents/bulk/{job_id} for READY / FAILED per file.
+    A Content-Length over BULK_MAX_REQUEST_MB is refused before the body is read.
+    """
+    if not ingestion_jobs.job_queue.has_capacity():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingestion queue is full, try again later",
+        )
+    try:
+        reject_oversized(request, BULK_MAX_REQUEST_BYTES)
+    except FileTooLargeError:
         raise HTTPException(
             status_code=413,
-            detail=f"File too large. Max allowed size is {settings.max_file_size_mb} MB.",
+            detail=f"Request too large. Max allowed size is {settings.bulk_max_request_mb} MB.",
         )
 
-    # 🚨 2. Optional: reject empty files
-    if len(content) == 0:
-        raise HTTPException(status_code=400, detail="Empty file is not allowed.")
+    form = await request.form(max_files=settings.bulk_max_files)
+    try:
+        files: List[UploadFile] = [f for f in form.getlist("files") if not isinstance(f, str)]
+        if not files:
+            raise HTTPException(status_code=400, detail="No files uploaded.")
 
-    # We still pass `file` to save_document; FastAPI keeps underlying file.file
-    doc = save_document(db=db, tenant_id=admin_user.tenant_id, file=file)
-    return doc
+        items, timings = await run_in_threadpool(
+            stage_bulk_upload,
+            db=db,
+            tenant_id=admin_user.tenant_id,
+            files=files,
+            max_bytes=MAX_FILE_SIZE_BYTES,
+        )
+    finally:
+        await form.close()
+    try:
+        return ingestion_jobs.job_queue.submit_bulk(admin_user.tenant_id, items, timings)
+    except ingestion_jobs.QueueFullError:
+        # Filled up while the files were uploading; the documents are kept
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingestion queue is full; the files were stored as UPLOADED documents, "
+                   "ingest them via POST /documents/{id}/ingest",
+        )
+
+
+@router.get("/bulk/{job_id}", response_model=BulkIngestJobResponse)
+def get_bulk_job(
+    job_id: str,
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    Per-file status of a bulk ingestion job (admin-only).
+    """
+    job = ingestion_jobs.get_job(job_id)
+    if (
+        not isinstance(job, ingestion_jobs.BulkIngestJob)
+        or job.tenant_id != admin_user.tenant_id
+    ):
+        raise HTTPException(
+            status_code=404,
+            detail="Bulk ingestion job not found for this tenant",
+        )
+    return job
 
 
 @router.get("/", response_model=PaginatedDocumentsResponse)
 def list_documents(
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(
+        None,
+        alias="status",
+        pattern="^(UPLOADED|PROCESSING|READY|FAILED)$",
+    ),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
-    Paginated documents list.
+    Paginated documents list, newest first.
+    Pass `next_cursor` back as `?cursor=` for index-backed paging;
+    `page` still works (offset) when no cursor is given.
     Returns:
     {
         "items": [...],
-        "total": 123,
+        "total": 123,          # cached for a few seconds, not exact per call
         "page": 1,
-        "limit": 10
+        "limit": 10,
+        "next_cursor": "..."   # null on the last page
     }
     """
     if page < 1:
         page = 1
     if limit < 1:
         limit = 10
+    limit = min(limit, 100)
 
     base_query = db.query(Document).filter(
         Document.tenant_id == current_user.tenant_id
     )
+    if status_filter:
+        base_query = base_query.filter(Document.status == status_filter)
 
-    total = base_query.count()
-
-    docs = (
-        base_query.order_by(Document.created_at.desc())
-        .offset((page - 1) * limit)
-        .limit(limit)
-        .all()
+    total = document_counts.get_or_count(
+        (current_user.tenant_id, status_filter),
+        base_query.count,
     )
 
+    try:
+        docs, next_cursor = keyset_page(
+            base_query,
+            Document.created_at,
+            Document.id,
+            limit=limit,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
     return PaginatedDocumentsResponse(
         items=docs,
         total=total,
         page=page,
         limit=limit,
+        next_cursor=next_cursor,
     )
 
 
-@router.post("/{document_id}/ingest")
+@router.post(
+    "/{document_id}/ingest",
+    response_model=IngestJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 def ingest_document_endpoint(
     document_id: int,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),
+    admin_user: Principal = Depends(deps.require_admin),
+    _profile: None = Depends(deps.request_profiling("ingest")),
 ):
+    """
+    Queue a document for ingestion (admin-only).
+    Poll GET /documents/jobs/{job_id} for progress.
+    """
     doc = (
         db.query(Document)
         .filter(
@@ -112,33 +282,47 @@ def ingest_document_endpoint(
         )
 
     try:
-        chunk_count = ingest_with_langchain(
-            db=db,
-            document=doc,
+        job = ingestion_jobs.submit(
+            document_id=doc.id,
             tenant_id=admin_user.tenant_id,
+            # The job runs (and saves) the profile; it outlives this request
+            profile=profiling.current(),
+        )
+    except ingestion_jobs.QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
         )
-        doc.status = "READY"
-        db.commit()
 
-        return {
-            "document_id": doc.id,
-            "chunks_indexed": chunk_count,
-            "status": "READY",
-        }
-    except Exception as e:
-        doc.status = "FAILED"
-        db.commit()
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def get_ingest_job(
+    job_id: str,
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    Status, chunk count and stage timings of an ingestion job (admin-only).
+    """
+    job = ingestion_jobs.get_job(job_id)
+    if (
+        job is None
+        or isinstance(job, ingestion_jobs.BulkIngestJob)
+        or job.tenant_id != admin_user.tenant_id
+    ):
         raise HTTPException(
-            status_code=500,
-            detail=f"Ingestion failed: {str(e)}",
+            status_code=404,
+            detail="Ingestion job not found for this tenant",
         )
+    return job
 
 
 @router.post("/upload-url", response_model=DocumentResponse)
 def upload_document_url(
     payload: UrlUploadRequest,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),
+    admin_user: Principal = Depends(deps.require_admin),
 ):
     """
     Registers a URL as a document for ingestion (admin-only).
@@ -0,0 +1,110 @@
+# app/api/routes_system.py
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app import vectorstores
+from app.api import deps
+from app.db import pool_stats
+from app.services import (
+    answer_cache,
+    embedding_batcher,
+    embedding_cache,
+    embedding_registry,
+    ingestion_jobs,
+    password_hasher,
+    principal_cache,
+    profiling,
+    tracing,
+    user_search,
+    vectorstore_pool,
+)
+from app.services.principal_cache import Principal
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/stats")
+def system_stats(
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    Runtime stats for this worker process (admin-only).
+    """
+    return {
+        "db_pool": pool_stats(),
+        "embeddings": embedding_registry.stats(),
+        "embedding_cache": embedding_cache.cache.stats(),
+        "vectorstore_pool": vectorstore_pool.pool.stats(),
+        "vector_store": vectorstores.stats(),
+        "ingestion_jobs": ingestion_jobs.job_queue.stats(),
+        "answer_cache": answer_cache.cache.stats(),
+        "query_embedding_batcher": embedding_batcher.batcher.stats(),
+        "principal_cache": principal_cache.cache.stats(),
+        "password_hasher": password_hasher.hasher.stats(),
+        "user_search": user_search.stats(),
+        "tracing": tracing.store.stats(),
+    }
+
+
+@router.get("/profiles")
+def list_profiles(
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    Saved request profiles of the admin's tenant on this worker, newest first.
+    """
+    return [
+        {k: v for k, v in info.items() if k != "path"}
+        for info in profiling.list_profiles(admin_user.tenant_id)
+    ]
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = "prof",
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    `format=prof` (default): raw cProfile dump (snakeviz / pstats).
+    `format=text`: top functions by cumulative time.
+    """
+    info = profiling.find_profile(admin_user.tenant_id, profile_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Profile not found for this tenant")
+    if format == "text":
+        return PlainTextResponse(profiling.render_text(info["path"]))
+    return FileResponse(
+        info["path"],
+        media_type="application/octet-stream",
+        filename=info["path"].name,
+    )
+
+
+@router.get("/traces")
+def list_traces(
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    Kept traces (slow, failed or sampled) of the admin's tenant on this
+    worker, newest first.
+    """
+    return tracing.store.list(admin_user.tenant_id)
+
+
+@router.get("/traces/{trace_id}")
+def get_trace(
+    trace_id: str,
+    format: str = "json",
+    admin_user: Principal = Depends(deps.require_admin),
+):
+    """
+    `format=json` (default): spans with offset / duration from request start.
+    `format=text`: the same as a plain-text waterfall.
+    """
+    trace = tracing.store.get(admin_user.tenant_id, trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found for this tenant")
+    if format == "text":
+        return PlainTextResponse(tracing.render_text(trace))
+    return trace.waterfall()
@@ -1,14 +1,17 @@
 # app/api/routes_users.py
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.api import deps
 from app.models.user import User
+from app.services import principal_cache
+from app.services.principal_cache import Principal
 from app.schemas.user import UserCreateRequest, UserResponse, UserUpdateRequest, UserListResponse
 from app.services.auth_service import hash_password
+from app.services.pagination import keyset_page
+from app.services.user_search import apply_search, user_counts
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -17,7 +20,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 def create_user(
     payload: UserCreateRequest,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),
+    admin_user: Principal = Depends(deps.require_admin),
 ):
     """
     Create a new user in the same tenant as the admin.
@@ -38,6 +41,7 @@ def create_user(
     )
     db.add(new_user)
     db.commit()
+    user_counts.invalidate_tenant(admin_user.tenant_id)
     db.refresh(new_user)
 
     return new_user
@@ -89,35 +93,47 @@ def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
+    match: Literal["contains", "prefix"] = "contains",
+    cursor: Optional[str] = None,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),
+    admin_user: Principal = Depends(deps.require_admin),
 ):
     """
     Paginated + searchable list of users within the admin's tenant.
+    `match=prefix` searches the start of the email (btree index);
+    `contains` matches anywhere (trigram index on Postgres).
+    Pass `next_cursor` back as `?cursor=` instead of `skip` for deep pages.
     """
     base_query = db.query(User).filter(User.tenant_id == admin_user.tenant_id)
 
+    search = (search or "").strip().lower()
     if search:
-        pattern = f"%{search.lower()}%"
-        base_query = base_query.filter(func.lower(User.email).like(pattern))
+        base_query = apply_search(base_query, search, match)
 
-    total = base_query.count()
-
-    users = (
-        base_query
-        .order_by(User.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    total = user_counts.get_or_count(
+        (admin_user.tenant_id, match if search else None, search),
+        base_query.count,
     )
 
-    return UserListResponse(items=users, total=total)
+    try:
+        users, next_cursor = keyset_page(
+            base_query,
+            User.created_at,
+            User.id,
+            limit=limit,
+            cursor=cursor,
+            offset=skip,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return UserListResponse(items=users, total=total, next_cursor=next_cursor)
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),
+    admin_user: Principal = Depends(deps.require_admin),
 ):
     """
     Delete a user within the same tenant.
@@ -147,13 +163,15 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user_id)
+    user_counts.invalidate_tenant(admin_user.tenant_id)
 
 @router.patch("/{user_id}", response_model=UserResponse)
 def update_user(
     user_id: int,
     payload: UserUpdateRequest,
     db: Session = Depends(deps.get_db),
-    admin_user: User = Depends(deps.require_admin),
+    admin_user: Principal = Depends(deps.require_admin),
 ):
     """
     Update email, role, or password of a user in the same tenant.
@@ -183,16 +201,25 @@ def update_user(
         user.email = payload.email
 
     # Role update
+    revoke_tokens = False
     if payload.role:
         if payload.role not in ["admin", "user"]:
             raise HTTPException(400, detail="Invalid role")
+        revoke_tokens = payload.role != user.role
         user.role = payload.role
 
     # Reset Password
     if payload.password:
         user.password_hash = hash_password(payload.password)
+        revoke_tokens = True
+
+    # Tokens issued before a role / password change stop being accepted
+    if revoke_tokens:
+        user.token_version = (user.token_version or 0) + 1
 
     db.commit()
     db.refresh(user)
+    if revoke_tokens:
+        principal_cache.invalidate(user.id)
 
     return user
\ No newline at end of file
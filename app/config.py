@@ -3,24 +3,142 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str = Field(alias="DATABASE_URL")
+    # Connection pool (per worker process); size against the server's connection limit
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(default=30.0, alias="DB_POOL_TIMEOUT_SECONDS")
+    db_pool_recycle_seconds: int = Field(default=1800, alias="DB_POOL_RECYCLE_SECONDS")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    # Postgres only; ignored when DATABASE_URL already has ?sslmode=. Empty disables.
+    db_sslmode: str = Field(default="require", alias="DB_SSLMODE")
+    # Optional async engine (asyncpg / aiosqlite) for async routes
+    db_async_enabled: bool = Field(default=False, alias="DB_ASYNC_ENABLED")
     ai_provider: str = Field(default="gemini")
+    # Simulated response time of the fake provider (AI_PROVIDER=fake, benchmarks)
+    fake_llm_latency_ms: int = Field(default=0, alias="FAKE_LLM_LATENCY_MS")
+    # huggingface (sentence-transformers) | onnx (ONNX Runtime, CPU) | fake (hash vectors, offline benchmarks)
+    embedding_backend: str = Field(default="huggingface", alias="EMBEDDING_BACKEND")
+    # ONNX backend: exported model dir (see app/services/onnx_embeddings.py), int8 weights, batching
+    onnx_model_dir: str = Field(default="models/all-MiniLM-L6-v2-onnx", alias="ONNX_MODEL_DIR")
+    onnx_quantize: bool = Field(default=False, alias="ONNX_QUANTIZE")
+    onnx_batch_size: int = Field(default=32, alias="ONNX_BATCH_SIZE")
+    onnx_threads: int = Field(default=0, alias="ONNX_THREADS")  # 0 = onnxruntime default
     # Local embedding model (HuggingFace)
     local_embed_model: str = Field(
         default="sentence-transformers/all-MiniLM-L6-v2",
         alias="LOCAL_EMBED_MODEL",
     )
+    # Warm embedding model / Chroma / LLM client at startup: background | blocking | off
+    # (background: /ready returns 503 until done)
+    warmup_mode: str = Field(default="background", alias="WARMUP_MODE")
+    # Legacy: true = WARMUP_MODE=blocking
+    warm_embeddings_on_startup: bool = Field(default=False, alias="WARM_EMBEDDINGS_ON_STARTUP")
+    # Skip create_all / column + index checks when schema_version matches the models
+    schema_skip_if_current: bool = Field(default=True, alias="SCHEMA_SKIP_IF_CURRENT")
 
     # Gemini (for chat, etc.)
     gemini_api_key: str = Field(alias="GEMINI_API_KEY")
     gemini_chat_model: str = Field(default="models/gemini-2.5-flash", alias="GEMINI_CHAT_MODEL")
     gemini_embed_model: str = Field(default="models/embedding-001", alias="GEMINI_EMBED_MODEL")  # optional now
 
+    # Content-addressed cache of chunk embeddings (skip re-embedding identical chunks)
+    embedding_cache_enabled: bool = Field(default=True, alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_dir: str = Field(default="embedding_cache", alias="EMBEDDING_CACHE_DIR")
+    embedding_cache_max_entries: int = Field(default=500_000, alias="EMBEDDING_CACHE_MAX_ENTRIES")
+
+    # Micro-batching of chat query embeddings across concurrent requests
+    query_batching_enabled: bool = Field(default=True, alias="QUERY_BATCHING_ENABLED")
+    query_batch_max_size: int = Field(default=32, alias="QUERY_BATCH_MAX_SIZE")
+    query_batch_window_ms: float = Field(default=5.0, alias="QUERY_BATCH_WINDOW_MS")
+
+    # Vector store engine: chroma | numpy (memory-mapped exact search, app/vectorstores/numpy_store.py)
+    vector_store: str = Field(default="chroma", alias="VECTOR_STORE")
     chroma_dir: str = Field(default="chroma_data", alias="CHROMA_DIR")
+    numpy_index_dir: str = Field(default="numpy_index", alias="NUMPY_INDEX_DIR")
+    numpy_index_dtype: str = Field(default="float32", alias="NUMPY_INDEX_DTYPE")  # float32 | float16
+    # Compact a tenant when it has more segments than this, or this share of rows is deleted
+    numpy_index_max_segments: int = Field(default=16, alias="NUMPY_INDEX_MAX_SEGMENTS")
+    numpy_index_compact_ratio: float = Field(default=0.2, alias="NUMPY_INDEX_COMPACT_RATIO")
+    # Pool of open per-tenant vector store handles used by chat
+    vectorstore_pool_size: int = Field(default=32, alias="VECTORSTORE_POOL_SIZE")
+    vectorstore_idle_ttl_seconds: int = Field(default=900, alias="VECTORSTORE_IDLE_TTL_SECONDS")
+    vectorstore_pool_memory_mb: int = Field(default=1024, alias="VECTORSTORE_POOL_MEMORY_MB")
 
     jwt_secret: str = Field(alias="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
+    # How long an authenticated principal is trusted without re-reading users
+    principal_cache_ttl_seconds: int = Field(default=30, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+
+    # Password hashing (pbkdf2_sha256) on a dedicated process pool
+    password_hash_rounds: int = Field(default=29000, alias="PASSWORD_HASH_ROUNDS")
+    password_hash_workers: int = Field(default=0, alias="PASSWORD_HASH_WORKERS")  # 0 = one per core
+    # 0 = 2 x workers, capped at 16: stays well below the 40-thread threadpool
+    # that sync callers block while they wait
+    password_hash_max_pending: int = Field(default=0, alias="PASSWORD_HASH_MAX_PENDING")
+
+    # Per-tenant cache of RAG answers (invalidated when ingestion changes the corpus)
+    answer_cache_enabled: bool = Field(default=True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_ttl_seconds: int = Field(default=600, alias="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_entries: int = Field(default=5000, alias="ANSWER_CACHE_MAX_ENTRIES")
+    # Corpus versions shared by the worker processes on this host (SQLite file)
+    answer_cache_versions_path: str = Field(
+        default="answer_cache/corpus_versions.sqlite3",
+        alias="ANSWER_CACHE_VERSIONS_PATH",
+    )
+
+    # Async chat path: concurrency limits per worker process
+    llm_max_inflight: int = Field(default=32, alias="LLM_MAX_INFLIGHT")
+    llm_queue_timeout_seconds: float = Field(default=10.0, alias="LLM_QUEUE_TIMEOUT_SECONDS")
+    retrieval_max_concurrency: int = Field(default=8, alias="RETRIEVAL_MAX_CONCURRENCY")
+
+    # Document listing totals are cached per tenant for this long
+    documents_count_cache_ttl_seconds: int = Field(default=30, alias="DOCUMENTS_COUNT_CACHE_TTL_SECONDS")
+    users_count_cache_ttl_seconds: int = Field(default=30, alias="USERS_COUNT_CACHE_TTL_SECONDS")
+
+    # Prometheus metrics at /metrics (per worker process)
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    # Tenants beyond this many get the label "other" (bounds series count)
+    metrics_max_tenants: int = Field(default=100, alias="METRICS_MAX_TENANTS")
+    # /metrics requires "Authorization: Bearer <token>"; without a token it
+    # answers 403 unless anonymous scrapes are allowed explicitly
+    metrics_token: str = Field(default="", alias="METRICS_TOKEN")
+    metrics_allow_anonymous: bool = Field(default=False, alias="METRICS_ALLOW_ANONYMOUS")
+
+    # Request profiling (admins: X-Profile: 1 header or ?profile=1)
+    profile_sample_rate: float = Field(default=0.0, alias="PROFILE_SAMPLE_RATE")  # 0..1 of chat/ingest requests
+    profile_dir: str = Field(default="profiles", alias="PROFILE_DIR")
+    profile_max_files: int = Field(default=50, alias="PROFILE_MAX_FILES")
+
+    # Span tracing: slow traces are always kept, others sampled (see /system/traces)
+    tracing_enabled: bool = Field(default=True, alias="TRACING_ENABLED")
+    trace_slow_ms: float = Field(default=1000.0, alias="TRACE_SLOW_MS")
+    trace_sample_rate: float = Field(default=0.01, alias="TRACE_SAMPLE_RATE")
+    trace_buffer_size: int = Field(default=200, alias="TRACE_BUFFER_SIZE")  # per ring
+    # Append kept traces as OTLP/JSON lines to this file (empty = off)
+    trace_export_path: str = Field(default="", alias="TRACE_EXPORT_PATH")
+    trace_service_name: str = Field(default="rag-portal-backend", alias="TRACE_SERVICE_NAME")
 
     max_file_size_mb: int = 10
+
+    # Page-parallel PDF extraction
+    pdf_parallel_workers: int = Field(default=0, alias="PDF_PARALLEL_WORKERS")  # 0 = os.cpu_count(), 1 = off
+    pdf_parallel_min_pages: int = Field(default=64, alias="PDF_PARALLEL_MIN_PAGES")
+    pdf_pages_per_task: int = Field(default=32, alias="PDF_PAGES_PER_TASK")
+
+    # Bulk upload + ingest (POST /documents/bulk)
+    bulk_max_files: int = Field(default=2000, alias="BULK_MAX_FILES")
+    # Whole request body; checked against Content-Length before it is read
+    bulk_max_request_mb: int = Field(default=512, alias="BULK_MAX_REQUEST_MB")
+    bulk_parse_workers: int = Field(default=0, alias="BULK_PARSE_WORKERS")  # 0 = os.cpu_count()
+
+    # Streaming ingestion pipeline: chunks per embed/upsert batch, batches buffered
+    ingest_batch_size: int = Field(default=64, alias="INGEST_BATCH_SIZE")
+    ingest_queue_depth: int = Field(default=4, alias="INGEST_QUEUE_DEPTH")
+
+    # Background ingestion workers
+    ingest_workers: int = Field(default=2, alias="INGEST_WORKERS")
+    ingest_max_jobs_per_tenant: int = Field(default=1, alias="INGEST_MAX_JOBS_PER_TENANT")
+    ingest_max_pending_jobs: int = Field(default=500, alias="INGEST_MAX_PENDING_JOBS")
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,20 +1,353 @@
 # app/db.py
-from sqlalchemy import create_engine
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    insert,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from sqlalchemy.engine.url import make_url
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 class Base(DeclarativeBase):
     pass
 
 
+class _CheckoutTimingMixin:
+    """
+    Records how long callers wait for a pooled connection. `_do_get` is
+    where QueuePool blocks when all connections are checked out, so its
+    duration is the checkout wait (near zero while the pool has idle
+    connections; includes connect time when a new one is opened).
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited_ms = (time.perf_counter() - started) * 1000
+            with _pool_waits_lock:
+                stats = _pool_waits[self._stats_name]
+                stats["checkouts"] += 1
+                stats["timeouts"] += timed_out
+                stats["wait_ms_total"] += waited_ms
+                stats["wait_ms_max"] = max(stats["wait_ms_max"], waited_ms)
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    _stats_name = "sync"
+
+
+class TimedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    _stats_name = "async"
+
+
+_pool_waits_lock = threading.Lock()
+_pool_waits = {
+    name: {"checkouts": 0, "timeouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+    for name in ("sync", "async")
+}
+
+
+def _is_sqlite(u: URL) -> bool:
+    return u.get_backend_name() == "sqlite"
+
+
+def _pool_kwargs(u: URL, poolclass) -> dict:
+    # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+    if _is_sqlite(u) and u.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _sync_connect_args(u: URL) -> dict:
+    if _is_sqlite(u):
+        # Sessions move between threadpool threads
+        return {"check_same_thread": False}
+    if settings.db_sslmode and "sslmode" not in u.query:
+        return {"sslmode": settings.db_sslmode}
+    return {}
+
+
 url = make_url(settings.database_url)
 
 engine = create_engine(
     url,
     echo=False,
-    connect_args={"sslmode": "require"},
+    connect_args=_sync_connect_args(url),
+    **_pool_kwargs(url, TimedQueuePool),
 )
 
+# Sessions are lazy: no connection is checked out until the first query
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def async_url(u: URL) -> tuple[URL, dict]:
+    """
+    Async driver URL (asyncpg / aiosqlite) + connect_args for DATABASE_URL.
+    libpq-only query options (sslmode, channel_binding) are translated or
+    dropped, since asyncpg rejects them.
+    """
+    if _is_sqlite(u):
+        return u.set(drivername="sqlite+aiosqlite"), {}
+
+    sslmode = u.query.get("sslmode") or settings.db_sslmode
+    u = u.set(drivername="postgresql+asyncpg").difference_update_query(
+        ["sslmode", "channel_binding"]
+    )
+    return u, ({"ssl": sslmode} if sslmode else {})
+
+
+_async_engine = None
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+
+def get_async_sessionmaker():
+    """
+    Async engine + session factory, created on first use so asyncpg /
+    aiosqlite are only required when DB_ASYNC_ENABLED is set.
+    """
+    global _async_engine, _async_sessionmaker
+    if not settings.db_async_enabled:
+        raise RuntimeError("Async DB layer is disabled (set DB_ASYNC_ENABLED=true)")
+
+    with _async_lock:
+        if _async_sessionmaker is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            a_url, connect_args = async_url(url)
+            _async_engine = create_async_engine(
+                a_url,
+                echo=False,
+                connect_args=connect_args,
+                **_pool_kwargs(a_url, TimedAsyncQueuePool),
+            )
+            _async_sessionmaker = async_sessionmaker(
+                bind=_async_engine,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        return _async_sessionmaker
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    with _async_lock:
+        async_engine, _async_engine, _async_sessionmaker = _async_engine, None, None
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def _pool_snapshot(pool, name: str) -> dict:
+    with _pool_waits_lock:
+        waits = dict(_pool_waits[name])
+    checkouts = waits["checkouts"]
+    snapshot = {
+        "checkouts": checkouts,
+        "timeouts": waits["timeouts"],
+        "checkout_wait_ms_avg": round(waits["wait_ms_total"] / checkouts, 3) if checkouts else None,
+        "checkout_wait_ms_max": round(waits["wait_ms_max"], 3),
+    }
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            "pool_size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.db_max_overflow,
+        })
+    return snapshot
+
+
+def pool_stats() -> dict:
+    """
+    Checkout wait times and in-use connections for the sync (and async) pool.
+    """
+    stats = {"sync": _pool_snapshot(engine.pool, "sync")}
+    if _async_engine is not None:
+        stats["async"] = _pool_snapshot(_async_engine.sync_engine.pool, "async")
+    return stats
+
+
+def add_missing_columns() -> list[str]:
+    """
+    create_all() only creates missing tables; it never alters existing ones.
+    Add columns that exist on the models but not yet in the DB (nullable or
+    with a server default only), so new optional fields don't need a manual
+    migration. Returns the "table.column" names that were added.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added: list[str] = []
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.warning(
+                        "Cannot auto-add NOT NULL column %s.%s without a server default",
+                        table.name,
+                        column.name,
+                    )
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+
+    if added:
+        logger.info("Added missing columns: %s", ", ".join(added))
+    return added
+
+
+def add_missing_indexes() -> list[str]:
+    """
+    Same gap as add_missing_columns, for indexes declared on models of
+    tables that already exist. Returns the names of the indexes created.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created: list[str] = []
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in present:
+                    continue
+                index.create(bind=conn, checkfirst=True)
+                created.append(index.name)
+
+    if created:
+        logger.info("Created missing indexes: %s", ", ".join(created))
+    return created
+
+
+# -----------------------
+# Schema version
+# -----------------------
+# Bump when startup DDL that isn't described by the models changes
+# (e.g. user_search.ensure_trigram_index), so workers re-run the schema sync.
+SCHEMA_REVISION = 1
+
+# Own metadata: not part of create_all() or of the fingerprint
+_schema_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _schema_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    # Outcome of ensure_trigram_index at the last sync (Postgres only)
+    Column("trigram_index", Boolean, nullable=True),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def schema_fingerprint() -> str:
+    """
+    Hash of the tables, columns and indexes declared on the models (plus
+    SCHEMA_REVISION). Models must be imported before calling this.
+    """
+    parts = [f"revision:{SCHEMA_REVISION}"]
+    for table in sorted(Base.metadata.sorted_tables, key=lambda t: t.name):
+        parts.append(f"table:{table.name}")
+        for column in table.columns:
+            default = column.server_default.arg if column.server_default is not None else None
+            parts.append(f"column:{column.name}:{column.type!r}:{column.nullable}:{default}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"index:{index.name}:{index.unique}:{[str(e) for e in index.expressions]}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def stored_schema_state() -> tuple[str, bool] | None:
+    """
+    (fingerprint, trigram_index) recorded by the last successful schema
+    sync, in one query; None on a fresh database.
+    """
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                select(schema_version.c.fingerprint, schema_version.c.trigram_index)
+                .where(schema_version.c.id == 1)
+            ).first()
+    except SQLAlchemyError:
+        # Table doesn't exist yet
+        return None
+    if row is None:
+        return None
+    return row.fingerprint, bool(row.trigram_index)
+
+
+def _upsert_schema_row(conn, values: dict) -> None:
+    """
+    Insert-or-update row 1 in one statement, so two workers syncing at the
+    same time can't both miss the UPDATE and collide on the INSERT.
+    """
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(schema_version).values(id=1, **values)
+        conn.execute(stmt.on_conflict_do_update(index_elements=[schema_version.c.id], set_=values))
+        return
+
+    # Other dialects: the loser of an INSERT race updates instead
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(schema_version).values(id=1, **values))
+    except IntegrityError:
+        conn.execute(update(schema_version).where(schema_version.c.id == 1).values(**values))
+
+
+def mark_schema_current(fingerprint: str, trigram_index: bool = False) -> None:
+    schema_version.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        _upsert_schema_row(conn, {
+            "fingerprint": fingerprint,
+            "trigram_index": trigram_index,
+            "updated_at": datetime.now(timezone.utc),
+        })
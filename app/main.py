@@ -149,19 +149,31 @@
 # app/main.py
 
 # app/main.py
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import logging
 
-from app.db import Base, engine
+from app.config import settings
+from app.db import engine, dispose_async_engine
 from app.api.routes_auth import router as auth_router   # 👈 only this router added
 from app.api.routes_users import router as users_router
 from app.api.routes_chat import router as chat_router
 from app.api.routes_documents import router as documents_router
+from app.api.routes_system import router as system_router
+from app.services import ingestion_jobs, bulk_ingest_service, pdf_parallel, metrics, startup, tracing
+from app.services.password_hasher import hasher, PasswordHasherBusyError
 
 logger = logging.getLogger(__name__)
 
@@ -174,16 +186,34 @@ origins = [
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    startup.state.record("imports", startup.DONE, time.perf_counter() - _IMPORT_STARTED)
     try:
-        logger.info("Creating database tables if not existing...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables ready.")
+        await run_in_threadpool(startup.sync_schema)
     except Exception as e:
         logger.exception("Error during DB initialization on startup: %s", e)
         raise
 
+    ingestion_jobs.job_queue.start()
+
+    # Embedding model / Chroma / LLM client; in the background by default
+    # (see /ready), so torch + model loading doesn't delay port binding
+    warmup_task = await startup.start_warmup()
+
     yield
 
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+        # Threadpool work can't be interrupted; just stop waiting for it
+        await asyncio.gather(warmup_task, return_exceptions=True)
+
+    # Let running ingestion jobs finish (bounded) before the process exits
+    await run_in_threadpool(ingestion_jobs.job_queue.stop)
+    bulk_ingest_service.shutdown_parse_pool()
+    pdf_parallel.shutdown_pool()
+    hasher.shutdown()
+    await dispose_async_engine()
+    engine.dispose()
+
 
 app = FastAPI(title="Multi-Tenant RAG Portal", lifespan=lifespan)
 
@@ -194,13 +224,55 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# One trace per request (see /system/traces)
+app.add_middleware(tracing.TracingMiddleware)
+# Outermost, so CORS preflights and error responses are timed too
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 # Routers (only auth for now)
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(chat_router, prefix="/chat", tags=["chat"])
 app.include_router(documents_router)
+app.include_router(system_router)
 
 @app.get("/health")
 def health_check():
+    """
+    Liveness: the process is up and serving HTTP.
+    """
     return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness: 200 once startup warm-up has finished, 503 before. Reports
+    per-phase startup timings (and any failed warm-up phase).
+    """
+    snapshot = startup.state.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint(request: Request):
+    """
+    Prometheus text exposition for this worker process. Needs the
+    METRICS_TOKEN bearer token unless METRICS_ALLOW_ANONYMOUS is set.
+    """
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif not settings.metrics_allow_anonymous:
+        raise HTTPException(status_code=403, detail="Set METRICS_TOKEN to enable /metrics")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -10,6 +10,13 @@ class Document(Base):
     filename = Column(String(255), nullable=False)
     storage_path = Column(String(500), nullable=False)  # where file is stored
     status = Column(String(50), default="UPLOADED")  # UPLOADED / PROCESSING / READY / FAILED
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the file (NULL for URLs)
+    size_bytes = Column(BigInteger, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     tenant = relationship("Tenant", backref="documents")
+
+    __table_args__ = (
+        # Keyset pagination: WHERE tenant_id = ? AND (created_at, id) < (?, ?)
+        Index("ix_documents_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -10,6 +10,24 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     role = Column(String(50), default="user")  # "admin" / "user"
+    # Bumped on role / password change; tokens carry it as "ver"
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     tenant = relationship("Tenant", backref="users")
+
+    __table_args__ = (
+        # Keyset pagination of a tenant's users (newest first)
+        Index("ix_users_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
+
+
+# Prefix search: tenant_id = ? AND lower(email) LIKE 'term%'. text_pattern_ops
+# compares bytewise, so Postgres can turn the LIKE prefix into a range scan
+# whatever the database collation (a plain btree only can under "C").
+Index(
+    "ix_users_tenant_email_pattern",
+    User.tenant_id,
+    func.lower(User.email).label("email_lower"),
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+)
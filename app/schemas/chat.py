@@ -5,6 +5,7 @@ from typing import List, Optional
 class ChatRequest(BaseModel):
     query: str
     history: Optional[List[dict]] = []
+    bypass_cache: bool = False  # force a fresh retrieval + LLM call
 
 
 class ChatResponse(BaseModel):
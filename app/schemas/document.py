@@ -1,13 +1,15 @@
 # app/schemas/document.py
 from datetime import datetime
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 
 class DocumentResponse(BaseModel):
     id: int
     filename: str
     status: str
+    size_bytes: Optional[int] = None
+    content_hash: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -21,4 +23,50 @@ class PaginatedDocumentsResponse(BaseModel):
     items: List[DocumentResponse]
     total: int
     page: int
-    limit: int
\ No newline at end of file
+    limit: int
+    # Pass back as ?cursor= for the next page (None on the last page)
+    next_cursor: Optional[str] = None
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    document_id: int
+    status: str  # QUEUED / RUNNING / SUCCEEDED / FAILED
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    chunks_indexed: Optional[int] = None
+    changes: Dict[str, int] = {}  # added / updated / removed / unchanged
+    embedding_cache_hit_ratio: Optional[float] = None
+    timings: Dict[str, float] = {}
+    error: Optional[str] = None
+    profile_id: Optional[str] = None  # set when the job was profiled
+
+    class Config:
+        from_attributes = True
+
+
+class BulkIngestItem(BaseModel):
+    filename: str
+    document_id: Optional[int] = None
+    status: str  # REJECTED / QUEUED / PROCESSING / READY / FAILED
+    chunks_indexed: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkIngestJobResponse(BaseModel):
+    job_id: str
+    status: str  # QUEUED / RUNNING / SUCCEEDED / FAILED (the job; files in items)
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    items: List[BulkIngestItem]
+    succeeded: int
+    failed: int
+    chunks_indexed: Optional[int] = None
+    embedding_cache_hit_ratio: Optional[float] = None
+    timings: Dict[str, float] = {}
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -28,4 +28,6 @@ class UserUpdateRequest(BaseModel):
 
 class UserListResponse(BaseModel):
     items: List[UserResponse]
-    total: int
\ No newline at end of file
+    total: int
+    # Pass back as ?cursor= for the next page (None on the last page)
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,191 @@
+# app/services/answer_cache.py
+"""
+Tenant-scoped cache of RAG answers.
+
+Key: (tenant_id, normalized query, tenant corpus version). Ingestion bumps
+the tenant's corpus version whenever it changes the collection, so answers
+computed against an older corpus are never served again; they simply age
+out of the LRU.
+
+Entries are per process; corpus versions are not. They live in a small
+SQLite file (WAL, like the embedding cache) that every worker process on
+the host reads on each lookup, so an ingest finished by one worker stops
+the others from serving answers computed before it. The vector stores are
+host-local too, so the version is shared exactly as widely as the data.
+"""
+import copy
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case, surrounding whitespace, inner whitespace runs and trailing
+    punctuation don't change the question.
+    """
+    return _WHITESPACE.sub(" ", query.strip().lower()).rstrip("?!. ")
+
+
+class CorpusVersions:
+    """
+    tenant_id -> corpus version in a SQLite file shared between processes.
+    One primary-key read per lookup; a bump is an UPDATE (or the first
+    INSERT) and a read-back in one write transaction. Blocking file I/O:
+    async callers go through a thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds the lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS corpus_versions (
+                    tenant_id INTEGER PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, tenant_id: int) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT version FROM corpus_versions WHERE tenant_id = ?", (tenant_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, tenant_id: int) -> int:
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE: take the write lock up front, so no other process
+            # can bump between our UPDATE and the read-back
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = conn.execute(
+                    "UPDATE corpus_versions SET version = version + 1 WHERE tenant_id = ?",
+                    (tenant_id,),
+                ).rowcount
+                if not updated:
+                    conn.execute(
+                        "INSERT INTO corpus_versions (tenant_id, version) VALUES (?, 1)",
+                        (tenant_id,),
+                    )
+                (version,) = conn.execute(
+                    "SELECT version FROM corpus_versions WHERE tenant_id = ?", (tenant_id,)
+                ).fetchone()
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        return version
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, versions: CorpusVersions):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.versions = versions
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple[float, dict]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def corpus_version(self, tenant_id: int) -> int:
+        return self.versions.get(tenant_id)
+
+    def bump_corpus_version(self, tenant_id: int) -> int:
+        """
+        Mark the tenant's collection as changed (for every process on the
+        host); drops this process's cached answers for it right away.
+        """
+        version = self.versions.bump(tenant_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == tenant_id]:
+                del self._entries[key]
+        return version
+
+    @staticmethod
+    def _key(tenant_id: int, query: str, version: int) -> tuple:
+        return (tenant_id, normalize_query(query), version)
+
+    def get(self, tenant_id: int, query: str) -> dict | None:
+        return self.lookup(tenant_id, query)[0]
+
+    def lookup(self, tenant_id: int, query: str) -> tuple[dict | None, int]:
+        """
+        (cached answer or None, current corpus version). A miss is computed
+        and then `put` under that version, so one versions read serves both.
+        """
+        # Read outside the lock: another process may have bumped it
+        version = self.versions.get(tenant_id)
+        now = time.monotonic()
+        with self._lock:
+            key = self._key(tenant_id, query, version)
+            item = self._entries.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None, version
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(item[1]), version
+
+    def put(self, tenant_id: int, query: str, result: dict, version: int | None = None) -> None:
+        """
+        `version` is the corpus version the answer was computed against;
+        if ingestion bumped it in the meantime, the answer is not stored.
+        """
+        current = self.versions.get(tenant_id)
+        if version is not None and version != current:
+            return
+        with self._lock:
+            key = self._key(tenant_id, query, current)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+cache = AnswerCache(
+    max_entries=settings.answer_cache_max_entries,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    versions=CorpusVersions(settings.answer_cache_versions_path),
+)
+
+
+def bump_corpus_version(tenant_id: int) -> int:
+    return cache.bump_corpus_version(tenant_id)
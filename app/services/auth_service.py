@@ -3,25 +3,47 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 
 from app.config import settings
-
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from app.services.password_hasher import hasher
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return hasher.verify_and_update(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    """
+    (matches, new_hash); new_hash is set when the stored hash uses
+    outdated parameters and should be replaced.
+    """
+    return hasher.verify_and_update(plain_password, hashed_password)
+
+
+# Async variants for async routes: waiting on the hash holds no thread
+async def hash_password_async(password: str) -> str:
+    return await hasher.hash_async(password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    return await hasher.verify_and_update_async(plain_password, hashed_password)
 
 
 def create_access_token(
     subject: str,
     tenant_id: int,
     role: str,
+    token_version: int = 0,
     expires_delta: Optional[timedelta] = None,
 ) -> str:
     if expires_delta is None:
@@ -31,6 +53,7 @@ def create_access_token(
         "sub": subject,
         "tenant_id": tenant_id,
         "role": role,
+        "ver": token_version,
         "exp": datetime.utcnow() + expires_delta,
     }
     encoded_jwt = jwt.encode(
@@ -0,0 +1,366 @@
+# app/services/bulk_ingest_service.py
+"""
+Bulk upload + ingest: many files (or ZIP archives of files) in one request.
+
+In the request (stage_bulk_upload):
+1. Every file is streamed to storage; all Document rows are created in a
+   single transaction (status UPLOADED).
+2. One bulk job is submitted to the ingestion job queue, so it counts
+   against the tenant's concurrency limit like any other ingest.
+
+In the job (run_bulk_ingest, on an ingestion worker thread):
+3. Files are parsed (load + split) in parallel on a process pool sized to
+   the available cores.
+4. Chunks from all files are embedded and written to the tenant's
+   collection in shared batches.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.document import Document
+from app.services.document_service import (
+    STORAGE_ROOT,
+    EmptyFileError,
+    FileTooLargeError,
+    document_counts,
+    stream_to_disk,
+)
+from app.services.ingestion_service import (
+    UPSERT_BATCH_SIZE,
+    assign_chunk_ids,
+    ingest_embeddings,
+    mark_collection_changed,
+    open_ingest_vectorstore,
+    record_ingest_metrics,
+    write_chunks,
+)
+from app.services import metrics
+from app.services.parsing import SUPPORTED_EXTENSIONS, parse_file
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _parse_workers() -> int:
+    return settings.bulk_parse_workers or os.cpu_count() or 1
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    """
+    Shared parse pool, created on first bulk request.
+    "spawn" so workers don't inherit the server's threads / DB connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = _parse_workers()
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Started bulk parse pool with %d workers", workers)
+        return _pool
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _iter_sources(files: list[UploadFile]) -> Iterator[tuple[str, BinaryIO | None, str | None]]:
+    """
+    Yield (filename, stream, error) for every file, expanding ZIP archives.
+    Directory names inside archives are dropped; hidden files are skipped.
+    """
+    for upload in files:
+        name = Path(upload.filename or "upload").name
+        if not name.lower().endswith(".zip"):
+            yield name, upload.file, None
+            continue
+
+        try:
+            archive = zipfile.ZipFile(upload.file)
+        except zipfile.BadZipFile:
+            yield name, None, "Not a valid ZIP archive"
+            continue
+
+        with archive:
+            for info in archive.infolist():
+                member = Path(info.filename).name
+                if info.is_dir() or not member or member.startswith(".") or "__MACOSX" in info.filename:
+                    continue
+                # stream_to_disk still enforces the limit on the real
+                # decompressed size; this just skips obvious offenders early.
+                if info.file_size > settings.max_file_size_mb * 1024 * 1024:
+                    yield member, None, f"File too large. Max allowed size is {settings.max_file_size_mb} MB."
+                    continue
+                with archive.open(info) as stream:
+                    yield member, stream, None
+
+
+def _new_item(filename: str) -> dict:
+    return {
+        "filename": filename,
+        "document_id": None,
+        "status": "REJECTED",
+        "chunks_indexed": None,
+        "error": None,
+    }
+
+
+def _stage_files(
+    tenant_dir: Path,
+    files: list[UploadFile],
+    max_bytes: int,
+) -> tuple[list[dict], list[tuple[dict, Path, int, str]]]:
+    items: list[dict] = []
+    staged: list[tuple[dict, Path, int, str]] = []
+
+    for filename, stream, error in _iter_sources(files):
+        item = _new_item(filename)
+        items.append(item)
+
+        if error:
+            item["error"] = error
+            continue
+        if len(staged) >= settings.bulk_max_files:
+            item["error"] = f"More than {settings.bulk_max_files} files in one request"
+            continue
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in SUPPORTED_EXTENSIONS:
+            item["error"] = f"Unsupported file type: {ext}"
+            continue
+
+        tmp_path = tenant_dir / f".upload-{uuid.uuid4().hex}.part"
+        try:
+            size_bytes, content_hash = stream_to_disk(stream, tmp_path, max_bytes)
+        except FileTooLargeError:
+            item["error"] = f"File too large. Max allowed size is {settings.max_file_size_mb} MB."
+            continue
+        except EmptyFileError:
+            item["error"] = "Empty file is not allowed."
+            continue
+
+        staged.append((item, tmp_path, size_bytes, content_hash))
+
+    return items, staged
+
+
+def _create_documents(
+    db: Session,
+    tenant_id: int,
+    tenant_dir: Path,
+    staged: list[tuple[dict, Path, int, str]],
+) -> list[tuple[dict, Document]]:
+    """
+    One transaction for all rows. On failure nothing is kept (rows or files).
+    """
+    created: list[tuple[dict, Document]] = []
+    final_paths: list[Path] = []
+    try:
+        for item, _, size_bytes, content_hash in staged:
+            doc = Document(
+                tenant_id=tenant_id,
+                filename=item["filename"],
+                storage_path="",
+                status="UPLOADED",
+                content_hash=content_hash,
+                size_bytes=size_bytes,
+            )
+            db.add(doc)
+            created.append((item, doc))
+        db.flush()
+
+        for (item, doc), (_, tmp_path, _, _) in zip(created, staged):
+            file_path = tenant_dir / f"{doc.id}_{item['filename']}"
+            tmp_path.replace(file_path)
+            final_paths.append(file_path)
+            doc.storage_path = str(file_path)
+            item["document_id"] = doc.id
+            item["status"] = "QUEUED"
+        db.commit()
+    except BaseException:
+        db.rollback()
+        for _, tmp_path, _, _ in staged:
+            tmp_path.unlink(missing_ok=True)
+        for path in final_paths:
+            path.unlink(missing_ok=True)
+        raise
+    return created
+
+
+def stage_bulk_upload(
+    db: Session,
+    tenant_id: int,
+    files: list[UploadFile],
+    max_bytes: int,
+) -> tuple[list[dict], dict[str, float]]:
+    """
+    Stream the files to storage and create their rows (one transaction).
+    Returns (items, timings); accepted items are QUEUED with a document_id,
+    the others REJECTED with a reason.
+    """
+    tenant_dir = STORAGE_ROOT / str(tenant_id)
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    items, staged = _stage_files(tenant_dir, files, max_bytes)
+    created = _create_documents(db, tenant_id, tenant_dir, staged)
+    if created:
+        document_counts.invalidate_tenant(tenant_id)
+    return items, {"upload_seconds": round(time.perf_counter() - started, 3)}
+
+
+def run_bulk_ingest(db: Session, tenant_id: int, items: list[dict], timings: dict[str, float]) -> dict:
+    """
+    Parse, embed and write the QUEUED items' documents. Updates `items`
+    (status READY / FAILED, chunks_indexed, error) and `timings` in place,
+    so the job's status endpoint shows progress per file.
+
+    Returns {"chunks_indexed", "embedding_cache_hit_ratio"}.
+    """
+    by_id = {i["document_id"]: i for i in items if i["status"] == "QUEUED"}
+    docs = (
+        db.query(Document)
+        .filter(Document.tenant_id == tenant_id, Document.id.in_(list(by_id)))
+        .all()
+    ) if by_id else []
+    for doc in docs:
+        doc.status = "PROCESSING"
+        by_id[doc.id]["status"] = "PROCESSING"
+    for document_id in by_id.keys() - {d.id for d in docs}:
+        by_id[document_id]["status"] = "FAILED"
+        by_id[document_id]["error"] = "Document not found for this tenant"
+    db.commit()
+
+    # Parse in parallel, embed + write in shared batches as results arrive
+    started = time.perf_counter()
+    embeddings = ingest_embeddings()
+    vectorstore = open_ingest_vectorstore(tenant_id, embeddings)
+
+    pending: list[tuple[dict, Document, list, list[str]]] = []
+    pending_chunks = 0
+    wrote_any = False
+
+    def flush() -> None:
+        nonlocal pending, pending_chunks, wrote_any
+        if not pending:
+            return
+        chunks = [c for _, _, doc_chunks, _ in pending for c in doc_chunks]
+        ids = [i for _, _, _, doc_ids in pending for i in doc_ids]
+        # Before the write: a batch that fails midway may have stored some rows
+        wrote_any = wrote_any or bool(chunks)
+        try:
+            write_chunks(vectorstore, embeddings, chunks, ids, timings)
+            status = "READY"
+            error = None
+        except Exception as e:
+            logger.exception("Bulk upsert of %d chunks failed", len(chunks))
+            metrics.inc(metrics.errors, "bulk_ingest", tenant_id=tenant_id)
+            status = "FAILED"
+            error = f"Ingestion failed: {str(e)}"
+        for item, doc, doc_chunks, _ in pending:
+            doc.status = status
+            item["status"] = status
+            item["error"] = error
+            item["chunks_indexed"] = len(doc_chunks) if status == "READY" else None
+        db.commit()
+        pending = []
+        pending_chunks = 0
+
+    try:
+        if docs:
+            pool = _parse_pool()
+            # Sliding window: at most 2 files per worker parsed ahead of the
+            # embed/write loop, and a handled future (holding its file's
+            # chunks) is dropped right away, so memory stays bounded however
+            # many files the upload has.
+            window = _parse_workers() * 2
+            queued = iter(docs)
+            futures: dict = {}
+            while True:
+                for doc in islice(queued, window - len(futures)):
+                    # pdf_workers=1: each pool worker already has a core of its own
+                    future = pool.submit(parse_file, doc.storage_path, tenant_id, doc.id, 1)
+                    futures[future] = (by_id[doc.id], doc)
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item, doc = futures[future]
+                    del futures[future]
+                    try:
+                        chunks = future.result()
+                    except Exception as e:
+                        logger.warning("Parsing %s failed: %s", item["filename"], e)
+                        metrics.inc(metrics.errors, "bulk_parse", tenant_id=tenant_id)
+                        doc.status = "FAILED"
+                        item["status"] = "FAILED"
+                        item["error"] = f"Ingestion failed: {str(e)}"
+                        db.commit()
+                        continue
+
+                    ids = assign_chunk_ids(doc.id, chunks)
+                    pending.append((item, doc, chunks, ids))
+                    pending_chunks += len(chunks)
+                    if pending_chunks >= UPSERT_BATCH_SIZE:
+                        flush()
+            flush()
+    finally:
+        if wrote_any:
+            mark_collection_changed(tenant_id)
+        document_counts.invalidate_tenant(tenant_id)
+
+    timings["ingest_seconds"] = round(time.perf_counter() - started, 3)
+    for key in ("embed_seconds", "upsert_seconds"):
+        if key in timings:
+            timings[key] = round(timings[key], 3)
+
+    chunks_indexed = sum(i["chunks_indexed"] or 0 for i in items)
+    record_ingest_metrics(
+        tenant_id,
+        timings,
+        chunks_indexed,
+        embeddings.report() if hasattr(embeddings, "report") else None,
+    )
+    return {
+        "chunks_indexed": chunks_indexed,
+        "embedding_cache_hit_ratio": getattr(embeddings, "hit_ratio", None),
+    }
+
+
+def fail_unfinished(db: Session, tenant_id: int, items: list[dict], error: str) -> None:
+    """
+    After the bulk job itself failed: mark every file not yet READY / FAILED.
+    """
+    unfinished = {i["document_id"]: i for i in items if i["status"] in ("QUEUED", "PROCESSING")}
+    if not unfinished:
+        return
+    for item in unfinished.values():
+        item["status"] = "FAILED"
+        item["error"] = error
+    (
+        db.query(Document)
+        .filter(Document.tenant_id == tenant_id, Document.id.in_(list(unfinished)))
+        .update({Document.status: "FAILED"}, synchronize_session=False)
+    )
+    db.commit()
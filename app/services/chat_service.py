@@ -1,38 +1,68 @@
 # app/services/chat_service.py
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
-from app.config import settings
 from app.ai import get_ai_provider
+from app.config import settings
+from app.services import answer_cache, embedding_batcher, metrics, profiling, tracing
+from app.services.vectorstore_pool import get_vectorstore
 
+TOP_K = 4
 
-def get_retriever(tenant_id: int):
-    collection_name = f"tenant_{tenant_id}"
 
-    embeddings = HuggingFaceEmbeddings(
-        model_name=settings.local_embed_model
-    )
+class LLMBusyError(RuntimeError):
+    """
+    Raised when no LLM slot frees up within settings.llm_queue_timeout_seconds.
+    """
+
+
+def retrieve(query: str, tenant_id: int) -> list:
+    """
+    Top-k chunks for `query` from the tenant's collection.
+
+    The query vector comes from the micro-batcher (shared forward pass with
+    concurrent requests; computed in this thread when the request is
+    profiled), then we search by vector on the pooled handle.
+    """
+    with profiling.profiled():
+        with metrics.stage("chat", "embed", tenant_id):
+            query_vector = embedding_batcher.embed_query(query)
+
+        with metrics.stage("chat", "vector_search", tenant_id):
+            # Pooled per-tenant handle: no client/collection/index setup on hot tenants
+            vectorstore = get_vectorstore(tenant_id)
+            return vectorstore.similarity_search_by_vector(query_vector, k=TOP_K)
 
-    vectorstore = Chroma(
-        collection_name=collection_name,
-        embedding_function=embeddings,
-        persist_directory=settings.chroma_dir,
-    )
 
-    return vectorstore.as_retriever(search_kwargs={"k": 4})
+def prepare_prompt(query: str, docs: list, tenant_id: int) -> list[dict]:
+    """
+    build_messages + prompt_build timing + prompt size counter.
+    """
+    with metrics.stage("chat", "prompt_build", tenant_id):
+        messages = build_messages(query, docs)
+    metrics.inc(
+        metrics.llm_chars,
+        "prompt",
+        tenant_id=tenant_id,
+        amount=sum(len(m["content"]) for m in messages),
+    )
+    return messages
 
 
-def rag_answer(query: str, tenant_id: int):
-    retriever = get_retriever(tenant_id)
+def count_answer(answer: str, tenant_id: int) -> None:
+    metrics.inc(metrics.llm_chars, "completion", tenant_id=tenant_id, amount=len(answer or ""))
 
-    docs = retriever.invoke(query)
 
+def build_messages(query: str, docs: list) -> list[dict]:
     context = "\n\n".join(
         f"[Doc {d.metadata.get('document_id', '?')}]\n{d.page_content}"
         for d in docs
     )
 
-    messages = [
+    return [
         {
             "role": "system",
             "content": "You are a helpful assistant. Use ONLY the provided context.",
@@ -43,16 +73,248 @@ def rag_answer(query: str, tenant_id: int):
         },
     ]
 
+
+def format_sources(docs: list) -> list[dict]:
+    return [
+        {
+            "document_id": d.metadata.get("document_id"),
+            "text": d.page_content[:300] + "...",
+        }
+        for d in docs
+    ]
+
+
+def _cache_enabled(use_cache: bool) -> bool:
+    return use_cache and settings.answer_cache_enabled
+
+
+def _cached_answer(query: str, tenant_id: int, use_cache: bool) -> tuple[dict | None, int]:
+    """
+    (cached answer or None, corpus version to store a fresh answer under).
+    The version is read before retrieval: if ingestion lands mid-request,
+    the fresh answer is not cached.
+    """
+    if not _cache_enabled(use_cache):
+        return None, 0
+    cached, version = answer_cache.cache.lookup(tenant_id, query)
+    metrics.inc(
+        metrics.cache_requests,
+        "answer",
+        "miss" if cached is None else "hit",
+        tenant_id=tenant_id,
+    )
+    return cached, version
+
+
+def _store_answer(query: str, tenant_id: int, use_cache: bool, result: dict, version: int) -> None:
+    if _cache_enabled(use_cache):
+        answer_cache.cache.put(tenant_id, query, result, version=version)
+
+
+# Corpus versions are a SQLite read (shared between workers): the async
+# path does it on a thread, not on the event loop.
+async def _acached_answer(query: str, tenant_id: int, use_cache: bool) -> tuple[dict | None, int]:
+    if not _cache_enabled(use_cache):
+        return None, 0
+    return await asyncio.to_thread(_cached_answer, query, tenant_id, use_cache)
+
+
+async def _astore_answer(query: str, tenant_id: int, use_cache: bool, result: dict, version: int) -> None:
+    if _cache_enabled(use_cache):
+        await asyncio.to_thread(_store_answer, query, tenant_id, use_cache, result, version)
+
+
+def rag_answer(query: str, tenant_id: int, use_cache: bool = True):
+    cached, version = _cached_answer(query, tenant_id, use_cache)
+    if cached is not None:
+        return cached
+
+    docs = retrieve(query, tenant_id)
+    messages = prepare_prompt(query, docs, tenant_id)
+
     ai = get_ai_provider()
-    answer = ai.chat(messages)
+    with metrics.stage("chat", "llm", tenant_id):
+        answer = ai.chat(messages)
+    count_answer(answer, tenant_id)
 
-    return {
+    result = {
         "answer": answer,
-        "sources": [
-            {
-                "document_id": d.metadata.get("document_id"),
-                "text": d.page_content[:300] + "...",
-            }
-            for d in docs
-        ],
+        "sources": format_sources(docs),
     }
+    _store_answer(query, tenant_id, use_cache, result, version)
+    return result
+
+
+def rag_answer_stream(query: str, tenant_id: int, use_cache: bool = True):
+    """
+    Same pipeline as rag_answer, as a stream of events:
+      {"event": "sources", "data": [...]}   once, before generation starts
+      {"event": "token", "data": "..."}     per answer chunk
+      {"event": "done", "data": {}}         at the end
+    A cached answer is sent as a single token event.
+    """
+    cached, version = _cached_answer(query, tenant_id, use_cache)
+    if cached is not None:
+        yield {"event": "sources", "data": cached["sources"]}
+        yield {"event": "token", "data": cached["answer"]}
+        yield {"event": "done", "data": {}}
+        return
+
+    docs = retrieve(query, tenant_id)
+    sources = format_sources(docs)
+    yield {"event": "sources", "data": sources}
+    messages = prepare_prompt(query, docs, tenant_id)
+
+    ai = get_ai_provider()
+    pieces: list[str] = []
+    # Timed manually: time spent in the consumer between tokens is not LLM time
+    llm_seconds = 0.0
+    stream = ai.chat_stream(messages)
+    while True:
+        started = time.perf_counter()
+        piece = next(stream, None)
+        llm_seconds += time.perf_counter() - started
+        if piece is None:
+            break
+        pieces.append(piece)
+        yield {"event": "token", "data": piece}
+    metrics.observe_stage("chat", "llm", tenant_id, llm_seconds)
+    count_answer("".join(pieces), tenant_id)
+
+    # Only completed streams are cached (client disconnects stop the generator)
+    _store_answer(
+        query, tenant_id, use_cache, {"answer": "".join(pieces), "sources": sources}, version
+    )
+
+    yield {"event": "done", "data": {}}
+
+
+# -----------------------
+# Async path (used by the chat routes)
+# -----------------------
+# Retrieval (embedding + vector search) is blocking CPU/disk work: it runs
+# on its own bounded pool so it can't take over Starlette's threadpool.
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=settings.retrieval_max_concurrency,
+    thread_name_prefix="retrieval",
+)
+# Caps concurrent LLM calls per process (provider rate limits / cost)
+_llm_slots = asyncio.Semaphore(settings.llm_max_inflight)
+
+
+async def aretrieve(query: str, tenant_id: int) -> list:
+    loop = asyncio.get_running_loop()
+    # Carry the caller's contextvars into the worker thread
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_retrieval_executor, ctx.run, retrieve, query, tenant_id)
+
+
+@asynccontextmanager
+async def _llm_slot():
+    try:
+        with tracing.span("chat.llm_slot_wait"):
+            await asyncio.wait_for(
+                _llm_slots.acquire(),
+                timeout=settings.llm_queue_timeout_seconds,
+            )
+    except asyncio.TimeoutError:
+        raise LLMBusyError("Too many chat requests in flight, try again shortly")
+    try:
+        yield
+    finally:
+        _llm_slots.release()
+
+
+async def arag_answer(query: str, tenant_id: int, use_cache: bool = True):
+    """
+    Async rag_answer: the event loop is never blocked, and a slow LLM
+    response only holds an LLM slot, not a server thread.
+    """
+    session = profiling.current()
+    if session is not None:
+        return await _profiled_answer(session, query, tenant_id, use_cache)
+
+    cached, version = await _acached_answer(query, tenant_id, use_cache)
+    tracing.set_root_attribute("answer_cache", "hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
+
+    docs = await aretrieve(query, tenant_id)
+    messages = prepare_prompt(query, docs, tenant_id)
+
+    ai = get_ai_provider()
+    async with _llm_slot():
+        with metrics.stage("chat", "llm", tenant_id):
+            answer = await ai.achat(messages)
+    count_answer(answer, tenant_id)
+
+    result = {
+        "answer": answer,
+        "sources": format_sources(docs),
+    }
+    await _astore_answer(query, tenant_id, use_cache, result, version)
+    return result
+
+
+async def _profiled_answer(session, query: str, tenant_id: int, use_cache: bool):
+    """
+    Profiled requests run the sync pipeline in one thread, so the profile
+    covers the whole request (retrieval, prompt, LLM call) without other
+    requests' coroutines interleaved on the event loop.
+    """
+
+    def run():
+        with profiling.profiled():
+            return rag_answer(query, tenant_id, use_cache)
+
+    try:
+        async with _llm_slot():
+            # to_thread carries the contextvars (profile session) along
+            return await asyncio.to_thread(run)
+    finally:
+        await asyncio.to_thread(session.save)
+
+
+async def arag_answer_stream(query: str, tenant_id: int, use_cache: bool = True):
+    """
+    Async rag_answer_stream (same events). When profiled, only retrieval
+    is captured; the profile is saved before generation starts.
+    """
+    cached, version = await _acached_answer(query, tenant_id, use_cache)
+    if cached is not None:
+        yield {"event": "sources", "data": cached["sources"]}
+        yield {"event": "token", "data": cached["answer"]}
+        yield {"event": "done", "data": {}}
+        return
+
+    docs = await aretrieve(query, tenant_id)
+    session = profiling.current()
+    if session is not None:
+        await asyncio.to_thread(session.save)
+    sources = format_sources(docs)
+    yield {"event": "sources", "data": sources}
+    messages = prepare_prompt(query, docs, tenant_id)
+
+    ai = get_ai_provider()
+    pieces: list[str] = []
+    llm_seconds = 0.0
+    async with _llm_slot():
+        stream = ai.achat_stream(messages).__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                piece = await stream.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                llm_seconds += time.perf_counter() - started
+            pieces.append(piece)
+            yield {"event": "token", "data": piece}
+    metrics.observe_stage("chat", "llm", tenant_id, llm_seconds)
+    count_answer("".join(pieces), tenant_id)
+
+    await _astore_answer(
+        query, tenant_id, use_cache, {"answer": "".join(pieces), "sources": sources}, version
+    )
+
+    yield {"event": "done", "data": {}}
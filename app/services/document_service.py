@@ -1,57 +1,121 @@
 # app/services/document_service.py
+import hashlib
+import uuid
 from pathlib import Path
-from fastapi import UploadFile
+from typing import BinaryIO
+
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.document import Document
+from app.services.pagination import CountCache
 
 
 STORAGE_ROOT = Path("storage")
+CHUNK_SIZE = 1024 * 1024
+
+
+# Per-tenant document totals for listings (exact COUNT(*), reused for a short TTL)
+document_counts = CountCache(ttl_seconds=settings.documents_count_cache_ttl_seconds)
+
+
+class FileTooLargeError(ValueError):
+    pass
+
+
+class EmptyFileError(ValueError):
+    pass
+
 
+class MalformedUploadError(ValueError):
+    pass
 
-def save_document(
+
+def stream_to_disk(src: BinaryIO, dest: Path, max_bytes: int) -> tuple[int, str]:
+    """
+    Copy `src` to `dest` in CHUNK_SIZE pieces, computing size and sha256
+    in the same pass. Aborts as soon as `max_bytes` is exceeded; the
+    partial file is removed on any failure.
+    Returns (size_bytes, sha256 hex digest).
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with dest.open("wb") as f:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise FileTooLargeError(f"File exceeds {max_bytes} bytes")
+                hasher.update(chunk)
+                f.write(chunk)
+        if size == 0:
+            raise EmptyFileError("Empty file is not allowed.")
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return size, hasher.hexdigest()
+
+
+def upload_temp_path(tenant_id: int) -> Path:
+    """
+    Temp name for an incoming upload, in the tenant's storage dir (so the
+    final move is a rename).
+    """
+    tenant_dir = STORAGE_ROOT / str(tenant_id)
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+    return tenant_dir / f".upload-{uuid.uuid4().hex}.part"
+
+
+def register_upload(
     db: Session,
     tenant_id: int,
-    file: UploadFile,
+    filename: str | None,
+    tmp_path: Path,
+    size_bytes: int,
+    content_hash: str,
 ) -> Document:
     """
-    1. Create Document row
-    2. Save file to disk under storage/<tenant_id>/<document_id>_<filename>
-    3. Update storage_path
+    Store an upload already streamed to `tmp_path` (see upload_temp_path):
+    1. Create the Document row
+    2. Rename the file to storage/<tenant_id>/<document_id>_<filename>
+    `tmp_path` is consumed either way; nothing is left in the DB on failure.
     """
-    # 1. Create DB row with placeholder storage_path
-    doc = Document(
-        tenant_id=tenant_id,
-        filename=file.filename,
-        storage_path="",  # will be updated after we know the path
-        status="UPLOADED",
-    )
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    tenant_dir = tmp_path.parent
+    # Strip any client-supplied directories from the name
+    filename = Path(filename or "upload").name
 
-    # 2. Build storage path
-    tenant_dir = STORAGE_ROOT / str(tenant_id)
-    tenant_dir.mkdir(parents=True, exist_ok=True)
+    file_path: Path | None = None
+    try:
+        # 1. Create DB row (flush to get the id for the final path)
+        doc = Document(
+            tenant_id=tenant_id,
+            filename=filename,
+            storage_path="",
+            status="UPLOADED",
+            content_hash=content_hash,
+            size_bytes=size_bytes,
+        )
+        db.add(doc)
+        db.flush()
 
-    safe_name = f"{doc.id}_{file.filename}"
-    file_path = tenant_dir / safe_name
+        # 2. Rename into place (same directory: no second copy)
+        file_path = tenant_dir / f"{doc.id}_{filename}"
+        tmp_path.replace(file_path)
 
-    # 3. Save file contents
-    with file_path.open("wb") as f:
-        # read in chunks to avoid big memory usage
-        while True:
-            chunk = file.file.read(1024 * 1024)
-            if not chunk:
-                break
-            f.write(chunk)
+        doc.storage_path = str(file_path)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        tmp_path.unlink(missing_ok=True)
+        if file_path is not None:
+            file_path.unlink(missing_ok=True)
+        raise
 
-    # 4. Update document with final storage_path
-    doc.storage_path = str(file_path)
-    db.add(doc)
-    db.commit()
+    document_counts.invalidate_tenant(tenant_id)
     db.refresh(doc)
-
     return doc
 
 
@@ -72,5 +136,6 @@ def save_url_document(
     )
     db.add(doc)
     db.commit()
+    document_counts.invalidate_tenant(tenant_id)
     db.refresh(doc)
     return doc
@@ -0,0 +1,159 @@
+# app/services/embedding_batcher.py
+"""
+Micro-batching of chat query embeddings.
+
+Concurrent chat requests each need one query vector. Instead of running
+many batch-size-1 forward passes, callers put their text on a queue; a
+single background thread collects whatever arrives within `max_wait_ms`
+(or until `max_batch_size` texts are waiting), embeds them in one call
+and hands each caller its vector back.
+
+With a single request in flight the extra latency is at most `max_wait_ms`.
+
+Profiled requests skip the batcher: their forward pass runs in the
+request's own thread, inside its `profiling.profiled()` block, instead of
+on the batcher thread where the profile can't see it.
+"""
+import bisect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+from app.config import settings
+from app.services import profiling
+from app.services.embedding_registry import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class _Histogram:
+    """
+    Fixed-bucket histogram (cumulative counts are derived when reported).
+    """
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def snapshot(self) -> dict:
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.n,
+            "mean": round(self.total / self.n, 3) if self.n else None,
+        }
+
+
+class QueryEmbeddingBatcher:
+    def __init__(
+        self,
+        embed_batch: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ):
+        self._embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+
+        self._queue: "queue.Queue[tuple[str, Future, float]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.batch_sizes = _Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.queue_wait_ms = _Histogram([1, 2, 5, 10, 25, 50, 100, 250])
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="query-embedding-batcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def embed(self, text: str) -> list[float]:
+        """
+        Blocking: returns the embedding of `text`, computed in a shared batch.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> list[tuple[str, Future, float]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+
+            with self._stats_lock:
+                self.batch_sizes.observe(len(batch))
+                for _, _, enqueued in batch:
+                    self.queue_wait_ms.observe((started - enqueued) * 1000)
+
+            try:
+                vectors = self._embed_batch([text for text, _, _ in batch])
+            except Exception as e:
+                logger.exception("Query embedding batch of %d failed", len(batch))
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+                "pending": self._queue.qsize(),
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            }
+
+
+def _embed_queries(texts: list[str]) -> list[list[float]]:
+    # For the sentence-transformers models we use, query and document
+    # encoding are the same forward pass, so a batch of queries is just
+    # embed_documents().
+    return get_embeddings().embed_documents(texts)
+
+
+batcher = QueryEmbeddingBatcher(
+    embed_batch=_embed_queries,
+    max_batch_size=settings.query_batch_max_size,
+    max_wait_ms=settings.query_batch_window_ms,
+)
+
+
+def embed_query(text: str) -> list[float]:
+    if not settings.query_batching_enabled or profiling.current() is not None:
+        return get_embeddings().embed_query(text)
+    return batcher.embed(text)
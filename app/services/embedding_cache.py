@@ -0,0 +1,209 @@
+# app/services/embedding_cache.py
+"""
+On-disk, content-addressed cache of chunk embeddings.
+
+Key: (embedding model name, sha256 of the chunk text). Re-uploaded files,
+nightly wiki re-exports and shared boilerplate produce byte-identical
+chunks; those are served from the cache instead of running the model again.
+
+Storage is a single SQLite file (WAL mode, safe to share between worker
+processes). When it grows past `max_entries`, the least recently used
+rows are deleted.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_SQL_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _to_blob(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _from_blob(blob: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._writes_since_trim = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds the lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        if not hashes:
+            return found
+
+        unique = list(dict.fromkeys(hashes))
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for i in range(0, len(unique), _SQL_BATCH):
+                batch = unique[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = _from_blob(blob)
+
+            if found:
+                # Touch hits so eviction stays LRU
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                conn.commit()
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(model, h, _to_blob(v), now) for h, v in items.items()],
+            )
+            conn.commit()
+
+            self._writes_since_trim += len(items)
+            if self._writes_since_trim >= max(1, self.max_entries // 100):
+                self._writes_since_trim = 0
+                self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        """
+        Drop least recently used rows until we are ~10% under the bound.
+        """
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+        to_delete = count - int(self.max_entries * 0.9)
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN ("
+            "SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (to_delete,),
+        )
+        conn.commit()
+        logger.info("Embedding cache trimmed %d entries", to_delete)
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        size_bytes = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {
+            "entries": count,
+            "max_entries": self.max_entries,
+            "file_bytes": size_bytes,
+        }
+
+
+class CachedEmbeddings:
+    """
+    Wraps an Embeddings instance; document embeddings go through the cache.
+    Duck-typed (embed_documents / embed_query) rather than subclassing
+    LangChain's Embeddings: /system/stats imports this module, and
+    langchain_core would otherwise load at app import.
+    Query embeddings are passed straight through (they are rarely repeated
+    verbatim and sit on the latency-sensitive chat path).
+
+    Create one per ingest so `hits` / `misses` describe that ingest.
+    """
+
+    def __init__(self, underlying, model_name: str, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model_name, hashes)
+
+        # Embed each distinct missing text once
+        missing: dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, fresh)
+            cached.update(fresh)
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    @property
+    def hit_ratio(self) -> float | None:
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else None
+
+    def report(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+cache = EmbeddingCache(
+    path=os.path.join(settings.embedding_cache_dir, "embeddings.sqlite3"),
+    max_entries=settings.embedding_cache_max_entries,
+)
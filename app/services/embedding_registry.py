@@ -0,0 +1,158 @@
+# app/services/embedding_registry.py
+"""
+Process-wide registry of local embedding models.
+
+Loading a sentence-transformers model means reading the weights from disk
+(or the HF cache) and building the torch module, which takes seconds and
+a few hundred MB. We do that once per model name per process and hand the
+same instance to every caller (chat + ingestion).
+"""
+import logging
+import os
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_registry_lock = threading.Lock()
+_load_locks: dict[str, threading.Lock] = {}
+_models: dict[str, object] = {}
+_stats: dict[str, dict] = {}
+
+
+def _current_rss_bytes() -> int | None:
+    """
+    Resident set size of this process, or None where /proc is unavailable
+    (e.g. Windows / macOS dev machines).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _parameter_bytes(embeddings) -> int | None:
+    """
+    Size of the model weights, if the underlying SentenceTransformer is reachable.
+    """
+    client = getattr(embeddings, "_client", None)
+    if client is None or not hasattr(client, "parameters"):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in client.parameters())
+    except Exception:
+        return None
+
+
+def _create(model_name: str):
+    backend = settings.embedding_backend.lower()
+    if backend == "fake":
+        from app.ai.fake_provider import FakeEmbeddings
+
+        return FakeEmbeddings()
+    if backend == "onnx":
+        # Exported copy of the model in onnx_model_dir; model_name isn't fetched
+        from app.services.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(
+            settings.onnx_model_dir,
+            quantize=settings.onnx_quantize,
+            batch_size=settings.onnx_batch_size,
+            threads=settings.onnx_threads,
+        )
+
+    # Heavy import kept lazy (see README: startup on Render)
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+def cache_key(model_name: str | None = None) -> str:
+    """
+    Model name used to key the embedding cache. Non-default backends are
+    prefixed so their vectors never mix with the real model's.
+    """
+    name = model_name or settings.local_embed_model
+    backend = settings.embedding_backend.lower()
+    if backend == "onnx" and settings.onnx_quantize:
+        backend = "onnx-int8"
+    return name if backend == "huggingface" else f"{backend}:{name}"
+
+
+def _load(model_name: str):
+    rss_before = _current_rss_bytes()
+    started = time.perf_counter()
+
+    embeddings = _create(model_name)
+
+    load_seconds = time.perf_counter() - started
+    rss_after = _current_rss_bytes()
+
+    rss_delta = None
+    if rss_before is not None and rss_after is not None:
+        rss_delta = rss_after - rss_before
+
+    _stats[model_name] = {
+        "model_name": model_name,
+        "backend": settings.embedding_backend.lower(),
+        "load_seconds": round(load_seconds, 3),
+        "rss_delta_bytes": rss_delta,
+        "parameter_bytes": _parameter_bytes(embeddings),
+        "loaded_at": time.time(),
+    }
+    logger.info(
+        "Loaded embedding model %s in %.2fs (rss delta: %s bytes)",
+        model_name,
+        load_seconds,
+        rss_delta,
+    )
+    return embeddings
+
+
+def get_embeddings(model_name: str | None = None):
+    """
+    Return the shared embeddings instance for `model_name`
+    (defaults to settings.local_embed_model), loading it on first use.
+
+    Thread-safe: concurrent first callers wait for a single load instead
+    of each loading their own copy. Different models load independently.
+    """
+    name = model_name or settings.local_embed_model
+
+    embeddings = _models.get(name)
+    if embeddings is not None:
+        return embeddings
+
+    with _registry_lock:
+        load_lock = _load_locks.setdefault(name, threading.Lock())
+
+    with load_lock:
+        embeddings = _models.get(name)
+        if embeddings is None:
+            embeddings = _load(name)
+            _models[name] = embeddings
+
+    return embeddings
+
+
+def warm_up(model_names: list[str] | None = None) -> None:
+    """
+    Load the given models (default: the configured local model) ahead of
+    the first request, and run one forward pass (first-call setup).
+    """
+    for name in model_names or [settings.local_embed_model]:
+        get_embeddings(name).embed_query("warm-up")
+
+
+def stats() -> dict:
+    """
+    Load time / memory footprint per loaded model, plus current process RSS.
+    """
+    return {
+        "models": [dict(s) for s in _stats.values()],
+        "process_rss_bytes": _current_rss_bytes(),
+    }
@@ -0,0 +1,362 @@
+# app/services/ingestion_jobs.py
+"""
+In-process background queue for document ingestion.
+
+`POST /documents/{id}/ingest` only enqueues a job; a small pool of worker
+threads runs `ingest_with_langchain` and moves `Document.status` through
+UPLOADED -> PROCESSING -> READY / FAILED. `POST /documents/bulk` enqueues
+one BulkIngestJob covering all of its files (per-file status in `items`).
+
+Jobs are scheduled FIFO, except that a tenant never has more than
+`max_jobs_per_tenant` jobs running at once: a big batch from one tenant
+waits in the queue while other tenants' jobs (and chat traffic) proceed.
+
+Job records live in memory of the worker process that accepted them.
+`Document.status` in the DB stays the source of truth across processes.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.document import Document
+from app.services import metrics, profiling, tracing
+from app.services.document_service import document_counts
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle (separate from Document.status)
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class IngestJob:
+    def __init__(
+        self,
+        document_id: int | None,
+        tenant_id: int,
+        profile: "profiling.ProfileSession | None" = None,
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.document_id = document_id
+        self.tenant_id = tenant_id
+        self.profile = profile
+        self.profile_id = profile.profile_id if profile is not None else None
+        self.status = QUEUED
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.chunks_indexed: int | None = None
+        self.changes: dict[str, int] = {}
+        self.embedding_cache_hit_ratio: float | None = None
+        self.timings: dict[str, float] = {}
+        self.error: str | None = None
+
+        self._enqueued = time.perf_counter()
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+
+class BulkIngestJob(IngestJob):
+    """
+    One job for all files of a bulk upload. `items` holds the per-file
+    summaries (QUEUED -> PROCESSING -> READY / FAILED, or REJECTED at upload).
+    """
+
+    def __init__(self, tenant_id: int, items: list[dict], timings: dict[str, float]):
+        super().__init__(document_id=None, tenant_id=tenant_id)
+        self.items = items
+        self.timings.update(timings)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for i in self.items if i["status"] == "READY")
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for i in self.items if i["status"] in ("FAILED", "REJECTED"))
+
+
+class IngestionJobQueue:
+    def __init__(
+        self,
+        workers: int,
+        max_jobs_per_tenant: int,
+        max_pending: int,
+        max_retained: int = 1000,
+    ):
+        self.workers = workers
+        self.max_jobs_per_tenant = max_jobs_per_tenant
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+
+        self._cond = threading.Condition()
+        self._pending: deque[IngestJob] = deque()
+        self._running_per_tenant: dict[int, int] = {}
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+
+    # -----------------------
+    # Lifecycle
+    # -----------------------
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                t = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"ingest-worker-{i}",
+                    daemon=True,
+                )
+                t.start()
+                self._threads.append(t)
+        logger.info("Started %d ingestion workers", self.workers)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop accepting work and wait (bounded) for running jobs to finish.
+        Jobs still queued stay QUEUED; their documents remain UPLOADED.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for t in threads:
+            t.join(timeout=timeout)
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def submit(
+        self,
+        document_id: int,
+        tenant_id: int,
+        profile: "profiling.ProfileSession | None" = None,
+    ) -> IngestJob:
+        with self._cond:
+            # Re-ingest requests for a document that is already queued/running
+            # collapse onto the existing job.
+            for job in self._jobs.values():
+                if job.document_id == document_id and job.is_active:
+                    return job
+
+            job = IngestJob(document_id=document_id, tenant_id=tenant_id, profile=profile)
+            self._enqueue(job)
+            return job
+
+    def submit_bulk(self, tenant_id: int, items: list[dict], timings: dict[str, float]) -> BulkIngestJob:
+        with self._cond:
+            job = BulkIngestJob(tenant_id=tenant_id, items=items, timings=timings)
+            self._enqueue(job)
+            return job
+
+    def has_capacity(self) -> bool:
+        with self._cond:
+            return len(self._pending) < self.max_pending
+
+    def _enqueue(self, job: IngestJob) -> None:
+        # Caller holds the lock
+        if len(self._pending) >= self.max_pending:
+            raise QueueFullError("Ingestion queue is full, try again later")
+        self._jobs[job.job_id] = job
+        self._pending.append(job)
+        self._trim_finished()
+        self._cond.notify()
+
+    def get(self, job_id: str) -> IngestJob | None:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                "pending": len(self._pending),
+                "running": sum(self._running_per_tenant.values()),
+                "max_jobs_per_tenant": self.max_jobs_per_tenant,
+            }
+
+    # -----------------------
+    # Scheduling
+    # -----------------------
+    def _next_runnable(self) -> IngestJob | None:
+        """
+        First pending job whose tenant is below its concurrency limit.
+        Caller holds the lock.
+        """
+        for job in self._pending:
+            if self._running_per_tenant.get(job.tenant_id, 0) < self.max_jobs_per_tenant:
+                self._pending.remove(job)
+                return job
+        return None
+
+    def _trim_finished(self) -> None:
+        excess = len(self._jobs) - self.max_retained
+        if excess <= 0:
+            return
+        for job_id in [j.job_id for j in self._jobs.values() if not j.is_active][:excess]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping:
+                    job = self._next_runnable()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if job is None:
+                    return
+                self._running_per_tenant[job.tenant_id] = (
+                    self._running_per_tenant.get(job.tenant_id, 0) + 1
+                )
+                job.status = RUNNING
+
+            try:
+                with tracing.start_trace(
+                    "ingest_job",
+                    tenant_id=job.tenant_id,
+                    document_id=job.document_id,
+                    job_id=job.job_id,
+                ):
+                    if isinstance(job, BulkIngestJob):
+                        self._run_bulk(job)
+                    else:
+                        self._run(job)
+            finally:
+                with self._cond:
+                    self._running_per_tenant[job.tenant_id] -= 1
+                    if self._running_per_tenant[job.tenant_id] == 0:
+                        del self._running_per_tenant[job.tenant_id]
+                    self._cond.notify_all()
+
+    def _run(self, job: IngestJob) -> None:
+        # Imported here: ingestion pulls in LangChain helpers
+        from app.services.ingestion_service import ingest_with_langchain
+
+        job.started_at = datetime.now(timezone.utc)
+        job.timings["queue_wait_seconds"] = round(time.perf_counter() - job._enqueued, 3)
+
+        db = SessionLocal()
+        doc = None
+        try:
+            doc = (
+                db.query(Document)
+                .filter(
+                    Document.id == job.document_id,
+                    Document.tenant_id == job.tenant_id,
+                )
+                .first()
+            )
+            if doc is None:
+                raise LookupError("Document not found for this tenant")
+
+            doc.status = "PROCESSING"
+            db.commit()
+
+            scope = (
+                profiling.session_scope(job.profile)
+                if job.profile is not None
+                else nullcontext()
+            )
+            with scope:
+                result = ingest_with_langchain(
+                    db=db,
+                    document=doc,
+                    tenant_id=job.tenant_id,
+                )
+
+            doc.status = "READY"
+            db.commit()
+
+            job.chunks_indexed = result["chunks_indexed"]
+            job.timings.update(result["timings"])
+            job.changes = result["changes"]
+            if result.get("embedding_cache"):
+                job.embedding_cache_hit_ratio = result["embedding_cache"]["hit_ratio"]
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.exception("Ingestion job %s failed", job.job_id)
+            metrics.inc(metrics.errors, "ingest", tenant_id=job.tenant_id)
+            db.rollback()
+            if doc is not None:
+                doc.status = "FAILED"
+                db.commit()
+            job.error = f"Ingestion failed: {str(e)}"
+            job.status = FAILED
+            tracing.set_root_error(job.error)
+        finally:
+            db.close()
+            # Status-filtered totals changed
+            document_counts.invalidate_tenant(job.tenant_id)
+            job.finished_at = datetime.now(timezone.utc)
+            job.timings["total_seconds"] = round(
+                (job.finished_at - job.started_at).total_seconds(), 3
+            )
+
+    def _run_bulk(self, job: BulkIngestJob) -> None:
+        # Imported here: bulk ingestion pulls in the parse pool + LangChain helpers
+        from app.services.bulk_ingest_service import fail_unfinished, run_bulk_ingest
+
+        job.started_at = datetime.now(timezone.utc)
+        job.timings["queue_wait_seconds"] = round(time.perf_counter() - job._enqueued, 3)
+
+        db = SessionLocal()
+        try:
+            result = run_bulk_ingest(db, job.tenant_id, job.items, job.timings)
+            job.chunks_indexed = result["chunks_indexed"]
+            job.embedding_cache_hit_ratio = result["embedding_cache_hit_ratio"]
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.exception("Bulk ingestion job %s failed", job.job_id)
+            metrics.inc(metrics.errors, "bulk_ingest", tenant_id=job.tenant_id)
+            db.rollback()
+            job.error = f"Ingestion failed: {str(e)}"
+            try:
+                fail_unfinished(db, job.tenant_id, job.items, job.error)
+            except Exception:
+                logger.exception("Could not mark bulk job %s documents FAILED", job.job_id)
+            job.status = FAILED
+            tracing.set_root_error(job.error)
+        finally:
+            db.close()
+            job.finished_at = datetime.now(timezone.utc)
+            job.timings["total_seconds"] = round(
+                (job.finished_at - job.started_at).total_seconds(), 3
+            )
+
+
+job_queue = IngestionJobQueue(
+    workers=settings.ingest_workers,
+    max_jobs_per_tenant=settings.ingest_max_jobs_per_tenant,
+    max_pending=settings.ingest_max_pending_jobs,
+)
+
+
+def submit(
+    document_id: int,
+    tenant_id: int,
+    profile: "profiling.ProfileSession | None" = None,
+) -> IngestJob:
+    return job_queue.submit(document_id=document_id, tenant_id=tenant_id, profile=profile)
+
+
+def get_job(job_id: str) -> IngestJob | None:
+    return job_queue.get(job_id)
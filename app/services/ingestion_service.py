@@ -1,52 +1,296 @@
 # app/services/ingest_langchain.py
-import os
+import contextvars
+import logging
+import queue
+import threading
+import time
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.document import Document
-from app.services.url_loader import load_url_with_bs4  # 👈 our BS4-based URL loader
+from app.services.parsing import iter_documents, split_documents
+from app.services.embedding_registry import cache_key, get_embeddings
+from app.services.embedding_cache import CachedEmbeddings, cache as embedding_cache, text_hash
+from app.services import answer_cache, metrics, profiling, tracing, vectorstore_pool
+from app.vectorstores import open_vectorstore
 
+logger = logging.getLogger(__name__)
 
-def select_loader(path: str):
+# Upper bound on a single embed + Chroma upsert call
+UPSERT_BATCH_SIZE = 1000
+
+
+def ingest_embeddings():
     """
-    Auto-selects a LangChain loader based on file extension.
-    Heavy langchain_community imports happen INSIDE this function
-    so they don't run at app startup (important for Render).
+    Shared embedding model, wrapped in the content-addressed cache when enabled.
+    Call once per ingest: the wrapper's hit/miss counters describe that ingest.
+    """
+    embeddings = get_embeddings()
+    if settings.embedding_cache_enabled:
+        embeddings = CachedEmbeddings(
+            underlying=embeddings,
+            model_name=cache_key(),
+            cache=embedding_cache,
+        )
+    return embeddings
+
+
+def open_ingest_vectorstore(tenant_id: int, embeddings):
+    """
+    Write handle for the tenant's collection (separate from the pooled chat
+    handle, which uses the un-cached query embedder).
+    """
+    return open_vectorstore(tenant_id, embeddings)
+
+
+def mark_collection_changed(tenant_id: int) -> None:
+    """
+    Pooled chat handle and cached answers for this tenant are now stale.
+    """
+    vectorstore_pool.invalidate(tenant_id)
+    answer_cache.bump_corpus_version(tenant_id)
+
+
+def chunk_id(document_id: int, position: int, content_hash: str) -> str:
+    """
+    Deterministic vector id: same document + position + text -> same id,
+    so re-ingesting unchanged content is a no-op.
+    """
+    return f"doc{document_id}-{position}-{content_hash[:16]}"
+
+
+def assign_chunk_ids(document_id: int, chunks: list, start: int = 0) -> list[str]:
+    """
+    Tag chunks with chunk_index / content_hash metadata and return their ids.
+    `start` is the position of the first chunk within the document.
+    """
+    ids: list[str] = []
+    for position, c in enumerate(chunks, start=start):
+        content_hash = text_hash(c.page_content)
+        c.metadata["chunk_index"] = position
+        c.metadata["content_hash"] = content_hash
+        ids.append(chunk_id(document_id, position, content_hash))
+    return ids
+
+
+def write_chunks(
+    vectorstore,
+    embeddings,
+    chunks: list,
+    ids: list[str],
+    timings: dict[str, float] | None = None,
+) -> None:
+    """
+    Embed + upsert in UPSERT_BATCH_SIZE slices. Embedding and the vector
+    store write are separate steps so their time can be reported separately
+    (accumulated into `timings["embed_seconds"]` / `["upsert_seconds"]`).
+    """
+    if timings is None:
+        timings = {}
+    for i in range(0, len(chunks), UPSERT_BATCH_SIZE):
+        batch = chunks[i:i + UPSERT_BATCH_SIZE]
+
+        started = time.perf_counter()
+        with tracing.span("ingest.embed", chunks=len(batch)):
+            vectors = embeddings.embed_documents([c.page_content for c in batch])
+        timings["embed_seconds"] = timings.get("embed_seconds", 0.0) + time.perf_counter() - started
+
+        started = time.perf_counter()
+        with tracing.span("ingest.upsert", chunks=len(batch)):
+            vectorstore.upsert(
+                ids=ids[i:i + UPSERT_BATCH_SIZE],
+                embeddings=vectors,
+                metadatas=[c.metadata for c in batch],
+                texts=[c.page_content for c in batch],
+            )
+        timings["upsert_seconds"] = timings.get("upsert_seconds", 0.0) + time.perf_counter() - started
+
+
+class DocumentChunkSync:
+    """
+    Incrementally diff a document's chunks against what the collection holds:
+      - unchanged (same id)           -> skipped, not re-embedded
+      - same position, new content    -> updated (new id written, old deleted)
+      - new position                  -> added
+      - old ids not produced any more -> removed (in finish())
+    Rows written before ids were deterministic have no chunk_index and are
+    always treated as stale.
+
+    Chunks are fed in batches (`add_batch`) so the whole document never has
+    to be in memory; only the existing ids/positions are kept.
     """
-    from langchain_community.document_loaders import (
-        PyPDFLoader,
-        TextLoader,
-        UnstructuredMarkdownLoader,
-        UnstructuredWordDocumentLoader,
-        UnstructuredCSVLoader,
-        JSONLoader,
-    )
 
-    ext = os.path.splitext(path)[1].lower()
+    def __init__(self, vectorstore, embeddings, document_id: int):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.document_id = document_id
+        self.timings: dict[str, float] = {}
 
-    if ext == ".pdf":
-        return PyPDFLoader(path)
-    elif ext == ".txt":
-        return TextLoader(path)
-    elif ext == ".md":
-        return UnstructuredMarkdownLoader(path)
-    elif ext == ".docx":
-        return UnstructuredWordDocumentLoader(path)
-    elif ext == ".csv":
-        return UnstructuredCSVLoader(path)
-    elif ext == ".json":
-        return JSONLoader(path, jq_schema=".", text_content=False)
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
+        existing_ids, existing_metadatas = vectorstore.get_document_chunks(document_id)
+        self.existing_ids = set(existing_ids)
+        self.existing_positions = {
+            (meta or {}).get("chunk_index")
+            for meta in existing_metadatas
+        }
+        self.existing_positions.discard(None)
 
+        self.position = 0
+        self.seen_ids: set[str] = set()
+        self.added = 0
+        self.updated = 0
+        # Set before the first write: a failure midway still leaves rows
+        # the pooled handle / answer cache haven't seen
+        self.wrote = False
 
-def ingest_with_langchain(db: Session, document: Document, tenant_id: int) -> int:
+    def add_batch(self, chunks: list) -> None:
+        ids = assign_chunk_ids(self.document_id, chunks, start=self.position)
+        self.position += len(chunks)
+
+        to_write = []
+        write_ids: list[str] = []
+        for c, cid in zip(chunks, ids):
+            self.seen_ids.add(cid)
+            if cid in self.existing_ids:
+                continue
+            if c.metadata["chunk_index"] in self.existing_positions:
+                self.updated += 1
+            else:
+                self.added += 1
+            to_write.append(c)
+            write_ids.append(cid)
+
+        if to_write:
+            self.wrote = True
+        write_chunks(self.vectorstore, self.embeddings, to_write, write_ids, self.timings)
+
+    def finish(self) -> dict:
+        # New rows are written before old ones are deleted: a failure midway
+        # leaves the previous version searchable.
+        stale_ids = list(self.existing_ids - self.seen_ids)
+        if stale_ids:
+            self.wrote = True
+            self.vectorstore.delete(stale_ids)
+
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "removed": max(0, len(stale_ids) - self.updated),
+            "unchanged": self.position - self.added - self.updated,
+        }
+
+
+# -----------------------
+# Streaming pipeline
+# -----------------------
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def _produce_chunk_batches(
+    path: str,
+    tenant_id: int,
+    document_id: int,
+    batch_size: int,
+    out: queue.Queue,
+    stop: threading.Event,
+    stats: dict[str, float],
+) -> None:
+    """
+    Producer thread: load page by page, split each page, put batches of
+    `batch_size` chunks on the bounded `out` queue. When the queue is full
+    this blocks (backpressure) until the consumer catches up.
+    """
+
+    def put(item) -> bool:
+        started = time.perf_counter()
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                stats["load_blocked_seconds"] += time.perf_counter() - started
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        # Loading / splitting runs in this thread: profile it separately
+        with profiling.profiled(), tracing.span("ingest.load_split"):
+            batch: list = []
+            pages = iter_documents(path)
+            while True:
+                started = time.perf_counter()
+                page = next(pages, None)
+                stats["load_seconds"] += time.perf_counter() - started
+                if page is None:
+                    break
+                stats["pages"] += 1
+
+                started = time.perf_counter()
+                chunks = split_documents([page], tenant_id, document_id)
+                stats["split_seconds"] += time.perf_counter() - started
+                stats["chunks"] += len(chunks)
+
+                for c in chunks:
+                    batch.append(c)
+                    if len(batch) >= batch_size:
+                        if not put(batch):
+                            return
+                        batch = []
+            if batch and not put(batch):
+                return
+        put(_DONE)
+    except BaseException as e:
+        put(_Failed(e))
+
+
+def record_ingest_metrics(
+    tenant_id: int,
+    timings: dict[str, float],
+    chunks_written: int,
+    cache_report: dict | None,
+) -> None:
+    """
+    One observation per stage per ingest (stage totals, not per batch).
+    """
+    for name in ("load", "split", "embed", "upsert"):
+        seconds = timings.get(f"{name}_seconds")
+        if seconds is not None:
+            metrics.observe_stage("ingest", name, tenant_id, seconds)
+    metrics.inc(metrics.chunks_ingested, tenant_id=tenant_id, amount=chunks_written)
+    if cache_report:
+        metrics.inc(metrics.cache_requests, "embedding", "hit", tenant_id=tenant_id, amount=cache_report["hits"])
+        metrics.inc(metrics.cache_requests, "embedding", "miss", tenant_id=tenant_id, amount=cache_report["misses"])
+
+
+def _per_second(count: float, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
+
+
+def ingest_with_langchain(db: Session, document: Document, tenant_id: int) -> dict:
     """
     Full LangChain ingestion using:
       - Local HuggingFace embeddings
-      - Chroma as vector store
+      - the configured vector store (Chroma or the numpy engine)
       - Files (pdf/txt/md/docx/csv/json) OR URLs
 
+    Runs as a bounded pipeline so peak memory doesn't grow with document
+    size:
+      producer thread: lazy load (page by page) -> split -> batches of
+                       settings.ingest_batch_size chunks
+      bounded queue:   at most settings.ingest_queue_depth batches in flight
+      this thread:     diff -> embed -> upsert, batch by batch
+
+    Re-ingesting a document is idempotent: only changed chunks are
+    embedded and written, and chunks that disappeared are deleted.
+
+    Returns {"chunks_indexed": int, "timings": {stage: seconds / throughput},
+             "changes": {"added", "updated", "removed", "unchanged"},
+             "embedding_cache": {"hits", "misses", "hit_ratio"}}.
+
     All heavy imports are inside this function so that they DON'T
     run during app startup on Render.
     """
@@ -54,46 +298,97 @@ def ingest_with_langchain(db: Session, document: Document, tenant_id: int) -> in
     # Heavy dependencies are imported lazily inside functions to avoid
     # Render startup failures (no open ports).
 
-    from langchain_text_splitters import RecursiveCharacterTextSplitter
-    from langchain_huggingface import HuggingFaceEmbeddings
-    from langchain_chroma import Chroma
-
-    path = document.storage_path
-
-    # 1) Load docs: URL vs file
-    if path.startswith("http://") or path.startswith("https://"):
-        # Uses requests + BeautifulSoup via our helper
-        docs = load_url_with_bs4(path)
-    else:
-        loader = select_loader(path)
-        docs = loader.load()
-
-    # 2) Chunk
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", ".", " "],
-    )
-    chunks = splitter.split_documents(docs)
+    started_total = time.perf_counter()
 
-    for c in chunks:
-        c.metadata["tenant_id"] = tenant_id
-        c.metadata["document_id"] = document.id
+    # Local embeddings (shared, loaded once per process).
+    # Unchanged chunks are served from the content-addressed cache.
+    embeddings = ingest_embeddings()
+    vectorstore = open_ingest_vectorstore(tenant_id, embeddings)
+    sync = DocumentChunkSync(vectorstore, embeddings, document.id)
 
-    # 3) Local embeddings
-    embeddings = HuggingFaceEmbeddings(
-        model_name=settings.local_embed_model
+    producer_stats = {
+        "pages": 0,
+        "chunks": 0,
+        "load_seconds": 0.0,
+        "split_seconds": 0.0,
+        "load_blocked_seconds": 0.0,
+    }
+    batches: queue.Queue = queue.Queue(maxsize=settings.ingest_queue_depth)
+    stop = threading.Event()
+    producer = threading.Thread(
+        # Carry tracing / profiling context into the producer
+        target=contextvars.copy_context().run,
+        args=(
+            _produce_chunk_batches,
+            document.storage_path,
+            tenant_id,
+            document.id,
+            settings.ingest_batch_size,
+            batches,
+            stop,
+            producer_stats,
+        ),
+        name=f"ingest-producer-{document.id}",
+        daemon=True,
     )
+    producer.start()
+
+    consumer_wait = 0.0
+    try:
+        # One segment + one commit for the whole document (numpy engine)
+        with vectorstore.batch():
+            try:
+                while True:
+                    started = time.perf_counter()
+                    item = batches.get()
+                    consumer_wait += time.perf_counter() - started
+                    if item is _DONE:
+                        break
+                    if isinstance(item, _Failed):
+                        raise item.error
+                    sync.add_batch(item)
+            finally:
+                stop.set()
+                producer.join(timeout=5)
+
+            changes = sync.finish()
+    finally:
+        # Also after a partial write: chat must not keep serving the old state
+        if sync.wrote:
+            mark_collection_changed(tenant_id)
 
-    # 4) Chroma vector store
-    collection_name = f"tenant_{tenant_id}"
-    persist_dir = settings.chroma_dir
+    chunk_count = sync.position
+    embed_seconds = sync.timings.get("embed_seconds", 0.0)
+    upsert_seconds = sync.timings.get("upsert_seconds", 0.0)
+    written = changes["added"] + changes["updated"]
+    timings = {
+        "load_seconds": round(producer_stats["load_seconds"], 3),
+        "split_seconds": round(producer_stats["split_seconds"], 3),
+        "embed_seconds": round(embed_seconds, 3),
+        "upsert_seconds": round(upsert_seconds, 3),
+        # Backpressure: producer waiting on a full queue / consumer on an empty one
+        "load_blocked_seconds": round(producer_stats["load_blocked_seconds"], 3),
+        "index_waiting_seconds": round(consumer_wait, 3),
+        "pages_per_second": _per_second(producer_stats["pages"], producer_stats["load_seconds"]),
+        "split_chunks_per_second": _per_second(chunk_count, producer_stats["split_seconds"]),
+        "embed_chunks_per_second": _per_second(written, embed_seconds),
+        "upsert_chunks_per_second": _per_second(written, upsert_seconds),
+        "pipeline_seconds": round(time.perf_counter() - started_total, 3),
+    }
 
-    Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        collection_name=collection_name,
-        persist_directory=persist_dir,
+    cache_report = embeddings.report() if isinstance(embeddings, CachedEmbeddings) else None
+    record_ingest_metrics(tenant_id, timings, written, cache_report)
+    logger.info(
+        "Ingested document %s: %d chunks %s, embedding cache hit ratio %s",
+        document.id,
+        chunk_count,
+        changes,
+        cache_report["hit_ratio"] if cache_report else None,
     )
 
-    return len(chunks)
+    return {
+        "chunks_indexed": chunk_count,
+        "timings": timings,
+        "changes": changes,
+        "embedding_cache": cache_report,
+    }
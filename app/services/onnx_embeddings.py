@@ -0,0 +1,203 @@
+# app/services/onnx_embeddings.py
+"""
+Sentence embeddings through ONNX Runtime (EMBEDDING_BACKEND=onnx).
+
+Runs the same transformer as the HuggingFace backend, exported to ONNX,
+with the sentence-transformers post-processing (mean pooling over the
+attention mask + L2 normalisation), so vectors stay interchangeable with
+the PyTorch ones. With ONNX_QUANTIZE=true the weights are dynamically
+quantized to int8 once (cached next to the model) for faster CPU inference.
+
+Everything loads from `onnx_model_dir`; nothing is fetched at runtime:
+    model.onnx           exported graph (see export_model / the CLI below)
+    tokenizer.json       HF fast tokenizer
+    onnx_config.json     {"max_length": 256, "normalize": true, ...} (optional)
+    model_int8.onnx      written on first load when quantization is on
+
+Export once, on a machine with the model available (needs torch + transformers):
+    python -m app.services.onnx_embeddings sentence-transformers/all-MiniLM-L6-v2 models/all-MiniLM-L6-v2-onnx
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "onnx_config.json"
+
+_quantize_lock = threading.Lock()
+
+
+def quantized_model_path(model_dir: Path) -> Path:
+    """
+    int8 copy of model.onnx (dynamic quantization of the weights), created
+    on first use. Written to a temp name first so concurrent workers never
+    load a half-written file.
+    """
+    target = model_dir / QUANTIZED_FILE
+    if target.exists():
+        return target
+    with _quantize_lock:
+        if not target.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            tmp = model_dir / f".{QUANTIZED_FILE}.{os.getpid()}.tmp"
+            logger.info("Quantizing %s to int8...", model_dir / MODEL_FILE)
+            quantize_dynamic(str(model_dir / MODEL_FILE), str(tmp), weight_type=QuantType.QInt8)
+            os.replace(tmp, target)
+    return target
+
+
+class OnnxEmbeddings:
+    """
+    LangChain-style embeddings (embed_documents / embed_query).
+
+    Thread-safe: InferenceSession.run may be called concurrently, and the
+    tokenizer's padding / truncation are configured once here.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantize: bool = False,
+        batch_size: int = 32,
+        threads: int = 0,
+    ):
+        # Imported here: only needed with EMBEDDING_BACKEND=onnx
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                f"EMBEDDING_BACKEND=onnx needs the optional onnxruntime + tokenizers packages ({e})"
+            ) from e
+
+        self.model_dir = Path(model_dir)
+        if not (self.model_dir / MODEL_FILE).exists():
+            raise FileNotFoundError(
+                f"{self.model_dir / MODEL_FILE} not found; export the model first "
+                "(python -m app.services.onnx_embeddings <model> <dir>)"
+            )
+        config_path = self.model_dir / CONFIG_FILE
+        config = json.loads(config_path.read_text()) if config_path.exists() else {}
+        self.max_length = int(config.get("max_length", 256))
+        self.normalize = bool(config.get("normalize", True))
+        self.batch_size = max(1, batch_size)
+        self.quantized = quantize
+
+        model_path = quantized_model_path(self.model_dir) if quantize else self.model_dir / MODEL_FILE
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        pad_token = config.get("pad_token", "[PAD]")
+        pad_id = self.tokenizer.token_to_id(pad_token)
+        # Pads each batch to its own longest sequence
+        self.tokenizer.enable_padding(pad_id=pad_id or 0, pad_token=pad_token)
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+
+        # Mean pooling over real tokens (as sentence-transformers does)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        vectors = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        # Batch texts of similar length together: less padding per batch
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out: list[list[float] | None] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vectors = self._embed_batch([texts[i] for i in idx])
+            for i, vector in zip(idx, vectors):
+                out[i] = vector.tolist()
+        return out
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def export_model(model_name: str, out_dir: str, max_length: int = 256) -> Path:
+    """
+    Export a sentence-transformers model's transformer to ONNX plus its
+    tokenizer. Needs torch + transformers (and the model downloaded or in
+    the HF cache); the server only needs onnxruntime + tokenizers.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            str(out / MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    tokenizer.backend_tokenizer.save(str(out / TOKENIZER_FILE))
+    (out / CONFIG_FILE).write_text(json.dumps({
+        "source_model": model_name,
+        "max_length": max_length,
+        "normalize": True,
+        "pad_token": tokenizer.pad_token,
+    }, indent=2))
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a sentence-transformers model to ONNX")
+    parser.add_argument("model", help="e.g. sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("out_dir", help="directory to use as ONNX_MODEL_DIR")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--quantize", action="store_true", help="also write the int8 model now")
+    args = parser.parse_args()
+
+    path = export_model(args.model, args.out_dir, max_length=args.max_length)
+    if args.quantize:
+        quantized_model_path(path)
+    print(f"Exported to {path}")
@@ -0,0 +1,123 @@
+# app/services/pagination.py
+"""
+Keyset (cursor) pagination helpers + a short-TTL count cache.
+
+Listings are ordered newest first on (created_at, id). A cursor encodes
+the last row of a page; the next page is `(created_at, id) < cursor`,
+which an index on (tenant_id, created_at, id) serves directly no matter
+how deep the page is, unlike OFFSET.
+
+SQLite stores DateTime as text: `server_default=func.now()` writes
+'YYYY-MM-DD HH:MM:SS' while a bound datetime renders with '.ffffff', so
+the raw column and the cursor would compare as unequal strings and rows
+from the cursor's second would repeat. There both sides go through
+datetime() (same text form, whole seconds) for ordering and comparison.
+"""
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Hashable, Optional
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Raises ValueError for anything that isn't a cursor we produced.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _sort_key(query: Query, created_col):
+    bind = query.session.get_bind()
+    if bind.dialect.name == "sqlite":
+        return func.datetime(created_col)
+    return created_col
+
+
+def _cursor_value(query: Query, created_at: datetime):
+    if query.session.get_bind().dialect.name == "sqlite":
+        return func.datetime(created_at.strftime("%Y-%m-%d %H:%M:%S"))
+    return created_at
+
+
+def keyset_page(
+    query: Query,
+    created_col,
+    id_col,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> tuple[list, Optional[str]]:
+    """
+    One page of `query`, newest first. With a cursor, continues after it;
+    without one, falls back to `offset` (page-number clients).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    sort_key = _sort_key(query, created_col)
+    query = query.order_by(sort_key.desc(), id_col.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(sort_key, id_col) < tuple_(_cursor_value(query, created_at), row_id)
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    # One extra row tells us whether there is a next page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(
+        getattr(last, created_col.key),
+        getattr(last, id_col.key),
+    )
+
+
+class CountCache:
+    """
+    Caches COUNT(*) results for `ttl_seconds`. Keys are tuples whose first
+    element is the tenant id, so one tenant's counts can be dropped when
+    its rows change.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, tuple[float, int]] = {}
+
+    def get_or_count(self, key: tuple, count: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] > now:
+                return item[1]
+
+        value = count()
+        if self.ttl_seconds > 0:
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def invalidate_tenant(self, tenant_id: int) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == tenant_id]:
+                del self._entries[key]
@@ -0,0 +1,212 @@
+# app/services/parsing.py
+"""
+Load + split stage of ingestion.
+
+Kept free of DB / vectorstore imports so it can run cheaply inside
+process-pool workers (bulk ingestion).
+
+Loaders yield bounded Documents so ingestion memory doesn't grow with the
+file: PDFs one per page, text formats (TXT / JSON) and CSV rows in blocks
+of about BLOCK_CHARS characters read incrementally from disk, DOCX and
+Markdown elements merged into blocks of the same size.
+"""
+import csv
+import os
+from typing import Iterator
+
+from app.services.pdf_parallel import ParallelPDFLoader
+
+SUPPORTED_EXTENSIONS = {".pdf", ".txt", ".md", ".docx", ".csv", ".json"}
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Size of one loaded block (~30 chunks); the splitter only ever sees one
+BLOCK_CHARS = 32_000
+
+
+class TextBlockLoader:
+    """
+    Streams a text file in blocks of about `block_chars`, cut at the last
+    paragraph / line / space break of each read so chunks don't straddle
+    blocks mid-word. Minified files (one huge line) are still cut.
+    """
+
+    def __init__(self, path: str, block_chars: int = BLOCK_CHARS):
+        self.path = path
+        self.block_chars = block_chars
+
+    def _cut(self, text: str) -> int:
+        half = len(text) // 2
+        for sep in ("\n\n", "\n", " "):
+            cut = text.rfind(sep)
+            if cut >= half:
+                return cut
+        return len(text)
+
+    def lazy_load(self) -> Iterator:
+        from langchain_core.documents import Document
+
+        carry = ""
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            while True:
+                data = f.read(self.block_chars)
+                if not data:
+                    break
+                text = carry + data
+                cut = self._cut(text)
+                block, carry = text[:cut], text[cut:]
+                if block.strip():
+                    yield Document(page_content=block, metadata={"source": self.path})
+        if carry.strip():
+            yield Document(page_content=carry, metadata={"source": self.path})
+
+    def load(self) -> list:
+        return list(self.lazy_load())
+
+
+class CSVBlockLoader:
+    """
+    Streams CSV records, rendered "column: value" one per line (as
+    LangChain's CSVLoader does), grouped into blocks of about
+    `block_chars`. `row` metadata is the first data row of the block.
+    """
+
+    def __init__(self, path: str, block_chars: int = BLOCK_CHARS):
+        self.path = path
+        self.block_chars = block_chars
+
+    def lazy_load(self) -> Iterator:
+        from langchain_core.documents import Document
+
+        with open(self.path, newline="", encoding="utf-8-sig", errors="replace") as f:
+            reader = csv.DictReader(f)
+            lines: list[str] = []
+            size = 0
+            first_row = 0
+            for row_number, record in enumerate(reader):
+                # Extra fields beyond the header land under the None key
+                text = "\n".join(f"{key or 'extra'}: {value}" for key, value in record.items())
+                lines.append(text)
+                size += len(text) + 2
+                if size >= self.block_chars:
+                    yield Document(
+                        page_content="\n\n".join(lines),
+                        metadata={"source": self.path, "row": first_row},
+                    )
+                    lines, size, first_row = [], 0, row_number + 1
+            if lines:
+                yield Document(
+                    page_content="\n\n".join(lines),
+                    metadata={"source": self.path, "row": first_row},
+                )
+
+    def load(self) -> list:
+        return list(self.lazy_load())
+
+
+def merge_blocks(docs: Iterator, source: str, block_chars: int = BLOCK_CHARS) -> Iterator:
+    """
+    Merge consecutive small Documents (e.g. unstructured elements) into
+    blocks of about `block_chars`, so they split into normal-sized chunks.
+    """
+    from langchain_core.documents import Document
+
+    parts: list[str] = []
+    size = 0
+    for doc in docs:
+        if not doc.page_content.strip():
+            continue
+        parts.append(doc.page_content)
+        size += len(doc.page_content) + 2
+        if size >= block_chars:
+            yield Document(page_content="\n\n".join(parts), metadata={"source": source})
+            parts, size = [], 0
+    if parts:
+        yield Document(page_content="\n\n".join(parts), metadata={"source": source})
+
+
+def select_loader(path: str, pdf_workers: int | None = None):
+    """
+    Auto-selects a LangChain loader based on file extension.
+    Heavy langchain_community imports happen INSIDE this function
+    so they don't run at app startup (important for Render).
+    `pdf_workers` caps page-parallel PDF extraction (None = settings).
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".pdf":
+        # Falls back to PyPDFLoader for small PDFs / single worker
+        return ParallelPDFLoader(path, workers=pdf_workers)
+    elif ext in (".txt", ".json"):
+        # Raw text is what gets embedded; read incrementally
+        return TextBlockLoader(path)
+    elif ext == ".md":
+        from langchain_community.document_loaders import UnstructuredMarkdownLoader
+
+        # Elements (titles, paragraphs, list items) without the Markdown
+        # syntax; iter_documents merges them into blocks
+        return UnstructuredMarkdownLoader(path, mode="elements")
+    elif ext == ".docx":
+        from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+
+        # Elements (paragraphs, tables) instead of one whole-file Document;
+        # iter_documents merges them into blocks
+        return UnstructuredWordDocumentLoader(path, mode="elements")
+    elif ext == ".csv":
+        return CSVBlockLoader(path)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+def is_url(path: str) -> bool:
+    return path.startswith("http://") or path.startswith("https://")
+
+
+def iter_documents(path: str, pdf_workers: int | None = None) -> Iterator:
+    """
+    Lazily load a stored file or a URL into LangChain Documents
+    (one per page / element where the loader supports it).
+    """
+    if is_url(path):
+        # Uses requests + BeautifulSoup via our helper (imported lazily, like the loaders)
+        from app.services.url_loader import load_url_with_bs4
+
+        yield from load_url_with_bs4(path)
+        return
+    loader = select_loader(path, pdf_workers=pdf_workers)
+    if path.lower().endswith((".docx", ".md")):
+        yield from merge_blocks(loader.lazy_load(), path)
+        return
+    yield from loader.lazy_load()
+
+
+def load_documents(path: str, pdf_workers: int | None = None) -> list:
+    """
+    Load a stored file or a URL into LangChain Documents.
+    """
+    return list(iter_documents(path, pdf_workers=pdf_workers))
+
+
+def split_documents(docs: list, tenant_id: int, document_id: int) -> list:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n\n", "\n", ".", " "],
+    )
+    chunks = splitter.split_documents(docs)
+
+    for c in chunks:
+        c.metadata["tenant_id"] = tenant_id
+        c.metadata["document_id"] = document_id
+    return chunks
+
+
+def parse_file(path: str, tenant_id: int, document_id: int, pdf_workers: int | None = None) -> list:
+    """
+    Load + split one file. Module-level so it can be sent to a process pool;
+    pool callers pass pdf_workers=1 (the pool already uses every core).
+    """
+    return split_documents(load_documents(path, pdf_workers=pdf_workers), tenant_id, document_id)
@@ -0,0 +1,149 @@
+# app/services/password_hasher.py
+"""
+Password hashing on a dedicated, bounded process pool.
+
+pbkdf2 is pure CPU. Run inline in sync routes it holds the GIL and a
+threadpool slot for the whole hash, so a login burst slows every other
+request in the worker. Here the hashing runs in separate processes, and
+at most `max_pending` calls may be queued or running; past that, callers
+get PasswordHasherBusyError (mapped to 503 + Retry-After in app.main).
+
+The auth routes await the `*_async` variants, which hold no thread while
+the hash runs. Sync callers (user admin routes) block a threadpool slot
+until their hash is done, so the default cap (2 x workers, at most 16)
+stays well below the 40-thread threadpool: a burst can't starve chat.
+
+Rounds come from settings. Hashes made with different rounds still
+verify and are flagged for rehash (see verify_and_update).
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """Too many password hashes already queued in this process."""
+
+
+@lru_cache(maxsize=4)
+def _context(rounds: int):
+    from passlib.context import CryptContext
+
+    # min == max == default: any other round count needs an update
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return _context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # "spawn" so workers don't inherit the server's threads / DB connections
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Started password hashing pool with %d workers", self.workers)
+            return self._pool
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def _submit(self, fn, *args):
+        """
+        Submit to the pool, or raise PasswordHasherBusyError when
+        `max_pending` calls are already queued or running. The slot is
+        released when the hash finishes, even if the caller stopped waiting.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusyError("Password hashing is saturated")
+            self._pending += 1
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password, self.rounds).result()
+
+    def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """
+        (matches, new_hash). new_hash is set when `hashed` was made with
+        other parameters than the configured ones and should be stored.
+        """
+        return self._submit(_verify_and_update, password, hashed, self.rounds).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password, self.rounds))
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        return await asyncio.wrap_future(
+            self._submit(_verify_and_update, password, hashed, self.rounds)
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+def default_max_pending(workers: int) -> int:
+    return min(2 * workers, 16)
+
+
+_workers = settings.password_hash_workers or os.cpu_count() or 1
+hasher = PasswordHasher(
+    rounds=settings.password_hash_rounds,
+    workers=_workers,
+    max_pending=settings.password_hash_max_pending or default_max_pending(_workers),
+)
@@ -0,0 +1,145 @@
+# app/services/pdf_parallel.py
+"""
+Page-parallel PDF text extraction.
+
+PyPDFLoader extracts pages one after another on a single core. For large
+PDFs we split the page list into ranges, extract each range in a worker
+process and reassemble the pages in order, with the same per-page
+metadata PyPDFLoader produces (source, page, total_pages, page_label).
+
+Small PDFs (below `min_pages`) stay single-process: spawning workers and
+re-opening the file costs more than it saves.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _extract_range(path: str, start: int, stop: int) -> list[tuple[str, str | None]]:
+    """
+    Worker: (text, page_label) for pages [start, stop).
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    try:
+        labels = reader.page_labels
+    except Exception:
+        labels = None
+
+    out: list[tuple[str, str | None]] = []
+    for i in range(start, stop):
+        text = reader.pages[i].extract_text() or ""
+        label = labels[i] if labels and i < len(labels) else None
+        out.append((text, label))
+    return out
+
+
+class ParallelPDFLoader:
+    """
+    Drop-in for PyPDFLoader (`load()` / `lazy_load()`), one Document per page.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        workers: int | None = None,
+        pages_per_task: int | None = None,
+        min_pages: int | None = None,
+    ):
+        self.path = path
+        self.workers = workers or settings.pdf_parallel_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task or settings.pdf_pages_per_task
+        self.min_pages = settings.pdf_parallel_min_pages if min_pages is None else min_pages
+
+    def _use_parallel(self, total_pages: int) -> bool:
+        # Callers that already run one file per core (bulk parsing) pass
+        # workers=1, so a pool worker never starts a pool of its own.
+        return self.workers > 1 and total_pages >= self.min_pages
+
+    def lazy_load(self) -> Iterator:
+        from langchain_core.documents import Document
+        from pypdf import PdfReader
+
+        total_pages = len(PdfReader(self.path).pages)
+
+        if not self._use_parallel(total_pages):
+            from langchain_community.document_loaders import PyPDFLoader
+
+            yield from PyPDFLoader(self.path).lazy_load()
+            return
+
+        ranges = [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+        logger.info(
+            "Extracting %s (%d pages) in %d ranges on %d workers",
+            self.path,
+            total_pages,
+            len(ranges),
+            self.workers,
+        )
+
+        pool = _get_pool(self.workers)
+        # Sliding window: at most 2 ranges per worker extracted ahead of the
+        # consumer, so a slow consumer doesn't pull the whole PDF into memory.
+        window = self.workers * 2
+        in_flight: deque = deque()
+        next_range = 0
+
+        while next_range < len(ranges) or in_flight:
+            while next_range < len(ranges) and len(in_flight) < window:
+                start, stop = ranges[next_range]
+                in_flight.append((start, pool.submit(_extract_range, self.path, start, stop)))
+                next_range += 1
+
+            # Consumed in submission order, so pages come out in order
+            start, future = in_flight.popleft()
+            for offset, (text, label) in enumerate(future.result()):
+                page = start + offset
+                metadata = {
+                    "source": self.path,
+                    "page": page,
+                    "total_pages": total_pages,
+                }
+                if label is not None:
+                    metadata["page_label"] = label
+                yield Document(page_content=text, metadata=metadata)
+
+    def load(self) -> list:
+        return list(self.lazy_load())
@@ -0,0 +1,77 @@
+# app/services/principal_cache.py
+"""
+Short-lived in-process cache of authenticated principals.
+
+The JWT already carries tenant_id and role; the only reason to hit the
+users table on every request is to notice revocation (user deleted, role
+changed, password changed). Each of those bumps `User.token_version`, and
+tokens carry the version they were issued with ("ver" claim).
+
+Within one process, invalidate() makes a change visible immediately.
+Other worker processes pick it up when their entry expires (TTL).
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    tenant_id: int
+    role: str
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            tenant_id=user.tenant_id,
+            role=user.role,
+            token_version=user.token_version or 0,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 100_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[float, Principal]] = {}
+
+    def get(self, user_id: int) -> Principal | None:
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is None:
+                return None
+            expires, principal = item
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Cheap bound: start over rather than tracking LRU order
+                self._entries.clear()
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "ttl_seconds": self.ttl_seconds}
+
+
+cache = PrincipalCache(ttl_seconds=settings.principal_cache_ttl_seconds)
+
+
+def invalidate(user_id: int) -> None:
+    cache.invalidate(user_id)
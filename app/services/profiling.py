@@ -0,0 +1,205 @@
+# app/services/profiling.py
+"""
+On-demand cProfile capture of single chat / ingestion requests.
+
+A request is profiled when an admin sends `X-Profile: 1` (or `?profile=1`),
+or when it is picked by `profile_sample_rate`. The decision is stored in a
+contextvar (set by deps.request_profiling); code on the hot path wraps its
+work in `profiled()`, which is a no-op unless that contextvar is set. With
+profiling off the cost is one ContextVar.get() per wrapped section.
+
+cProfile only sees the thread it runs in, so every thread that works on
+the request (e.g. the ingestion producer) wraps its part in `profiled()`
+and the session merges all parts into one .prof file when it ends. On
+Python 3.12+ only one profiler can be active at a time; sections that
+overlap an active one are skipped.
+
+Profiles are written to `profile_dir` as
+    <unix_ms>_<tenant_id>_<label>_<profile_id>_<wall_ms>ms.prof
+and the directory is trimmed to the newest `profile_max_files` files.
+"""
+import contextvars
+import cProfile
+import io
+import logging
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(settings.profile_dir)
+_NAME_RE = re.compile(r"^(\d+)_(\d+)_([a-z_]+)_([0-9a-f]{32})_(\d+)ms\.prof$")
+
+
+class ProfileSession:
+    def __init__(self, tenant_id: int, label: str):
+        self.profile_id = uuid.uuid4().hex
+        self.tenant_id = tenant_id
+        self.label = label
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._parts: list[cProfile.Profile] = []
+
+    def add(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self._parts.append(profile)
+
+    def save(self) -> Path | None:
+        wall_ms = int((time.perf_counter() - self.started) * 1000)
+        with self._lock:
+            parts, self._parts = self._parts, []
+        if not parts:
+            return None
+
+        stats = pstats.Stats(parts[0])
+        for part in parts[1:]:
+            stats.add(part)
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / (
+            f"{int(time.time() * 1000)}_{self.tenant_id}_{self.label}_"
+            f"{self.profile_id}_{wall_ms}ms.prof"
+        )
+        stats.dump_stats(str(path))
+        _trim()
+        logger.info("Saved profile %s (%s, %d ms)", self.profile_id, self.label, wall_ms)
+        return path
+
+
+_current: contextvars.ContextVar[ProfileSession | None] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+
+def should_profile(requested: bool, is_admin: bool) -> bool:
+    if requested and is_admin:
+        return True
+    rate = settings.profile_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def start(tenant_id: int, label: str) -> ProfileSession:
+    """
+    Mark the current context (request) as profiled.
+    """
+    session = ProfileSession(tenant_id, label)
+    _current.set(session)
+    return session
+
+
+def current() -> ProfileSession | None:
+    return _current.get()
+
+
+_local = threading.local()
+
+
+@contextmanager
+def _profile_part(session: ProfileSession):
+    # Nested sections in one thread are covered by the outer profiler
+    if getattr(_local, "active", False):
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Python 3.12+: one active profiler per interpreter
+        logger.debug("Another profiler is active; skipping this section")
+        yield
+        return
+    _local.active = True
+    try:
+        yield
+    finally:
+        profile.disable()
+        _local.active = False
+        session.add(profile)
+
+
+def profiled():
+    """
+    Profile the enclosed block (this thread only) if the request is profiled.
+    """
+    session = _current.get()
+    if session is None:
+        return nullcontext()
+    return _profile_part(session)
+
+
+@contextmanager
+def session_scope(session: ProfileSession):
+    """
+    Run the enclosed block under `session` and save it at the end. For
+    work that outlives the request that asked for the profile (ingestion
+    jobs); wall time is measured from here, not from the request.
+    """
+    session.started = time.perf_counter()
+    token = _current.set(session)
+    try:
+        with _profile_part(session):
+            yield session
+    finally:
+        _current.reset(token)
+        try:
+            session.save()
+        except Exception:
+            logger.exception("Saving profile %s failed", session.profile_id)
+
+
+def _trim() -> None:
+    files = sorted(PROFILE_DIR.glob("*.prof"))
+    for path in files[:-settings.profile_max_files or None]:
+        path.unlink(missing_ok=True)
+
+
+def _parse(path: Path) -> dict | None:
+    m = _NAME_RE.match(path.name)
+    if m is None:
+        return None
+    created_ms, tenant_id, label, profile_id, wall_ms = m.groups()
+    return {
+        "profile_id": profile_id,
+        "tenant_id": int(tenant_id),
+        "label": label,
+        "created_at_ms": int(created_ms),
+        "wall_ms": int(wall_ms),
+        "size_bytes": path.stat().st_size,
+        "path": path,
+    }
+
+
+def list_profiles(tenant_id: int) -> list[dict]:
+    """
+    Newest first, only profiles of `tenant_id`.
+    """
+    if not PROFILE_DIR.exists():
+        return []
+    out = []
+    for path in sorted(PROFILE_DIR.glob("*.prof"), reverse=True):
+        info = _parse(path)
+        if info is not None and info["tenant_id"] == tenant_id:
+            out.append(info)
+    return out
+
+
+def find_profile(tenant_id: int, profile_id: str) -> dict | None:
+    for info in list_profiles(tenant_id):
+        if info["profile_id"] == profile_id:
+            return info
+    return None
+
+
+def render_text(path: Path, limit: int = 60) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(str(path), stream=out)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
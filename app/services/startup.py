@@ -0,0 +1,197 @@
+# app/services/startup.py
+"""
+Startup phases and readiness.
+
+Blocking phases (schema sync) run in the lifespan before the server binds.
+Warm-up phases (embedding model, vector store client, LLM client) run in a
+background task afterwards: `/health` answers immediately, `/ready`
+returns 503 until warm-up has finished, so a load balancer only sends
+traffic to warm workers.
+
+The schema sync (create_all + add_missing_columns/indexes + trigram index)
+is skipped when the fingerprint stored in `schema_version` matches the
+models, which leaves a single SELECT on the remote DB at boot.
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class StartupState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: dict[str, dict] = {}
+        self.started_at = time.time()
+        self.ready_at: float | None = None
+
+    def plan(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._phases.setdefault(name, {"status": PENDING, "seconds": None})
+
+    def record(self, name: str, status: str, seconds: float | None = None, **extra) -> None:
+        with self._lock:
+            self._phases[name] = {
+                "status": status,
+                "seconds": round(seconds, 3) if seconds is not None else None,
+                **extra,
+            }
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Times the block as `name`; a failure is recorded and re-raised.
+        """
+        self.record(name, RUNNING)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, FAILED, time.perf_counter() - started, error=str(e))
+            raise
+        self.record(name, DONE, time.perf_counter() - started)
+
+    def skip(self, name: str, reason: str) -> None:
+        self.record(name, SKIPPED, 0.0, reason=reason)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(p["status"] not in (PENDING, RUNNING) for p in self._phases.values())
+
+    def mark_ready_if_done(self) -> None:
+        if self.ready and self.ready_at is None:
+            self.ready_at = time.time()
+            logger.info("Worker ready %.2fs after start", self.ready_at - self.started_at)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            phases = {name: dict(p) for name, p in self._phases.items()}
+        return {
+            "ready": self.ready,
+            "seconds_to_ready": (
+                round(self.ready_at - self.started_at, 3) if self.ready_at is not None else None
+            ),
+            "failed": [name for name, p in phases.items() if p["status"] == FAILED],
+            "phases": phases,
+        }
+
+
+state = StartupState()
+
+
+def sync_schema() -> None:
+    """
+    Bring the DB schema up to the models, unless the stored fingerprint
+    says it already is.
+    """
+    # Imported here: keeps this module free of DB imports (and models
+    # must all be registered before fingerprinting)
+    from app.db import (
+        Base,
+        engine,
+        add_missing_columns,
+        add_missing_indexes,
+        mark_schema_current,
+        schema_fingerprint,
+        stored_schema_state,
+    )
+    from app.services import user_search
+
+    fingerprint = schema_fingerprint()
+    stored = stored_schema_state() if settings.schema_skip_if_current else None
+    if stored is not None and stored[0] == fingerprint:
+        state.skip("schema", "schema version current")
+        # Recorded by the last sync: no second query for pg_indexes
+        user_search.set_trigram_available(stored[1])
+        logger.info("Database schema current (%s), skipping sync", fingerprint[:12])
+        return
+
+    with state.phase("schema"):
+        logger.info("Creating database tables if not existing...")
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns()
+        add_missing_indexes()
+        trigram_index = user_search.ensure_trigram_index()
+        mark_schema_current(fingerprint, trigram_index=trigram_index)
+        logger.info("Database tables ready.")
+
+
+def _warm_embeddings() -> None:
+    from app.services import embedding_registry
+
+    embedding_registry.warm_up()
+
+
+def _warm_vectorstore() -> None:
+    from app.services import vectorstore_pool
+
+    vectorstore_pool.warm_up()
+
+
+def _warm_llm_client() -> None:
+    # Builds the provider singleton (client + HTTP pools); no API call
+    from app.ai import get_ai_provider
+
+    get_ai_provider()
+
+
+WARMUP_PHASES = (
+    ("embedding_model", _warm_embeddings),
+    ("vectorstore_client", _warm_vectorstore),
+    ("llm_client", _warm_llm_client),
+)
+
+
+def warmup_mode() -> str:
+    # Legacy flag: blocking warm-up of the embedding model
+    if settings.warm_embeddings_on_startup:
+        return "blocking"
+    return settings.warmup_mode.lower()
+
+
+async def run_warmup() -> None:
+    """
+    Run the warm-up phases in order, each in the threadpool. A failed phase
+    is logged and reported on /ready; the component then loads lazily on
+    first use, as without warm-up.
+    """
+    for name, func in WARMUP_PHASES:
+        try:
+            with state.phase(name):
+                await run_in_threadpool(func)
+        except Exception:
+            logger.exception("Warm-up phase %s failed", name)
+    state.mark_ready_if_done()
+
+
+async def start_warmup() -> asyncio.Task | None:
+    """
+    WARMUP_MODE=background: start the phases in a task and return it.
+    blocking: run them before returning (startup waits). off: skip them.
+    """
+    mode = warmup_mode()
+    if mode == "off":
+        for name, _ in WARMUP_PHASES:
+            state.skip(name, "WARMUP_MODE=off")
+        state.mark_ready_if_done()
+        return None
+    state.plan(*(name for name, _ in WARMUP_PHASES))
+    if mode == "blocking":
+        await run_warmup()
+        return None
+    return asyncio.create_task(run_warmup())
@@ -0,0 +1,394 @@
+# app/services/tracing.py
+"""
+Lightweight in-process span tracing.
+
+Every HTTP request (TracingMiddleware) and every ingestion job gets a
+trace; code opens child spans with `tracing.span("name")`. The active
+trace and span live in contextvars, so they follow the request through
+`await`, `asyncio.to_thread`, Starlette's threadpool and the executors
+that use `contextvars.copy_context()` (retrieval, ingestion producer).
+Threads that don't carry the context (e.g. the query embedding batcher)
+simply don't add spans.
+
+When a trace ends it is sampled:
+  - traces slower than `trace_slow_ms` are always kept (own ring buffer)
+  - the rest are kept with probability `trace_sample_rate`
+Kept traces are shown at /system/traces and, if `trace_export_path` is
+set, appended there as OTLP/JSON lines (one ExportTraceServiceRequest per
+trace, the format of the OpenTelemetry collector's file exporter).
+
+Outside a trace, `span()` returns a shared no-op object.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error", "_token")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited in another context: a span held open across a
+            # generator's yields, closed after its consumer went away
+            pass
+        self.trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = os.urandom(16).hex()
+        self._lock = threading.Lock()
+        self.spans: list[Span] = []
+        self.root = Span(self, name, None, attributes)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> dict:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "tenant_id": root.attributes.get("tenant_id"),
+            "started_at_ms": root.start_ns // 1_000_000,
+            "duration_ms": round(root.duration_ms, 3),
+            "spans": len(self.spans),
+            "error": root.error,
+        }
+
+    def waterfall(self) -> dict:
+        """
+        Spans ordered by start, with offset / duration relative to the root.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        depth: dict[Optional[str], int] = {None: -1}
+        rows = []
+        for s in spans:
+            depth[s.span_id] = depth.get(s.parent_id, 0) + 1
+            rows.append({
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "name": s.name,
+                "depth": depth[s.span_id],
+                "offset_ms": round((s.start_ns - self.root.start_ns) / 1e6, 3),
+                "duration_ms": round(s.duration_ms, 3),
+                "attributes": s.attributes,
+                "error": s.error,
+            })
+        return {**self.summary(), "waterfall": rows}
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def span(name: str, **attributes):
+    """
+    Child span of the current span; no-op outside a trace.
+
+        with tracing.span("chroma.query", k=4):
+            ...
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    parent = _current_span.get()
+    return Span(trace, name, parent.span_id if parent else None, attributes)
+
+
+def set_root_attribute(key: str, value: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.root.set_attribute(key, value)
+
+
+def set_root_error(message: str) -> None:
+    """
+    Mark the trace failed when the error is handled instead of raised
+    (failed traces are always kept).
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.root.error = message
+
+
+class TraceScope:
+    """
+    Root of a new trace for the enclosed block (see start_trace()).
+    The trace is sampled / stored when the block exits.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.trace = Trace(name, attributes) if settings.tracing_enabled else None
+
+    def __enter__(self):
+        if self.trace is None:
+            return NOOP_SPAN
+        self._trace_token = _current_trace.set(self.trace)
+        return self.trace.root.__enter__()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.trace is None:
+            return
+        self.trace.root.__exit__(exc_type, exc, tb)
+        _current_trace.reset(self._trace_token)
+        store.offer(self.trace)
+
+
+def start_trace(name: str, **attributes) -> TraceScope:
+    """
+        with tracing.start_trace("ingest_job", document_id=42):
+            ...
+    """
+    return TraceScope(name, **attributes)
+
+
+class TraceStore:
+    """
+    Two bounded rings: slow traces (always kept) and a random sample of
+    the rest, so a burst of fast requests can't evict the slow ones.
+    """
+
+    def __init__(self, max_traces: int, slow_ms: float, sample_rate: float):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._slow: deque[Trace] = deque(maxlen=max_traces)
+        self._sampled: deque[Trace] = deque(maxlen=max_traces)
+        self._seen = 0
+        self._kept = 0
+
+    def offer(self, trace: Trace) -> None:
+        slow = trace.root.duration_ms >= self.slow_ms or trace.root.error is not None
+        keep = slow or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        with self._lock:
+            self._seen += 1
+            if not keep:
+                return
+            self._kept += 1
+            (self._slow if slow else self._sampled).append(trace)
+        exporter.export(trace)
+
+    def list(self, tenant_id: int) -> list[dict]:
+        with self._lock:
+            traces = list(self._slow) + list(self._sampled)
+        out = [t.summary() for t in traces if t.root.attributes.get("tenant_id") == tenant_id]
+        return sorted(out, key=lambda s: s["started_at_ms"], reverse=True)
+
+    def get(self, tenant_id: int, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            traces = list(self._slow) + list(self._sampled)
+        for t in traces:
+            if t.trace_id == trace_id and t.root.attributes.get("tenant_id") == tenant_id:
+                return t
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "seen": self._seen,
+                "kept": self._kept,
+                "slow_buffered": len(self._slow),
+                "sampled_buffered": len(self._sampled),
+                "slow_ms": self.slow_ms,
+                "sample_rate": self.sample_rate,
+            }
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict:
+    spans = []
+    with trace._lock:
+        trace_spans = list(trace.spans)
+    for s in trace_spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            # SERVER for the request root, INTERNAL otherwise
+            "kind": 2 if s is trace.root else 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.trace_service_name}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "app.services.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class OTLPFileExporter:
+    """
+    Appends kept traces as OTLP/JSON lines from a background thread, so
+    request threads / the event loop never wait on file I/O.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, trace: Trace) -> None:
+        if not self.path:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                line = json.dumps(to_otlp(trace), separators=(",", ":"))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except Exception:
+                logger.exception("Exporting trace %s failed", trace.trace_id)
+
+
+exporter = OTLPFileExporter(settings.trace_export_path)
+store = TraceStore(
+    max_traces=settings.trace_buffer_size,
+    slow_ms=settings.trace_slow_ms,
+    sample_rate=settings.trace_sample_rate,
+)
+
+
+def render_text(trace: Trace, width: int = 60) -> str:
+    """
+    Plain-text waterfall:
+        offset ms  duration ms  |   ████        |  name
+    """
+    data = trace.waterfall()
+    total = max(data["duration_ms"], 0.001)
+    lines = [f"trace {data['trace_id']}  {data['name']}  {data['duration_ms']:.1f} ms"]
+    for row in data["waterfall"]:
+        start = int(row["offset_ms"] / total * width)
+        length = max(1, int(row["duration_ms"] / total * width))
+        bar = " " * start + "█" * min(length, width - start)
+        lines.append(
+            f"{row['offset_ms']:9.1f} {row['duration_ms']:9.1f}  |{bar:<{width}}|  "
+            f"{'  ' * row['depth']}{row['name']}{'  !' + row['error'] if row['error'] else ''}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware: one trace per HTTP request, named after the
+    matched route template once routing has happened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        tracer = start_trace(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"]})
+        with tracer as root:
+            status_code = 500
+
+            async def send_wrapper(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{scope['method']} {route.path}"
+                root.set_attribute("http.status_code", status_code)
+                # 5xx responses produced by exception handlers / routes
+                # (nothing raised here): keep them as failed traces too
+                if status_code >= 500 and root.error is None:
+                    set_root_error(f"HTTP {status_code}")
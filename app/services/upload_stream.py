@@ -0,0 +1,170 @@
+# app/services/upload_stream.py
+"""
+Streaming multipart/form-data reader for single-file uploads.
+
+Starlette's `request.form()` (and so a `File(...)` parameter) spools the
+whole body to a temp file before the route runs: an oversized upload is
+received and written in full before the size limit can reject it. Here
+the body is fed through python-multipart as it arrives and the file part
+goes straight to its destination with the same accounting as
+`stream_to_disk`, so the limit aborts the request mid-body.
+"""
+import hashlib
+from pathlib import Path
+
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.services.document_service import (
+    CHUNK_SIZE,
+    EmptyFileError,
+    FileTooLargeError,
+    MalformedUploadError,
+)
+
+# Multipart framing around the file (boundaries, part headers, small fields)
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def content_length(request: Request) -> int | None:
+    try:
+        return int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def reject_oversized(request: Request, max_body_bytes: int) -> None:
+    """
+    Refuse a body whose declared length is over the limit before reading
+    any of it. (Chunked bodies have no length; the streaming limit applies.)
+    """
+    length = content_length(request)
+    if length is not None and length > max_body_bytes:
+        raise FileTooLargeError(f"Request body exceeds {max_body_bytes} bytes")
+
+
+class _FileSink:
+    """
+    Size limit + sha256 + buffered writes of the file part. Disk writes
+    happen in the threadpool, CHUNK_SIZE at a time.
+    """
+
+    def __init__(self, dest: Path, max_bytes: int):
+        self.dest = dest
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.buffer = bytearray()
+        self.file = None
+
+    def feed(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise FileTooLargeError(f"File exceeds {self.max_bytes} bytes")
+        self.hasher.update(data)
+        self.buffer += data
+
+    def _write(self, data: bytes) -> None:
+        if self.file is None:
+            self.file = self.dest.open("wb")
+        self.file.write(data)
+
+    async def flush(self, final: bool = False) -> None:
+        if len(self.buffer) >= CHUNK_SIZE or (final and self.buffer):
+            data, self.buffer = bytes(self.buffer), bytearray()
+            await run_in_threadpool(self._write, data)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+async def receive_upload(
+    request: Request,
+    dest: Path,
+    max_bytes: int,
+    field_name: str = "file",
+) -> tuple[str, int, str]:
+    """
+    Write the `field_name` file part of a multipart request to `dest`.
+    Other parts are skipped. Raises FileTooLargeError as soon as the part
+    (or the declared body) is over `max_bytes`, EmptyFileError for an
+    empty file, MalformedUploadError for a body without that file part;
+    `dest` is removed on any failure.
+    Returns (filename, size_bytes, sha256 hex digest).
+    """
+    reject_oversized(request, max_bytes + MULTIPART_OVERHEAD_BYTES)
+
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MalformedUploadError("Expected a multipart/form-data body")
+
+    sink = _FileSink(dest, max_bytes)
+    part = {"headers": {}, "field": b"", "value": b"", "target": False}
+    filename: str | None = None
+    skipped = 0
+
+    def on_part_begin() -> None:
+        part.update(headers={}, field=b"", value=b"", target=False)
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        part["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"], part["value"] = b"", b""
+
+    def on_headers_finished() -> None:
+        nonlocal filename
+        _, options = parse_options_header(part["headers"].get(b"content-disposition"))
+        is_file = b"filename" in options
+        if is_file and filename is None and options.get(b"name", b"").decode("latin-1") == field_name:
+            filename = options[b"filename"].decode("utf-8", errors="replace")
+            part["target"] = True
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        nonlocal skipped
+        if part["target"]:
+            sink.feed(data[start:end])
+            return
+        # Other fields / files are dropped, but not without bound
+        skipped += end - start
+        if skipped > MULTIPART_OVERHEAD_BYTES:
+            raise FileTooLargeError("Too much data outside the file part")
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+        },
+    )
+
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                await sink.flush()
+            parser.finalize()
+        except FormParserError as e:
+            raise MalformedUploadError(f"Malformed multipart body: {e}")
+        await sink.flush(final=True)
+        if filename is None:
+            raise MalformedUploadError(f"Missing file field '{field_name}'")
+        if sink.size == 0:
+            raise EmptyFileError("Empty file is not allowed.")
+    except BaseException:
+        sink.close()
+        dest.unlink(missing_ok=True)
+        raise
+    sink.close()
+    return filename, sink.size, sink.hasher.hexdigest()
@@ -0,0 +1,91 @@
+# app/services/user_search.py
+"""
+Index-backed user search by email.
+
+- prefix:   lower(email) LIKE 'term%' on ix_users_tenant_email_pattern
+            (tenant_id, lower(email) text_pattern_ops). On SQLite (BINARY
+            collation) an explicit range bound lets the plain btree seek.
+- contains: lower(email) LIKE '%term%'. On Postgres this uses a pg_trgm
+            GIN index (created at startup when the extension is available)
+            for terms of 3+ characters. On SQLite it is a scan of the
+            tenant's rows (narrowed by the tenant_id index).
+"""
+import logging
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import Query
+
+from app.config import settings
+from app.db import engine
+from app.models.user import User
+from app.services.pagination import CountCache
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_INDEX = "ix_users_email_lower_trgm"
+
+_trigram_available = False
+
+# Per-tenant (and per-search) user totals, reused for a short TTL
+user_counts = CountCache(ttl_seconds=settings.users_count_cache_ttl_seconds)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def ensure_trigram_index() -> bool:
+    """
+    Postgres only: enable pg_trgm and create the GIN index for substring
+    search. Managed databases may not allow CREATE EXTENSION; then
+    "contains" search still works, just without the index.
+    """
+    global _trigram_available
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} "
+                "ON users USING gin (lower(email) gin_trgm_ops)"
+            ))
+        _trigram_available = True
+    except Exception as e:
+        logger.warning("Trigram index for user search unavailable: %s", e)
+        _trigram_available = False
+    return _trigram_available
+
+
+def set_trigram_available(available: bool) -> None:
+    """
+    Use the result recorded by the last schema sync (startup skips the
+    sync, and the pg_indexes check with it, when the schema is current).
+    """
+    global _trigram_available
+    _trigram_available = engine.dialect.name == "postgresql" and available
+
+
+def apply_search(query: Query, term: str, match: str = "contains") -> Query:
+    term = term.strip().lower()
+    if not term:
+        return query
+
+    email = func.lower(User.email)
+    if match == "prefix":
+        prefix = email.like(_escape_like(term) + "%", escape="\\")
+        if engine.dialect.name != "sqlite":
+            # Postgres derives the range from the LIKE prefix itself
+            # (text_pattern_ops index); a >= / < bound here would use the
+            # column collation and drop matches under non-C locales.
+            return query.filter(prefix)
+        # SQLite only optimises LIKE on NOCASE columns; its BINARY order is
+        # byte order, so an explicit range is exact and lets the btree seek.
+        upper = term[:-1] + chr(ord(term[-1]) + 1)
+        return query.filter(and_(email >= term, email < upper, prefix))
+
+    return query.filter(email.like("%" + _escape_like(term) + "%", escape="\\"))
+
+
+def stats() -> dict:
+    return {"dialect": engine.dialect.name, "trigram_index": _trigram_available}
@@ -0,0 +1,210 @@
+# app/services/vectorstore_pool.py
+"""
+Bounded pool of open per-tenant vector store handles (app.vectorstores).
+
+Opening a Chroma handle repeats client setup, collection lookup and HNSW
+index load; a numpy-engine handle re-reads its segment row index. Hot
+tenants should answer from a handle that is already open, so we keep the
+most recently used handles around, bounded by count, idle time and an
+estimated memory budget.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+from app.services.embedding_registry import get_embeddings
+from app import vectorstores
+from app.vectorstores import open_vectorstore
+
+logger = logging.getLogger(__name__)
+
+
+def _open_vectorstore(tenant_id: int):
+    return open_vectorstore(tenant_id, get_embeddings())
+
+
+def _estimate_bytes(vectorstore) -> int:
+    try:
+        return vectorstore.estimated_bytes()
+    except Exception:
+        logger.debug("Could not estimate vectorstore size", exc_info=True)
+        return 0
+
+
+class _Entry:
+    __slots__ = ("handle", "size_bytes", "last_used")
+
+    def __init__(self, handle, size_bytes: int):
+        self.handle = handle
+        self.size_bytes = size_bytes
+        self.last_used = time.monotonic()
+
+
+class _OpenSlot:
+    """
+    In-flight open of one tenant's handle. Exists only while some caller
+    is opening (or waiting to open) it, so the map of slots stays bounded
+    by concurrent opens, not by tenants ever seen.
+    """
+    __slots__ = ("lock", "users", "generation")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+        # Bumped by invalidate(): a handle opened across a bump may
+        # predate the write and must not be cached
+        self.generation = 0
+
+
+# Opens retried after an invalidate before the handle is returned uncached
+_MAX_OPEN_ATTEMPTS = 2
+
+
+class VectorStorePool:
+    """
+    Thread-safe LRU of vectorstore handles keyed by tenant_id.
+
+    Entries are evicted when:
+      - the pool holds more than `max_size` handles (least recently used first)
+      - a handle has not been used for `idle_ttl_seconds`
+      - the summed size estimate exceeds `memory_budget_bytes`
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        idle_ttl_seconds: float,
+        memory_budget_bytes: int,
+        factory=_open_vectorstore,
+    ):
+        self.max_size = max_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+        self._factory = factory
+
+        self._lock = threading.Lock()
+        self._opening: dict[int, _OpenSlot] = {}
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant_id: int):
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(tenant_id)
+            if entry is not None:
+                self._entries.move_to_end(tenant_id)
+                entry.last_used = time.monotonic()
+                self.hits += 1
+                return entry.handle
+            self.misses += 1
+            slot = self._opening.get(tenant_id)
+            if slot is None:
+                slot = self._opening[tenant_id] = _OpenSlot()
+            slot.users += 1
+
+        # Open outside the pool lock so a slow index load for one tenant
+        # doesn't block lookups for everyone else.
+        try:
+            with slot.lock:
+                for _ in range(_MAX_OPEN_ATTEMPTS):
+                    with self._lock:
+                        entry = self._entries.get(tenant_id)
+                        if entry is not None:
+                            return entry.handle
+                        generation = slot.generation
+
+                    handle = self._factory(tenant_id)
+                    size_bytes = _estimate_bytes(handle)
+
+                    with self._lock:
+                        if slot.generation == generation:
+                            self._entries[tenant_id] = _Entry(handle, size_bytes)
+                            self._evict_over_budget(keep=tenant_id)
+                            return handle
+                    # Invalidated while opening: open again
+                # Still being invalidated: serve this request, cache nothing
+                return handle
+        finally:
+            with self._lock:
+                slot.users -= 1
+                if slot.users == 0:
+                    del self._opening[tenant_id]
+
+    def invalidate(self, tenant_id: int) -> None:
+        """
+        Drop the cached handle for a tenant (e.g. after ingestion wrote to it).
+        An open in progress is not cached either.
+        """
+        with self._lock:
+            self._entries.pop(tenant_id, None)
+            slot = self._opening.get(tenant_id)
+            if slot is not None:
+                slot.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for slot in self._opening.values():
+                slot.generation += 1
+
+    def _evict_idle(self) -> None:
+        if self.idle_ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        for tenant_id in [t for t, e in self._entries.items() if e.last_used < cutoff]:
+            del self._entries[tenant_id]
+            self.evictions += 1
+
+    def _evict_over_budget(self, keep: int) -> None:
+        def over_budget() -> bool:
+            if len(self._entries) > self.max_size:
+                return True
+            used = sum(e.size_bytes for e in self._entries.values())
+            return self.memory_budget_bytes > 0 and used > self.memory_budget_bytes
+
+        while len(self._entries) > 1 and over_budget():
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            del self._entries[oldest]
+            self.evictions += 1
+            logger.debug("Evicted vectorstore handle for tenant %s", oldest)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "opening": len(self._opening),
+                "max_size": self.max_size,
+                "estimated_bytes": sum(e.size_bytes for e in self._entries.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+pool = VectorStorePool(
+    max_size=settings.vectorstore_pool_size,
+    idle_ttl_seconds=settings.vectorstore_idle_ttl_seconds,
+    memory_budget_bytes=settings.vectorstore_pool_memory_mb * 1024 * 1024,
+)
+
+
+def get_vectorstore(tenant_id: int):
+    return pool.get(tenant_id)
+
+
+def invalidate(tenant_id: int) -> None:
+    pool.invalidate(tenant_id)
+
+
+def warm_up() -> None:
+    vectorstores.warm_up()
@@ -0,0 +1,61 @@
+# app/vectorstores/__init__.py
+"""
+Per-tenant vector stores behind one interface (base.VectorStore), used by
+chat (vectorstore_pool) and ingestion.
+
+    VECTOR_STORE=chroma   Chroma collection per tenant (default)
+    VECTOR_STORE=numpy    memory-mapped exact search (numpy_store.py)
+
+Switching engines does not migrate data: re-ingest documents afterwards.
+"""
+from pathlib import Path
+
+from app.config import settings
+from app.vectorstores.base import VectorStore
+
+
+def collection_name_for(tenant_id: int) -> str:
+    return f"tenant_{tenant_id}"
+
+
+def open_vectorstore(tenant_id: int, embeddings=None) -> VectorStore:
+    """
+    The tenant's store for the configured engine. `embeddings` is only
+    handed to Chroma (its LangChain wrapper wants an embedding function).
+    """
+    engine = settings.vector_store.lower()
+    if engine == "numpy":
+        # Imported here: numpy is only needed with this engine
+        from app.vectorstores.numpy_store import NumpyVectorStore
+
+        return NumpyVectorStore(
+            Path(settings.numpy_index_dir) / collection_name_for(tenant_id),
+            dtype=settings.numpy_index_dtype,
+        )
+
+    from app.vectorstores.chroma_store import ChromaVectorStore
+
+    return ChromaVectorStore(collection_name_for(tenant_id), embeddings)
+
+
+def warm_up() -> None:
+    """
+    Import the engine and open shared clients ahead of the first request.
+    """
+    if settings.vector_store.lower() == "numpy":
+        import numpy  # noqa: F401
+
+        return
+    from app.vectorstores.chroma_store import warm_up as warm_chroma
+
+    warm_chroma()
+
+
+def stats() -> dict:
+    engine = settings.vector_store.lower()
+    out = {"engine": engine}
+    if engine == "numpy":
+        from app.vectorstores.numpy_store import compactor
+
+        out["compaction"] = compactor.stats()
+    return out
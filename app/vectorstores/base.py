@@ -0,0 +1,55 @@
+# app/vectorstores/base.py
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+
+class VectorStore(ABC):
+    """
+    One tenant's chunk vectors. Used by chat (similarity search) and by
+    ingestion (upsert / diff / delete); callers always pass vectors, the
+    store never embeds text itself.
+    """
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        texts: List[str],
+    ) -> None:
+        """Insert rows, replacing rows with the same id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_document_chunks(self, document_id: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """(ids, metadatas) of the rows whose metadata has this document_id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> list:
+        """Top-k rows as LangChain Documents (page_content + metadata)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self) -> int:
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self):
+        """
+        Group the writes made inside the block (one document's ingestion).
+        Stores that commit per call ignore it.
+        """
+        yield
+
+    def estimated_bytes(self) -> int:
+        """
+        Approximate memory held for this handle (vectorstore pool budget).
+        """
+        return 0
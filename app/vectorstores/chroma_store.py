@@ -0,0 +1,77 @@
+# app/vectorstores/chroma_store.py
+import logging
+
+from app.config import settings
+from app.vectorstores.base import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Rough per-row cost on top of the raw float32 vector (HNSW links, ids, metadata)
+ROW_OVERHEAD_BYTES = 512
+
+
+class ChromaVectorStore(VectorStore):
+    """
+    A tenant collection in the persistent Chroma client at `chroma_dir`.
+    """
+
+    def __init__(self, collection_name: str, embeddings):
+        # Heavy import kept lazy (see README: startup on Render)
+        from langchain_chroma import Chroma
+
+        self.chroma = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            persist_directory=settings.chroma_dir,
+        )
+
+    def upsert(self, ids, embeddings, metadatas, texts) -> None:
+        self.chroma._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            documents=texts,
+        )
+
+    def get_document_chunks(self, document_id: int):
+        existing = self.chroma.get(
+            where={"document_id": document_id},
+            include=["metadatas"],
+        )
+        return existing["ids"], existing["metadatas"]
+
+    def delete(self, ids) -> None:
+        self.chroma.delete(ids=ids)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4) -> list:
+        return self.chroma.similarity_search_by_vector(embedding, k=k)
+
+    def count(self) -> int:
+        return self.chroma._collection.count()
+
+    def estimated_bytes(self) -> int:
+        """
+        Approximate resident size of a collection: rows * (dim * 4 + overhead).
+        """
+        try:
+            collection = self.chroma._collection
+            rows = collection.count()
+            if rows == 0:
+                return 0
+            sample = collection.get(limit=1, include=["embeddings"])
+            dim = len(sample["embeddings"][0])
+            return rows * (dim * 4 + ROW_OVERHEAD_BYTES)
+        except Exception:
+            logger.debug("Could not estimate vectorstore size", exc_info=True)
+            return 0
+
+
+def warm_up() -> None:
+    """
+    Import Chroma and open the persistent client for `chroma_dir`; chromadb
+    shares one client system per path, so the first tenant handle reuses it.
+    """
+    import chromadb
+    from langchain_chroma import Chroma  # noqa: F401
+
+    chromadb.PersistentClient(path=settings.chroma_dir)
@@ -0,0 +1,651 @@
+# app/vectorstores/numpy_store.py
+"""
+Exact-search vector store on memory-mapped NumPy matrices (VECTOR_STORE=numpy).
+
+Layout of one tenant directory (`numpy_index_dir/tenant_<id>/`):
+    manifest.json           commit point: segments, tombstones, dim
+    seg_000001.vec          float32 / float16 matrix, rows x dim, unit-normalised
+    seg_000001.rows.jsonl   one {"id", "text", "metadata"} per matrix row
+    .lock                   cross-process write lock (flock)
+
+- Writes are append-only. Inside `batch()` (ingestion wraps one document in
+  it) upserts stream to a pending segment on disk and become ONE segment
+  at the end; outside a batch each call is its own small batch. Replaced
+  and deleted rows are tombstoned in the manifest. Segment files are
+  written first and the manifest is swapped in with os.replace, so readers
+  see either the old or the new state, never a partial one.
+- Search is a brute-force dot product per segment (cosine, as vectors are
+  normalised) in blocks of BLOCK_ROWS rows, then a top-k merge.
+- Segment matrices are np.memmap'ed read-only: worker processes share the
+  pages through the OS page cache instead of each loading a copy.
+- Readers never lock. A handle re-reads the manifest when it changed
+  (one stat() per search); segments already open are reused, so a commit
+  costs readers only the new segment's row index.
+- A background thread compacts a tenant, size-tiered: segments with more
+  than `numpy_index_compact_ratio` tombstoned rows are rewritten, and once
+  there are more than `numpy_index_max_segments` segments the smallest are
+  merged until half that many remain. Large clean segments are left alone.
+  The merge runs without the write lock (segments are immutable); only the
+  manifest swap takes it, so ingestion of that tenant is barely delayed.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.vectorstores.base import VectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+LOCK_FILE = ".lock"
+# Rows scored per matrix product (bounds the float32 temporary for float16 segments)
+BLOCK_ROWS = 16384
+# Temp files (pending batches, merges) older than this belong to a crashed writer
+STALE_TEMP_SECONDS = 3600
+
+_thread_locks: dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _write_lock(directory: Path):
+    """
+    Serialises writers of one tenant directory across threads and processes.
+    """
+    with _thread_locks_guard:
+        lock = _thread_locks.setdefault(str(directory), threading.Lock())
+    with lock:
+        directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(directory / LOCK_FILE, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class _Segment:
+    """
+    One immutable segment: memmapped matrix + row index. The rows file
+    stays open (until the segment is garbage collected), so searches on an
+    older snapshot keep working after compaction unlinks it (POSIX).
+    """
+
+    def __init__(self, directory: Path, name: str, rows: int, dim: int, dtype: str):
+        self.name = name
+        self.rows = rows
+        self.dtype = np.dtype(dtype)
+        if rows:
+            self.vectors = np.memmap(directory / f"{name}.vec", dtype=self.dtype, mode="r", shape=(rows, dim))
+        else:
+            self.vectors = np.empty((0, dim), dtype=self.dtype)
+
+        self.ids: list[str] = []
+        self.offsets: list[int] = []
+        self.by_document: dict = {}
+        self._rows_file = open(directory / f"{name}.rows.jsonl", "rb")
+        self._read_lock = threading.Lock()
+        self._row_of: dict[str, int] | None = None
+        offset = 0
+        for i, line in enumerate(self._rows_file):
+            row = json.loads(line)
+            self.ids.append(row["id"])
+            self.offsets.append(offset)
+            offset += len(line)
+            document_id = (row.get("metadata") or {}).get("document_id")
+            self.by_document.setdefault(document_id, []).append(i)
+        self.offsets.append(offset)
+
+    @property
+    def row_of(self) -> dict[str, int]:
+        """
+        id -> row, built on first use (writers only; searches never need
+        it). Segments are immutable, so it is built once per segment.
+        """
+        if self._row_of is None:
+            self._row_of = {row_id: r for r, row_id in enumerate(self.ids)}
+        return self._row_of
+
+    def raw_row(self, i: int) -> bytes:
+        with self._read_lock:
+            self._rows_file.seek(self.offsets[i])
+            return self._rows_file.read(self.offsets[i + 1] - self.offsets[i])
+
+    def row(self, i: int) -> dict:
+        return json.loads(self.raw_row(i))
+
+
+class _State:
+    """
+    Snapshot a search works on: segments and their tombstone masks.
+    Replaced as a whole when the manifest changes.
+    """
+
+    def __init__(self, manifest: dict, segments: list[_Segment]):
+        self.manifest = manifest
+        self.segments = segments
+        self.masks: list[np.ndarray] = []
+        for entry, segment in zip(manifest["segments"], segments):
+            mask = np.zeros(segment.rows, dtype=bool)
+            if entry["deleted"]:
+                mask[np.asarray(entry["deleted"], dtype=np.int64)] = True
+            self.masks.append(mask)
+
+    def live_ref(self, row_id: str) -> tuple[int, int] | None:
+        """
+        (segment, row) of the live row with this id. O(segments) lookups.
+        """
+        for s, (segment, mask) in enumerate(zip(self.segments, self.masks)):
+            r = segment.row_of.get(row_id)
+            if r is not None and not mask[r]:
+                return s, r
+        return None
+
+    def segment_live_rows(self, s: int) -> int:
+        return int(len(self.masks[s]) - self.masks[s].sum())
+
+    @property
+    def live_rows(self) -> int:
+        return sum(self.segment_live_rows(s) for s in range(len(self.masks)))
+
+    @property
+    def total_rows(self) -> int:
+        return sum(len(m) for m in self.masks)
+
+
+def _empty_manifest(dtype: str) -> dict:
+    return {"version": 0, "dim": None, "dtype": dtype, "next_segment": 1, "segments": []}
+
+
+class _PendingSegment:
+    """
+    Rows of one batch, streamed to temp files so a large document doesn't
+    sit in memory. Becomes a segment (or nothing) when the batch commits.
+    """
+
+    def __init__(self, directory: Path, dtype: str):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.dtype = dtype
+        self.prefix = f".pending-{uuid.uuid4().hex}"
+        self.vec_path = directory / f"{self.prefix}.vec"
+        self.rows_path = directory / f"{self.prefix}.rows.jsonl"
+        self._vec = open(self.vec_path, "wb")
+        self._rows = open(self.rows_path, "wb")
+        self.dim: int | None = None
+        self.rows = 0
+        self.row_of: dict[str, int] = {}   # id -> latest staged row
+        self.dead_rows: list[int] = []     # staged rows replaced / deleted within the batch
+        self.deleted_ids: set[str] = set() # ids to tombstone in committed segments
+
+    def add(self, ids, vectors: np.ndarray, metadatas, texts) -> None:
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the batch ({self.dim})")
+        self._vec.write(vectors.astype(self.dtype).tobytes())
+        for row_id, text, metadata in zip(ids, texts, metadatas):
+            self._rows.write(
+                json.dumps({"id": row_id, "text": text, "metadata": metadata}).encode("utf-8") + b"\n"
+            )
+            previous = self.row_of.get(row_id)
+            if previous is not None:
+                self.dead_rows.append(previous)
+            self.row_of[row_id] = self.rows
+            self.rows += 1
+
+    def delete(self, ids) -> None:
+        for row_id in ids:
+            staged = self.row_of.pop(row_id, None)
+            if staged is not None:
+                self.dead_rows.append(staged)
+            self.deleted_ids.add(row_id)
+
+    def close(self) -> None:
+        for f in (self._vec, self._rows):
+            if not f.closed:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+
+    def discard(self) -> None:
+        self.close()
+        for path in (self.vec_path, self.rows_path):
+            path.unlink(missing_ok=True)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    One tenant directory. A handle may be shared by searching threads; a
+    `batch()` belongs to the thread that opened it (ingestion uses its own
+    handle per job).
+    """
+
+    def __init__(self, directory: str | Path, dtype: str = "float32"):
+        self.directory = Path(directory)
+        self.dtype = np.dtype(dtype).name
+        # Guards _open_segments / _state; re-entered by _refresh -> _load_state
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._open_segments: dict[str, _Segment] = {}
+        self._state = _State(_empty_manifest(self.dtype), [])
+        self._pending: _PendingSegment | None = None
+        self._refresh()
+
+    # -----------------------
+    # Manifest / state
+    # -----------------------
+    def _read_manifest(self) -> dict:
+        try:
+            return json.loads((self.directory / MANIFEST).read_text())
+        except FileNotFoundError:
+            return _empty_manifest(self.dtype)
+
+    def _manifest_stamp(self):
+        try:
+            st = os.stat(self.directory / MANIFEST)
+        except FileNotFoundError:
+            return None
+        # os.replace gives the manifest a new inode on every commit
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load_state(self, manifest: dict) -> _State:
+        with self._lock:
+            segments = []
+            for entry in manifest["segments"]:
+                segment = self._open_segments.get(entry["name"])
+                if segment is None:
+                    segment = _Segment(
+                        self.directory, entry["name"], entry["rows"], manifest["dim"], entry["dtype"]
+                    )
+                segments.append(segment)
+            # Dropped segments close once no snapshot references them
+            self._open_segments = {s.name: s for s in segments}
+            return _State(manifest, segments)
+
+    def _refresh(self, force: bool = False) -> _State:
+        stamp = self._manifest_stamp()
+        if not force and stamp == self._stamp:
+            return self._state
+        with self._lock:
+            for attempt in range(5):
+                stamp = self._manifest_stamp()
+                if not force and stamp == self._stamp:
+                    break
+                try:
+                    self._state = self._load_state(self._read_manifest())
+                except FileNotFoundError:
+                    # Lock-free read raced a compaction that already removed
+                    # the segments: its manifest is committed, read it again
+                    if attempt == 4:
+                        raise
+                    continue
+                self._stamp = stamp
+                break
+            return self._state
+
+    def _commit(self, manifest: dict) -> None:
+        manifest["version"] += 1
+        _write_atomic(self.directory / MANIFEST, json.dumps(manifest).encode("utf-8"))
+
+    def _tombstone(self, manifest: dict, state: _State, ids) -> int:
+        deleted: dict[int, list[int]] = {}
+        for row_id in ids:
+            ref = state.live_ref(row_id)
+            if ref is not None:
+                deleted.setdefault(ref[0], []).append(ref[1])
+        for s, rows in deleted.items():
+            manifest["segments"][s]["deleted"].extend(rows)
+        return sum(len(rows) for rows in deleted.values())
+
+    # -----------------------
+    # Batches
+    # -----------------------
+    @contextmanager
+    def batch(self):
+        """
+        Collect upserts / deletes into one segment + one manifest commit.
+        Rows written before an exception are still committed, like
+        separate calls would have been. Nested batches join the outer one.
+        """
+        if self._pending is not None:
+            yield
+            return
+        self._pending = _PendingSegment(self.directory, self.dtype)
+        try:
+            yield
+        finally:
+            pending, self._pending = self._pending, None
+            try:
+                self._commit_pending(pending)
+            finally:
+                pending.discard()
+
+    def _commit_pending(self, pending: _PendingSegment) -> None:
+        pending.close()
+        live_ids = list(pending.row_of)
+        if not pending.rows and not pending.deleted_ids:
+            return
+
+        with _write_lock(self.directory):
+            manifest = self._read_manifest()
+            if pending.rows:
+                if manifest["dim"] is None:
+                    manifest["dim"] = pending.dim
+                elif manifest["dim"] != pending.dim:
+                    raise ValueError(
+                        f"Embedding dimension {pending.dim} does not match the index ({manifest['dim']})"
+                    )
+            # Fresh state: another process may have committed since our last read
+            state = self._load_state(manifest)
+            changed = self._tombstone(manifest, state, pending.deleted_ids | set(live_ids))
+
+            if pending.rows:
+                name = f"seg_{manifest['next_segment']:06d}"
+                manifest["next_segment"] += 1
+                os.replace(pending.vec_path, self.directory / f"{name}.vec")
+                os.replace(pending.rows_path, self.directory / f"{name}.rows.jsonl")
+                manifest["segments"].append({
+                    "name": name,
+                    "rows": pending.rows,
+                    "dtype": self.dtype,
+                    "deleted": sorted(pending.dead_rows),
+                })
+            if pending.rows or changed:
+                self._commit(manifest)
+
+        self._after_write()
+
+    # -----------------------
+    # VectorStore
+    # -----------------------
+    def upsert(self, ids, embeddings, metadatas, texts) -> None:
+        if not ids:
+            return
+        vectors = _normalise(np.asarray(embeddings, dtype=np.float32))
+        with self.batch():
+            self._pending.add(ids, vectors, metadatas, texts)
+
+    def delete(self, ids) -> None:
+        if not ids:
+            return
+        with self.batch():
+            self._pending.delete(ids)
+
+    def get_document_chunks(self, document_id: int):
+        state = self._refresh()
+        ids, metadatas = [], []
+        for segment, mask in zip(state.segments, state.masks):
+            for r in segment.by_document.get(document_id, ()):
+                if not mask[r]:
+                    ids.append(segment.ids[r])
+                    metadatas.append(segment.row(r).get("metadata") or {})
+        return ids, metadatas
+
+    def similarity_search_by_vector(self, embedding, k: int = 4) -> list:
+        from langchain_core.documents import Document
+
+        state = self._refresh()
+        if k <= 0 or not state.segments:
+            return []
+        query = _normalise(np.asarray(embedding, dtype=np.float32))
+
+        scores_parts, seg_parts, row_parts = [], [], []
+        for s, (segment, mask) in enumerate(zip(state.segments, state.masks)):
+            for start in range(0, segment.rows, BLOCK_ROWS):
+                block = segment.vectors[start:start + BLOCK_ROWS]
+                scores = np.asarray(block @ query, dtype=np.float32)
+                scores[mask[start:start + len(scores)]] = -np.inf
+                if len(scores) > k:
+                    top = np.argpartition(-scores, k)[:k]
+                else:
+                    top = np.arange(len(scores))
+                scores_parts.append(scores[top])
+                seg_parts.append(np.full(len(top), s))
+                row_parts.append(top + start)
+        if not scores_parts:
+            return []
+
+        scores = np.concatenate(scores_parts)
+        segs = np.concatenate(seg_parts)
+        rows = np.concatenate(row_parts)
+        order = np.argsort(-scores, kind="stable")[:k]
+
+        results = []
+        for i in order:
+            if not np.isfinite(scores[i]):
+                break
+            row = state.segments[segs[i]].row(int(rows[i]))
+            results.append(Document(page_content=row["text"], metadata=row.get("metadata") or {}))
+        return results
+
+    def count(self) -> int:
+        return self._refresh().live_rows
+
+    def estimated_bytes(self) -> int:
+        """
+        Mapped matrix size. Pages live in the OS page cache, shared by
+        all worker processes, so this overstates per-process memory.
+        """
+        state = self._refresh()
+        return sum(s.vectors.nbytes for s in state.segments)
+
+    # -----------------------
+    # Compaction
+    # -----------------------
+    def compaction_plan(self, state: _State | None = None) -> list[int]:
+        """
+        Indexes of the segments to merge into one (empty: nothing to do).
+        Dirty segments (tombstone share above the ratio) always; past
+        `numpy_index_max_segments`, also the smallest clean segments so
+        that half the limit remains.
+        """
+        state = state or self._refresh()
+        ratio = settings.numpy_index_compact_ratio
+        dirty = [
+            s for s, mask in enumerate(state.masks)
+            if len(mask) and mask.sum() / len(mask) > ratio
+        ]
+        chosen = set(dirty)
+        count = len(state.segments)
+        if count > settings.numpy_index_max_segments:
+            target = max(1, settings.numpy_index_max_segments // 2)
+            clean = sorted(
+                (s for s in range(count) if s not in chosen),
+                key=state.segment_live_rows,
+            )
+            # After the merge: (count - merged) + 1 segments
+            extra = max(0, (count - len(chosen) + 1) - target)
+            chosen.update(clean[:extra])
+        if len(chosen) == 1:
+            (only,) = chosen
+            if not state.masks[only].any():
+                return []
+        return sorted(chosen)
+
+    def needs_compaction(self, state: _State | None = None) -> bool:
+        return bool(self.compaction_plan(state))
+
+    def _after_write(self) -> None:
+        if self.needs_compaction(self._refresh()):
+            compactor.schedule(self.directory, self.dtype)
+
+    def compact(self) -> bool:
+        """
+        Merge the planned segments' live rows into one new segment in the
+        configured dtype, then drop their files. Copying happens without
+        the write lock; rows tombstoned meanwhile are carried over when the
+        manifest is swapped. Returns False if there was nothing to do (or
+        another compaction got there first).
+        """
+        manifest = self._read_manifest()
+        state = self._load_state(manifest)
+        plan = self.compaction_plan(state)
+        if not plan:
+            return False
+
+        prefix = f".merge-{uuid.uuid4().hex}"
+        vec_tmp = self.directory / f"{prefix}.vec"
+        rows_tmp = self.directory / f"{prefix}.rows.jsonl"
+        sources: dict[str, tuple[int, np.ndarray, set[int]]] = {}
+        live = 0
+        try:
+            with open(vec_tmp, "wb") as vec_out, open(rows_tmp, "wb") as rows_out:
+                for s in plan:
+                    segment, mask = state.segments[s], state.masks[s]
+                    kept = np.flatnonzero(~mask)
+                    sources[segment.name] = (live, kept, set(manifest["segments"][s]["deleted"]))
+                    for start in range(0, len(kept), BLOCK_ROWS):
+                        rows = kept[start:start + BLOCK_ROWS]
+                        vec_out.write(np.ascontiguousarray(segment.vectors[rows], dtype=self.dtype).tobytes())
+                        for r in rows:
+                            rows_out.write(segment.raw_row(int(r)))
+                    live += len(kept)
+                for f in (vec_out, rows_out):
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            with _write_lock(self.directory):
+                current = self._read_manifest()
+                by_name = {entry["name"]: entry for entry in current["segments"]}
+                if any(name not in by_name for name in sources):
+                    # Another process compacted these segments already
+                    return False
+
+                # Rows tombstoned since the copy, mapped to their new position
+                carried: list[int] = []
+                for name, (base, kept, deleted_before) in sources.items():
+                    for r in set(by_name[name]["deleted"]) - deleted_before:
+                        pos = int(np.searchsorted(kept, r))
+                        if pos < len(kept) and kept[pos] == r:
+                            carried.append(base + pos)
+
+                first = min(i for i, entry in enumerate(current["segments"]) if entry["name"] in sources)
+                remaining = [entry for entry in current["segments"] if entry["name"] not in sources]
+                if live:
+                    name = f"seg_{current['next_segment']:06d}"
+                    current["next_segment"] += 1
+                    os.replace(vec_tmp, self.directory / f"{name}.vec")
+                    os.replace(rows_tmp, self.directory / f"{name}.rows.jsonl")
+                    merged = {"name": name, "rows": live, "dtype": self.dtype, "deleted": sorted(carried)}
+                    remaining.insert(first, merged)
+                current["segments"] = remaining
+                self._commit(current)
+
+                for old_name in sources:
+                    for suffix in (".vec", ".rows.jsonl"):
+                        try:
+                            (self.directory / f"{old_name}{suffix}").unlink()
+                        except OSError:
+                            # Windows: still mapped by another process; removed by a later compaction
+                            logger.debug("Could not remove %s%s", old_name, suffix)
+                self._remove_orphans({entry["name"] for entry in current["segments"]})
+        finally:
+            vec_tmp.unlink(missing_ok=True)
+            rows_tmp.unlink(missing_ok=True)
+
+        self._refresh(force=True)
+        return True
+
+    def _remove_orphans(self, keep: set[str]) -> None:
+        """
+        Segment files not in the manifest (left by a failed removal), and
+        temp files of writers that crashed (older than STALE_TEMP_SECONDS;
+        newer ones may belong to a batch or merge still in progress).
+        Caller holds the write lock.
+        """
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for path in self.directory.iterdir():
+            if path.name in (MANIFEST, LOCK_FILE):
+                continue
+            try:
+                if path.name.startswith("."):
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                elif path.name.split(".")[0] not in keep:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+class _Compactor:
+    """
+    Single background thread compacting tenant directories queued by
+    writers (at most one pending entry per directory).
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[tuple[Path, str]]" = queue.Queue()
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.compactions = 0
+        self.failures = 0
+        self.last_seconds: float | None = None
+
+    def schedule(self, directory: Path, dtype: str) -> None:
+        with self._lock:
+            if str(directory) in self._pending:
+                return
+            self._pending.add(str(directory))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="numpy-index-compactor", daemon=True)
+                self._thread.start()
+        self._queue.put((directory, dtype))
+
+    def _run(self) -> None:
+        while True:
+            directory, dtype = self._queue.get()
+            with self._lock:
+                self._pending.discard(str(directory))
+            started = time.perf_counter()
+            try:
+                if NumpyVectorStore(directory, dtype=dtype).compact():
+                    self.compactions += 1
+                    self.last_seconds = round(time.perf_counter() - started, 3)
+                    logger.info("Compacted %s in %.2fs", directory, self.last_seconds)
+            except Exception:
+                self.failures += 1
+                logger.exception("Compacting %s failed", directory)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "compactions": self.compactions,
+            "failures": self.failures,
+            "last_seconds": self.last_seconds,
+        }
+
+
+compactor = _Compactor()
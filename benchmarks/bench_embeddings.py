@@ -0,0 +1,164 @@
+# benchmarks/bench_embeddings.py
+"""
+Embedding backends: PyTorch (HuggingFaceEmbeddings) vs ONNX Runtime fp32
+vs ONNX Runtime int8. Reports document throughput, single-query latency
+and agreement with the PyTorch vectors (cosine similarity per text, and
+top-k retrieval overlap for sample queries).
+
+Usage (from the repo root; export the ONNX model first, see
+app/services/onnx_embeddings.py):
+    python -m benchmarks.bench_embeddings --onnx-dir models/all-MiniLM-L6-v2-onnx
+    python -m benchmarks.bench_embeddings --corpus docs/ --docs 2000 --batch-size 64
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CHUNK_CHARS = 1000
+
+
+def load_corpus(path: str | None, n_docs: int, seed: int) -> list[str]:
+    """
+    ~1000-character chunks of the given .txt / .md files (default: the
+    README), repeated with light shuffling up to `n_docs`.
+    """
+    root = Path(path) if path else REPO_ROOT / "README.md"
+    files = [root] if root.is_file() else sorted(
+        p for p in root.rglob("*") if p.suffix.lower() in (".txt", ".md")
+    )
+    chunks: list[str] = []
+    for f in files:
+        text = f.read_text(encoding="utf-8", errors="ignore")
+        for para in text.split("\n\n"):
+            para = para.strip()
+            if not para:
+                continue
+            if chunks and len(chunks[-1]) + len(para) < CHUNK_CHARS:
+                chunks[-1] += "\n\n" + para
+            else:
+                chunks.append(para[:CHUNK_CHARS * 2])
+    if not chunks:
+        raise SystemExit(f"No text found in {root}")
+
+    rng = random.Random(seed)
+    corpus = list(chunks)
+    while len(corpus) < n_docs:
+        words = rng.choice(chunks).split()
+        rng.shuffle(words)
+        corpus.append(" ".join(words))
+    return corpus[:n_docs]
+
+
+def sample_queries(corpus: list[str], n: int, seed: int) -> list[str]:
+    rng = random.Random(seed + 1)
+    return [" ".join(rng.choice(corpus).split()[:12]) for _ in range(n)]
+
+
+def _percentile_ms(values: list[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2)
+
+
+def run_backend(name: str, factory, corpus: list[str], queries: list[str]) -> tuple[dict, np.ndarray, np.ndarray]:
+    started = time.perf_counter()
+    embeddings = factory()
+    load_seconds = time.perf_counter() - started
+
+    # First call pays one-off setup (allocations, kernel selection)
+    embeddings.embed_documents(corpus[:8])
+
+    started = time.perf_counter()
+    doc_vectors = np.asarray(embeddings.embed_documents(corpus), dtype=np.float32)
+    doc_seconds = time.perf_counter() - started
+
+    latencies = []
+    query_vectors = []
+    for q in queries:
+        started = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(q))
+        latencies.append(time.perf_counter() - started)
+
+    report = {
+        "backend": name,
+        "load_seconds": round(load_seconds, 3),
+        "docs_per_second": round(len(corpus) / doc_seconds, 1),
+        "query_p50_ms": _percentile_ms(latencies, 50),
+        "query_p95_ms": _percentile_ms(latencies, 95),
+    }
+    return report, doc_vectors, np.asarray(query_vectors, dtype=np.float32)
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def agreement(ref_docs, ref_queries, docs, queries, k: int) -> dict:
+    cosines = np.sum(_unit(ref_docs) * _unit(docs), axis=1)
+    ref_top = np.argsort(-(ref_queries @ ref_docs.T), axis=1)[:, :k]
+    top = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, top)]
+    return {
+        "cosine_mean": round(float(cosines.mean()), 6),
+        "cosine_min": round(float(cosines.min()), 6),
+        "cosine_p1": round(float(np.percentile(cosines, 1)), 6),
+        f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-dir", default="models/all-MiniLM-L6-v2-onnx")
+    parser.add_argument("--corpus", default=None, help=".txt/.md file or directory (default: README.md)")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32, help="ONNX batch size")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = default)")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-torch", action="store_true", help="ONNX only (no agreement numbers)")
+    args = parser.parse_args()
+
+    from app.services.onnx_embeddings import OnnxEmbeddings
+
+    corpus = load_corpus(args.corpus, args.docs, args.seed)
+    queries = sample_queries(corpus, args.queries, args.seed)
+
+    backends = []
+    if not args.skip_torch:
+        def torch_factory():
+            from langchain_huggingface import HuggingFaceEmbeddings
+
+            return HuggingFaceEmbeddings(model_name=args.model)
+
+        backends.append(("torch", torch_factory))
+    for name, quantize in (("onnx", False), ("onnx-int8", True)):
+        backends.append((name, lambda q=quantize: OnnxEmbeddings(
+            args.onnx_dir, quantize=q, batch_size=args.batch_size, threads=args.threads,
+        )))
+
+    results = []
+    reference = None
+    for name, factory in backends:
+        report, docs, qs = run_backend(name, factory, corpus, queries)
+        if reference is None and name == "torch":
+            reference = (docs, qs)
+        elif reference is not None:
+            report["vs_torch"] = agreement(reference[0], reference[1], docs, qs, args.top_k)
+        results.append(report)
+
+    print(json.dumps({
+        "model": args.model,
+        "docs": len(corpus),
+        "queries": len(queries),
+        "avg_doc_chars": round(sum(map(len, corpus)) / len(corpus)),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_password_hashing.py
+"""
+Login (pbkdf2_sha256 verify) throughput: inline vs the hashing process pool.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_password_hashing --rounds 29000 --workers 4 --logins 400
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# app.config requires these; the benchmark never touches the DB / Gemini / JWT
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.sqlite3")
+os.environ.setdefault("GEMINI_API_KEY", "unused")
+os.environ.setdefault("JWT_SECRET", "unused")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=29000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32, help="simulated request threads")
+    args = parser.parse_args()
+
+    from app.services.password_hasher import PasswordHasher, _context
+
+    password = "correct horse battery staple"
+    stored = _context(args.rounds).hash(password)
+
+    # Inline: what a single request thread does without the pool
+    inline_n = max(1, args.logins // 10)
+    started = time.perf_counter()
+    for _ in range(inline_n):
+        _context(args.rounds).verify(password, stored)
+    inline_s = time.perf_counter() - started
+
+    hasher = PasswordHasher(
+        rounds=args.rounds,
+        workers=args.workers,
+        max_pending=max(args.concurrency, args.workers),
+    )
+    # Start the workers before timing
+    hasher.verify_and_update(password, stored)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as threads:
+        results = list(threads.map(
+            lambda _: hasher.verify_and_update(password, stored)[0],
+            range(args.logins),
+        ))
+    pool_s = time.perf_counter() - started
+    hasher.shutdown()
+
+    inline_rate = inline_n / inline_s
+    pool_rate = args.logins / pool_s
+    print(json.dumps({
+        "rounds": args.rounds,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "inline_logins_per_second": round(inline_rate, 1),
+        "pool_logins_per_second": round(pool_rate, 1),
+        "pool_logins_per_second_per_core": round(pool_rate / args.workers, 1),
+        "all_verified": all(results),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_pdf_extraction.py
+"""
+PyPDFLoader vs page-parallel ParallelPDFLoader on a local PDF.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pdf_extraction path/to/manual.pdf --workers 4 --repeat 3
+"""
+import argparse
+import json
+import os
+import time
+
+# app.config requires these; the benchmark never touches the DB / Gemini / JWT
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.sqlite3")
+os.environ.setdefault("GEMINI_API_KEY", "unused")
+os.environ.setdefault("JWT_SECRET", "unused")
+
+
+def _best_of(fn, repeat: int) -> tuple[float, list]:
+    best = float("inf")
+    result: list = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from langchain_community.document_loaders import PyPDFLoader
+    from app.services.pdf_parallel import ParallelPDFLoader, shutdown_pool
+
+    baseline_s, baseline = _best_of(lambda: PyPDFLoader(args.pdf).load(), args.repeat)
+
+    parallel = ParallelPDFLoader(
+        args.pdf,
+        workers=args.workers,
+        pages_per_task=args.pages_per_task,
+        min_pages=0,
+    )
+    # Warm the pool once so process start-up isn't counted against every run
+    parallel.load()
+    parallel_s, pages = _best_of(parallel.load, args.repeat)
+    shutdown_pool()
+
+    same_text = [d.page_content for d in baseline] == [d.page_content for d in pages]
+    same_order = [d.metadata["page"] for d in pages] == list(range(len(pages)))
+
+    print(json.dumps({
+        "pdf": args.pdf,
+        "pages": len(pages),
+        "workers": args.workers,
+        "pages_per_task": args.pages_per_task,
+        "pypdfloader_seconds": round(baseline_s, 3),
+        "parallel_seconds": round(parallel_s, 3),
+        "speedup": round(baseline_s / parallel_s, 2) if parallel_s else None,
+        "identical_text": same_text,
+        "pages_in_order": same_order,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
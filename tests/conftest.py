@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os
+
+# Settings are read at import time; tests run offline on SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("AI_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
@@ -0,0 +1,69 @@
+# tests/test_answer_cache.py
+import asyncio
+import threading
+
+from app.services.answer_cache import AnswerCache, CorpusVersions
+
+
+def make_cache(path) -> AnswerCache:
+    return AnswerCache(max_entries=10, ttl_seconds=60, versions=CorpusVersions(str(path)))
+
+
+def test_bump_in_another_process_invalidates_answers(tmp_path):
+    path = tmp_path / "versions.sqlite3"
+    # Two worker processes: separate caches and connections, one versions file
+    worker_a, worker_b = make_cache(path), make_cache(path)
+
+    version = worker_a.corpus_version(1)
+    worker_a.put(1, "What is RAG?", {"answer": "old"}, version=version)
+    assert worker_a.get(1, "what is rag") == {"answer": "old"}
+
+    assert worker_b.bump_corpus_version(1) == 1
+
+    assert worker_a.get(1, "what is rag") is None
+    assert worker_a.corpus_version(1) == 1
+    assert worker_a.corpus_version(2) == 0
+
+
+def test_answer_computed_across_a_bump_is_not_stored(tmp_path):
+    path = tmp_path / "versions.sqlite3"
+    worker_a, worker_b = make_cache(path), make_cache(path)
+
+    version = worker_a.corpus_version(1)
+    worker_b.bump_corpus_version(1)
+    worker_a.put(1, "q", {"answer": "stale"}, version=version)
+
+    assert worker_a.get(1, "q") is None
+    assert worker_a.stats()["size"] == 0
+
+
+def test_bumps_count_up_and_lookup_returns_the_version(tmp_path):
+    cache = make_cache(tmp_path / "versions.sqlite3")
+
+    assert [cache.bump_corpus_version(1) for _ in range(3)] == [1, 2, 3]
+    assert cache.lookup(1, "q") == (None, 3)
+    cache.put(1, "q", {"answer": "a"}, version=3)
+    assert cache.lookup(1, "Q?") == ({"answer": "a"}, 3)
+
+
+def test_async_path_reads_versions_off_the_event_loop(tmp_path, monkeypatch):
+    from app.services import chat_service
+
+    cache = make_cache(tmp_path / "versions.sqlite3")
+    monkeypatch.setattr(chat_service.answer_cache, "cache", cache)
+    monkeypatch.setattr(chat_service.settings, "answer_cache_enabled", True)
+    readers = []
+    read_version = cache.versions.get
+
+    def get(tenant_id):
+        readers.append(threading.current_thread())
+        return read_version(tenant_id)
+
+    monkeypatch.setattr(cache.versions, "get", get)
+
+    async def main():
+        await chat_service._astore_answer("q", 1, True, {"answer": "a"}, 0)
+        return await chat_service._acached_answer("q", 1, True)
+
+    assert asyncio.run(main()) == ({"answer": "a"}, 0)
+    assert readers and threading.main_thread() not in readers
@@ -0,0 +1,103 @@
+# tests/test_bulk_ingest.py
+from concurrent.futures import Future
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models.document import Document
+from app.models.tenant import Tenant
+from app.services import bulk_ingest_service
+
+
+class InlinePool:
+    """
+    Runs each task on submit; tracks how many results were submitted but
+    not yet collected by the ingest loop.
+    """
+
+    def __init__(self):
+        self.outstanding = 0
+        self.max_outstanding = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        self.outstanding += 1
+        self.max_outstanding = max(self.max_outstanding, self.outstanding)
+        collect = future.result
+
+        def result(timeout=None):
+            self.outstanding -= 1
+            return collect(timeout)
+
+        future.result = result
+        return future
+
+
+class Chunk:
+    def __init__(self, text: str):
+        self.page_content = text
+        self.metadata = {}
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = InlinePool()
+    written = []
+    monkeypatch.setattr(bulk_ingest_service.settings, "bulk_parse_workers", 2)
+    monkeypatch.setattr(bulk_ingest_service, "_parse_pool", lambda: pool)
+    monkeypatch.setattr(bulk_ingest_service, "ingest_embeddings", lambda: object())
+    monkeypatch.setattr(bulk_ingest_service, "open_ingest_vectorstore", lambda tenant_id, embeddings: None)
+    monkeypatch.setattr(bulk_ingest_service, "mark_collection_changed", lambda tenant_id: None)
+    monkeypatch.setattr(bulk_ingest_service, "record_ingest_metrics", lambda *args: None)
+    monkeypatch.setattr(
+        bulk_ingest_service,
+        "write_chunks",
+        lambda vectorstore, embeddings, chunks, ids, timings: written.extend(ids),
+    )
+    pool.written = written
+    return pool
+
+
+def queued_items(Session, filenames: list[str]) -> list[dict]:
+    with Session() as db:
+        db.add(Tenant(id=1, name="t1"))
+        docs = [Document(tenant_id=1, filename=name, storage_path=name) for name in filenames]
+        db.add_all(docs)
+        db.commit()
+        return [
+            {"document_id": d.id, "filename": d.filename, "status": "QUEUED", "error": None, "chunks_indexed": None}
+            for d in docs
+        ]
+
+
+def test_parses_through_a_bounded_window(session, pool, monkeypatch):
+    def parse_file(path, tenant_id, document_id, pdf_workers):
+        if path == "bad.txt":
+            raise ValueError("unreadable")
+        return [Chunk(f"{path} part {i}") for i in range(3)]
+
+    monkeypatch.setattr(bulk_ingest_service, "parse_file", parse_file)
+    items = queued_items(session, [f"f{i}.txt" for i in range(20)] + ["bad.txt"])
+
+    with session() as db:
+        result = bulk_ingest_service.run_bulk_ingest(db, 1, items, {})
+
+    # 2 workers -> at most 4 parsed files held ahead of the write loop
+    assert pool.max_outstanding <= 4
+    assert result["chunks_indexed"] == 60
+    assert len(pool.written) == 60
+    assert [i["status"] for i in items] == ["READY"] * 20 + ["FAILED"]
+    assert items[-1]["error"] == "Ingestion failed: unreadable"
@@ -0,0 +1,83 @@
+# tests/test_chat_async.py
+import asyncio
+
+import pytest
+
+from app.ai.fake_provider import FakeProvider
+from app.services import chat_service
+from app.services.chat_service import LLMBusyError
+
+
+class SlowProvider(FakeProvider):
+    """
+    Tracks how many achat calls are in flight at once.
+    """
+
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def achat(self, messages):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.seconds)
+            return await super().achat(messages)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    def configure(seconds: float, slots: int, queue_timeout: float) -> SlowProvider:
+        provider = SlowProvider(seconds)
+        monkeypatch.setattr(chat_service, "get_ai_provider", lambda: provider)
+        monkeypatch.setattr(chat_service, "retrieve", lambda query, tenant_id: [])
+        monkeypatch.setattr(chat_service.settings, "answer_cache_enabled", False)
+        monkeypatch.setattr(chat_service.settings, "llm_queue_timeout_seconds", queue_timeout)
+        monkeypatch.setattr(chat_service, "_llm_slots", asyncio.Semaphore(slots))
+        return provider
+
+    return configure
+
+
+def test_llm_calls_are_capped_and_the_loop_stays_free(provider):
+    llm = provider(seconds=0.1, slots=2, queue_timeout=5)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    async def main():
+        tick = asyncio.create_task(ticker())
+        answers = await asyncio.gather(*(chat_service.arag_answer(f"q{i}", 1) for i in range(5)))
+        tick.cancel()
+        return answers
+
+    answers = asyncio.run(main())
+
+    assert all(a["answer"].startswith(f"[fake] Answer to 'q{i}'") for i, a in enumerate(answers))
+    assert llm.max_in_flight == 2
+    # Three rounds of 0.1 s LLM waits: the loop kept running in between
+    assert ticks >= 20
+
+
+def test_waiting_past_the_queue_timeout_is_busy(provider):
+    provider(seconds=0.3, slots=1, queue_timeout=0.05)
+
+    async def main():
+        return await asyncio.gather(
+            chat_service.arag_answer("first", 1),
+            chat_service.arag_answer("second", 1),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(main())
+
+    assert first["answer"].startswith("[fake] Answer to 'first'")
+    assert isinstance(second, LLMBusyError)
@@ -0,0 +1,68 @@
+# tests/test_chat_stream.py
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.ai.fake_provider import FakeProvider
+from app.api import deps, routes_chat
+from app.services import chat_service
+from app.services.principal_cache import Principal
+
+
+def read_events(response) -> list[tuple[str, object]]:
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def client(monkeypatch):
+    docs = [Document(page_content="RAG retrieves context.", metadata={"document_id": 7})]
+    monkeypatch.setattr(chat_service, "retrieve", lambda query, tenant_id: docs)
+    monkeypatch.setattr(chat_service.settings, "answer_cache_enabled", False)
+
+    app = FastAPI()
+    app.include_router(routes_chat.router, prefix="/chat")
+    app.dependency_overrides[deps.get_current_principal] = lambda: Principal(
+        id=1, tenant_id=1, role="user", token_version=0
+    )
+    return TestClient(app)
+
+
+def test_stream_sends_sources_tokens_then_done(client, monkeypatch):
+    monkeypatch.setattr(chat_service, "get_ai_provider", lambda: FakeProvider())
+
+    response = client.post("/chat/query/stream", json={"query": "What is RAG?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = read_events(response)
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"} and len(names) > 3
+    assert events[0][1][0]["document_id"] == 7
+    answer = "".join(data for name, data in events if name == "token")
+    assert answer.startswith("[fake] Answer to 'What is RAG?'")
+
+
+def test_failure_mid_stream_is_sent_as_an_error_event(client, monkeypatch):
+    class FailingProvider(FakeProvider):
+        async def achat_stream(self, messages):
+            yield "partial "
+            raise RuntimeError("model went away")
+
+    monkeypatch.setattr(chat_service, "get_ai_provider", lambda: FailingProvider())
+
+    response = client.post("/chat/query/stream", json={"query": "q"})
+
+    assert response.status_code == 200
+    assert read_events(response) == [
+        ("sources", [{"document_id": 7, "text": "RAG retrieves context...."}]),
+        ("token", "partial "),
+        ("error", {"detail": "model went away"}),
+    ]
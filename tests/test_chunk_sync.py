@@ -0,0 +1,62 @@
+# tests/test_chunk_sync.py
+import pytest
+from langchain_core.documents import Document
+
+from app.ai.fake_provider import FakeEmbeddings
+from app.services.ingestion_service import DocumentChunkSync
+from app.vectorstores import numpy_store
+from app.vectorstores.numpy_store import NumpyVectorStore
+
+
+@pytest.fixture(autouse=True)
+def no_background_compaction(monkeypatch):
+    monkeypatch.setattr(numpy_store.compactor, "schedule", lambda directory, dtype: None)
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.embedded: list[str] = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def ingest(store, texts: list[str], document_id: int = 1) -> tuple[dict, list[str]]:
+    embeddings = CountingEmbeddings()
+    sync = DocumentChunkSync(store, embeddings, document_id)
+    sync.add_batch([Document(page_content=t, metadata={"document_id": document_id}) for t in texts])
+    return sync.finish(), embeddings.embedded
+
+
+def stored(store, document_id: int = 1) -> dict[int, str]:
+    ids, metadatas = store.get_document_chunks(document_id)
+    return {m["chunk_index"]: m["content_hash"][:8] for m in metadatas}
+
+
+def test_reingesting_unchanged_content_writes_nothing(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+
+    changes, embedded = ingest(store, ["alpha", "beta", "gamma"])
+    assert changes == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+    before = stored(store)
+
+    changes, embedded = ingest(store, ["alpha", "beta", "gamma"])
+    assert changes == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+    assert embedded == []
+    assert stored(store) == before
+
+
+def test_changed_and_dropped_chunks_are_replaced(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    ingest(store, ["alpha", "beta", "gamma"])
+    ingest(store, ["other document"], document_id=2)
+
+    changes, embedded = ingest(store, ["alpha", "beta v2"])
+
+    assert changes == {"added": 0, "updated": 1, "removed": 1, "unchanged": 1}
+    assert embedded == ["beta v2"]
+    ids, _ = store.get_document_chunks(1)
+    assert len(ids) == 2 and store.count() == 3
+    assert sorted(stored(store)) == [0, 1]
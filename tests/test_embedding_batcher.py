@@ -0,0 +1,70 @@
+# tests/test_embedding_batcher.py
+import pstats
+import threading
+
+from app.services import embedding_batcher, profiling
+
+
+class RecordingEmbeddings:
+    def __init__(self):
+        self.threads = []
+
+    def embed_query(self, text):
+        self.threads.append(threading.current_thread().name)
+        return [float(len(text))]
+
+    def embed_documents(self, texts):
+        self.threads.append(threading.current_thread().name)
+        return [[float(len(t))] for t in texts]
+
+
+def test_profiled_query_is_embedded_in_the_request_thread(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    model = RecordingEmbeddings()
+    monkeypatch.setattr(embedding_batcher, "get_embeddings", lambda: model)
+    monkeypatch.setattr(embedding_batcher.settings, "query_batching_enabled", True)
+
+    with profiling.session_scope(profiling.ProfileSession(tenant_id=1, label="chat")):
+        assert embedding_batcher.embed_query("hello") == [5.0]
+
+    assert model.threads == [threading.current_thread().name]
+    (saved,) = tmp_path.glob("*.prof")
+    functions = {name for (_, _, name) in pstats.Stats(str(saved)).stats}
+    assert "embed_query" in functions
+
+
+def test_unprofiled_query_goes_through_the_batcher(monkeypatch):
+    model = RecordingEmbeddings()
+    batcher = embedding_batcher.QueryEmbeddingBatcher(
+        embed_batch=model.embed_documents, max_batch_size=4, max_wait_ms=1
+    )
+    monkeypatch.setattr(embedding_batcher, "batcher", batcher)
+    monkeypatch.setattr(embedding_batcher.settings, "query_batching_enabled", True)
+
+    assert embedding_batcher.embed_query("hi") == [2.0]
+    assert model.threads == ["query-embedding-batcher"]
+
+
+def test_concurrent_queries_share_forward_passes():
+    model = RecordingEmbeddings()
+    batcher = embedding_batcher.QueryEmbeddingBatcher(
+        embed_batch=model.embed_documents, max_batch_size=8, max_wait_ms=50
+    )
+    callers = 16
+    start = threading.Barrier(callers)
+    results = {}
+
+    def ask(i):
+        start.wait()
+        results[i] = batcher.embed("x" * i)
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Each caller gets its own vector back, in whatever batch it landed
+    assert results == {i: [float(i)] for i in range(callers)}
+    assert len(model.threads) < callers
+    assert batcher.stats()["batch_size"]["count"] == len(model.threads)
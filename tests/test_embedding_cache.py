@@ -0,0 +1,57 @@
+# tests/test_embedding_cache.py
+import sqlite3
+
+import pytest
+
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.embedded: list[str] = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 0.5] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 0.5]
+
+
+@pytest.fixture
+def cache(tmp_path) -> EmbeddingCache:
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=1000)
+
+
+def test_only_unseen_texts_reach_the_model(cache):
+    model = CountingEmbeddings()
+    first = CachedEmbeddings(model, "model-a", cache)
+    assert first.embed_documents(["alpha", "beta", "alpha"]) == [[5.0, 0.5], [4.0, 0.5], [5.0, 0.5]]
+    assert model.embedded == ["alpha", "beta"]
+
+    # A later ingest (new wrapper, same file) re-embeds only the new text
+    second = CachedEmbeddings(model, "model-a", cache)
+    assert second.embed_documents(["beta", "gamma", "alpha"]) == [[4.0, 0.5], [5.0, 0.5], [5.0, 0.5]]
+    assert model.embedded == ["alpha", "beta", "gamma"]
+    assert (second.hits, second.misses, second.hit_ratio) == (2, 1, 0.6667)
+
+
+def test_models_do_not_share_vectors(cache):
+    model = CountingEmbeddings()
+    CachedEmbeddings(model, "model-a", cache).embed_documents(["alpha"])
+    CachedEmbeddings(model, "model-b", cache).embed_documents(["alpha"])
+
+    assert model.embedded == ["alpha", "alpha"]
+
+
+def test_trim_keeps_the_most_recently_used(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    cache = EmbeddingCache(str(path), max_entries=10)
+    cache.put_many("m", {f"old{i}": [0.0] for i in range(10)})
+    cache.get_many("m", ["old0"])  # touched: most recently used
+    cache.put_many("m", {f"new{i}": [1.0] for i in range(5)})
+
+    with sqlite3.connect(path) as conn:
+        kept = {h for (h,) in conn.execute("SELECT text_hash FROM embeddings")}
+    assert len(kept) <= 10
+    assert "old0" in kept and {f"new{i}" for i in range(5)} <= kept
@@ -0,0 +1,49 @@
+# tests/test_embedding_registry.py
+import threading
+import time
+
+import pytest
+
+from app.services import embedding_registry
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list[str]:
+    loaded = []
+
+    def slow_load(model_name):
+        loaded.append(model_name)
+        time.sleep(0.05)  # long enough for every caller to arrive mid-load
+        return object()
+
+    monkeypatch.setattr(embedding_registry, "_models", {})
+    monkeypatch.setattr(embedding_registry, "_load_locks", {})
+    monkeypatch.setattr(embedding_registry, "_load", slow_load)
+    return loaded
+
+
+def test_concurrent_first_callers_share_one_load(loads):
+    start = threading.Barrier(8)
+    results = []
+
+    def first_call():
+        start.wait()
+        results.append(embedding_registry.get_embeddings("model-a"))
+
+    threads = [threading.Thread(target=first_call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == ["model-a"]
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert embedding_registry.get_embeddings("model-a") is results[0]
+
+
+def test_models_load_independently(loads):
+    a = embedding_registry.get_embeddings("model-a")
+    b = embedding_registry.get_embeddings("model-b")
+
+    assert a is not b
+    assert loads == ["model-a", "model-b"]
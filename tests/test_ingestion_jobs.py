@@ -0,0 +1,113 @@
+# tests/test_ingestion_jobs.py
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models.document import Document
+from app.models.tenant import Tenant
+from app.services import ingestion_jobs, ingestion_service
+from app.services.ingestion_jobs import IngestionJobQueue, QueueFullError
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([Tenant(id=1, name="t1"), Tenant(id=2, name="t2")])
+        db.add_all([
+            Document(id=i, tenant_id=1 if i < 10 else 2, filename=f"{i}.txt", storage_path=f"{i}.txt")
+            for i in (1, 2, 3, 11)
+        ])
+        db.commit()
+    monkeypatch.setattr(ingestion_jobs, "SessionLocal", Session)
+    return Session
+
+
+@pytest.fixture
+def queue():
+    queue = IngestionJobQueue(workers=2, max_jobs_per_tenant=1, max_pending=10)
+    yield queue
+    queue.stop(timeout=5)
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.is_active:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+
+
+def document_status(Session, document_id: int) -> str:
+    with Session() as db:
+        return db.get(Document, document_id).status
+
+
+def test_job_moves_the_document_to_ready_or_failed(session, queue, monkeypatch):
+    seen = {}
+
+    def ingest(db, document, tenant_id):
+        seen[document.id] = document.status
+        if document.id == 2:
+            raise ValueError("unreadable")
+        return {"chunks_indexed": 3, "timings": {"load_seconds": 0.1}, "changes": {"added": 3}}
+
+    monkeypatch.setattr(ingestion_service, "ingest_with_langchain", ingest)
+    queue.start()
+
+    ok = queue.submit(document_id=1, tenant_id=1)
+    failed = queue.submit(document_id=2, tenant_id=1)
+    wait_for(ok)
+    wait_for(failed)
+
+    assert seen == {1: "PROCESSING", 2: "PROCESSING"}
+    assert (ok.status, ok.chunks_indexed) == (ingestion_jobs.SUCCEEDED, 3)
+    assert "queue_wait_seconds" in ok.timings and "load_seconds" in ok.timings
+    assert document_status(session, 1) == "READY"
+    assert failed.status == ingestion_jobs.FAILED
+    assert failed.error == "Ingestion failed: unreadable"
+    assert document_status(session, 2) == "FAILED"
+
+
+def test_busy_tenant_does_not_hold_back_others(session, queue, monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def ingest(db, document, tenant_id):
+        started.append(document.id)
+        release.wait(timeout=5)
+        return {"chunks_indexed": 0, "timings": {}, "changes": {}}
+
+    monkeypatch.setattr(ingestion_service, "ingest_with_langchain", ingest)
+    queue.start()
+
+    first = queue.submit(document_id=1, tenant_id=1)
+    second = queue.submit(document_id=3, tenant_id=1)
+    other = queue.submit(document_id=11, tenant_id=2)
+    deadline = time.monotonic() + 5
+    while len(started) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # One job per tenant at a time: tenant 2 runs ahead of tenant 1's second job
+    assert sorted(started) == [1, 11]
+    assert second.status == ingestion_jobs.QUEUED
+    release.set()
+    for job in (first, second, other):
+        wait_for(job)
+    assert started[-1] == 3
+
+
+def test_resubmitting_an_active_document_reuses_its_job():
+    queue = IngestionJobQueue(workers=1, max_jobs_per_tenant=1, max_pending=2)
+
+    job = queue.submit(document_id=1, tenant_id=1)
+
+    assert queue.submit(document_id=1, tenant_id=1) is job
+    queue.submit(document_id=2, tenant_id=1)
+    with pytest.raises(QueueFullError):
+        queue.submit(document_id=3, tenant_id=1)
@@ -0,0 +1,43 @@
+# tests/test_load_test.py
+import sys
+
+import pytest
+
+from benchmarks import load_test
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert load_test.percentile(values, 50) == 50.0
+    assert load_test.percentile(values, 95) == 95.0
+    assert load_test.percentile(values, 99) == 99.0
+    assert load_test.percentile([], 95) == 0.0
+
+
+def test_recorder_summary_counts_errors_apart_from_latencies():
+    recorder = load_test.Recorder()
+    for ms in (10, 20, 30, 40):
+        recorder.record("POST /chat/query", ms / 1000, ok=True)
+    recorder.record("POST /chat/query", 5.0, ok=False)
+    recorder.finished = recorder.started + 2.0
+
+    stats = recorder.summary()["POST /chat/query"]
+
+    assert (stats["requests"], stats["errors"]) == (5, 1)
+    assert stats["rps"] == 2.0
+    assert (stats["p50_ms"], stats["max_ms"], stats["mean_ms"]) == (20.0, 40.0, 25.0)
+
+
+@pytest.mark.parametrize("argv", [
+    ["--workloads", "chat,teleport"],
+    ["--workers", "2", "--workloads", "chat,ingest"],
+])
+def test_invalid_arguments_are_rejected_before_starting(argv, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["load_test", *argv])
+    monkeypatch.setattr(load_test, "run", lambda args: pytest.fail("server started"))
+
+    with pytest.raises(SystemExit) as exc:
+        load_test.main()
+
+    assert exc.value.code == 2
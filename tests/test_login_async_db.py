@@ -0,0 +1,64 @@
+# tests/test_login_async_db.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.db as db_module
+from app.api import deps, routes_auth
+from app.db import Base
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services.auth_service import decode_token, hash_password
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "auth.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Tenant(id=1, name="t1"))
+        db.add(User(id=5, tenant_id=1, email="a@example.com", password_hash=hash_password("secret-pw"), role="admin"))
+        db.commit()
+    return path, Session
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def client(request, database, monkeypatch):
+    path, Session = database
+    monkeypatch.setattr(deps.settings, "db_async_enabled", request.param)
+    if request.param:
+        # Optional async layer: needs sqlalchemy[asyncio] + aiosqlite
+        pytest.importorskip("greenlet")
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        monkeypatch.setattr(
+            db_module, "_async_sessionmaker", async_sessionmaker(async_engine, expire_on_commit=False)
+        )
+
+    def get_db():
+        with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(routes_auth.router)
+    app.dependency_overrides[deps.get_db] = get_db
+    with TestClient(app) as client:
+        yield client
+
+
+def test_login(client):
+    ok = client.post("/auth/login", json={"email": "a@example.com", "password": "secret-pw"})
+    assert ok.status_code == 200, ok.text
+    claims = decode_token(ok.json()["access_token"])
+    assert claims["sub"] == "5" and claims["tenant_id"] == 1
+
+    wrong = client.post("/auth/login", json={"email": "a@example.com", "password": "nope"})
+    assert wrong.status_code == 401
+    unknown = client.post("/auth/login", json={"email": "b@example.com", "password": "secret-pw"})
+    assert unknown.status_code == 401
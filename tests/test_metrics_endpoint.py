@@ -0,0 +1,39 @@
+# tests/test_metrics_endpoint.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_api_route("/metrics", main.metrics_endpoint)
+    return TestClient(app)
+
+
+def test_no_token_configured_is_forbidden_by_default(client, monkeypatch):
+    monkeypatch.setattr(main.settings, "metrics_token", "")
+    monkeypatch.setattr(main.settings, "metrics_allow_anonymous", False)
+
+    assert client.get("/metrics").status_code == 403
+
+
+def test_anonymous_scrapes_when_allowed(client, monkeypatch):
+    monkeypatch.setattr(main.settings, "metrics_token", "")
+    monkeypatch.setattr(main.settings, "metrics_allow_anonymous", True)
+
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert "http_request_duration_seconds" in resp.text
+
+
+def test_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(main.settings, "metrics_token", "scrape-secret")
+    monkeypatch.setattr(main.settings, "metrics_allow_anonymous", True)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
@@ -0,0 +1,190 @@
+# tests/test_numpy_store.py
+import json
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.vectorstores import numpy_store
+from app.vectorstores.numpy_store import NumpyVectorStore
+
+DIM = 8
+
+
+@pytest.fixture(autouse=True)
+def no_background_compaction(monkeypatch):
+    # Tests compact explicitly; keep the daemon thread out of the way
+    monkeypatch.setattr(numpy_store.compactor, "schedule", lambda directory, dtype: None)
+
+
+def rows(ids, seed=0, document_id=1):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((len(ids), DIM)).astype(np.float32)
+    metadatas = [{"document_id": document_id, "chunk_index": i} for i in range(len(ids))]
+    texts = [f"text of {row_id}" for row_id in ids]
+    return ids, vectors, metadatas, texts
+
+
+def upsert(store, ids, seed=0, document_id=1):
+    ids, vectors, metadatas, texts = rows(ids, seed, document_id)
+    store.upsert(ids=ids, embeddings=vectors.tolist(), metadatas=metadatas, texts=texts)
+    return dict(zip(ids, vectors))
+
+
+def brute_force(live: dict, query: np.ndarray, k: int) -> list[str]:
+    ids = list(live)
+    matrix = np.stack([live[i] for i in ids])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    return [ids[i] for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+def search_ids(store, query, k):
+    return [d.page_content.removeprefix("text of ") for d in store.similarity_search_by_vector(query.tolist(), k=k)]
+
+
+def segment_count(directory) -> int:
+    return len(json.loads((directory / "manifest.json").read_text())["segments"])
+
+
+def test_search_matches_brute_force_across_segments(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    live = {}
+    for seed in range(3):
+        live.update(upsert(store, [f"s{seed}-{i}" for i in range(50)], seed=seed))
+
+    query = np.random.default_rng(99).standard_normal(DIM).astype(np.float32)
+
+    assert store.count() == 150
+    assert search_ids(store, query, 10) == brute_force(live, query, 10)
+
+
+def test_replace_and_delete_tombstone_old_rows(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    live = upsert(store, [f"c{i}" for i in range(20)], seed=1)
+    live.update(upsert(store, [f"c{i}" for i in range(5)], seed=2))  # replaces c0..c4
+    store.delete(["c10", "c11", "missing"])
+    del live["c10"], live["c11"]
+
+    query = np.random.default_rng(7).standard_normal(DIM).astype(np.float32)
+
+    assert store.count() == 18
+    ids, _ = store.get_document_chunks(1)
+    assert sorted(ids) == sorted(live)
+    assert search_ids(store, query, 18) == brute_force(live, query, 18)
+
+
+def test_batch_writes_one_segment(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    upsert(store, ["old0", "old1"], seed=0)
+
+    with store.batch():
+        for seed in range(10):
+            upsert(store, [f"b{seed}-{i}" for i in range(30)], seed=seed)
+        upsert(store, ["b0-0"], seed=42)  # replaced within the batch
+        store.delete(["old0", "b1-0"])
+
+    assert segment_count(tmp_path) == 2
+    assert store.count() == 1 + 300 - 1
+    ids, _ = store.get_document_chunks(1)
+    assert "b0-0" in ids and "old0" not in ids and "b1-0" not in ids
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".pending")]
+
+
+def test_batch_commits_rows_written_before_an_error(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            upsert(store, ["a", "b"])
+            raise RuntimeError("embedding failed")
+
+    assert store.count() == 2
+
+
+def test_reopened_handle_sees_committed_state(tmp_path):
+    store = NumpyVectorStore(tmp_path, dtype="float16")
+    live = upsert(store, [f"r{i}" for i in range(40)], seed=3)
+    store.delete(["r0"])
+    del live["r0"]
+
+    reopened = NumpyVectorStore(tmp_path, dtype="float16")
+    query = np.random.default_rng(5).standard_normal(DIM).astype(np.float32)
+
+    assert reopened.count() == 39
+    assert search_ids(reopened, query, 5) == brute_force(live, query, 5)
+
+    # Writes through one handle are visible to the other on its next read
+    upsert(reopened, ["r40"], seed=4)
+    assert store.count() == 40
+
+
+def test_compaction_merges_small_segments_and_keeps_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "numpy_index_max_segments", 4)
+    store = NumpyVectorStore(tmp_path)
+    live = upsert(store, [f"big{i}" for i in range(500)], seed=0)
+    for seed in range(1, 7):
+        live.update(upsert(store, [f"small{seed}-{i}" for i in range(5)], seed=seed))
+    big_segment = json.loads((tmp_path / "manifest.json").read_text())["segments"][0]["name"]
+
+    assert segment_count(tmp_path) == 7
+    assert store.compact()
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert len(manifest["segments"]) <= 2
+    # Size-tiered: the large clean segment is not rewritten
+    assert manifest["segments"][0]["name"] == big_segment
+
+    query = np.random.default_rng(11).standard_normal(DIM).astype(np.float32)
+    assert store.count() == 530
+    assert search_ids(store, query, 10) == brute_force(live, query, 10)
+    assert not store.compact()
+
+
+def test_compaction_rewrites_dirty_segment(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    live = upsert(store, [f"d{i}" for i in range(100)], seed=0)
+    dropped = [f"d{i}" for i in range(60)]
+    store.delete(dropped)
+    for row_id in dropped:
+        del live[row_id]
+
+    assert store.needs_compaction()
+    assert store.compact()
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert [s["rows"] for s in manifest["segments"]] == [40]
+    assert manifest["segments"][0]["deleted"] == []
+    assert sorted(p.name for p in tmp_path.glob("seg_*")) == [
+        f"{manifest['segments'][0]['name']}.rows.jsonl",
+        f"{manifest['segments'][0]['name']}.vec",
+    ]
+
+    reopened = NumpyVectorStore(tmp_path)
+    query = np.random.default_rng(2).standard_normal(DIM).astype(np.float32)
+    assert search_ids(reopened, query, 40) == brute_force(live, query, 40)
+
+
+def test_delete_during_merge_is_carried_over(tmp_path, monkeypatch):
+    store = NumpyVectorStore(tmp_path)
+    live = upsert(store, [f"m{i}" for i in range(10)], seed=0)
+    store.delete([f"m{i}" for i in range(5)])
+    for i in range(5):
+        del live[f"m{i}"]
+
+    # Another writer deletes m7 after the rows were copied, before the swap
+    original_lock = numpy_store._write_lock
+    other = NumpyVectorStore(tmp_path)
+
+    def lock_after_concurrent_delete(directory):
+        monkeypatch.setattr(numpy_store, "_write_lock", original_lock)
+        other.delete(["m7"])
+        return original_lock(directory)
+
+    monkeypatch.setattr(numpy_store, "_write_lock", lock_after_concurrent_delete)
+    assert store.compact()
+    del live["m7"]
+
+    query = np.random.default_rng(3).standard_normal(DIM).astype(np.float32)
+    assert store.count() == 4
+    assert search_ids(store, query, 10) == brute_force(live, query, 10)
@@ -0,0 +1,88 @@
+# tests/test_onnx_embeddings.py
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.onnx_embeddings import OnnxEmbeddings
+
+PAD = 0
+
+
+class WordTokenizer:
+    """
+    One token per word (id = word length), padded to the batch's longest
+    sequence like the HF tokenizer configured in OnnxEmbeddings.
+    """
+
+    def encode_batch(self, texts):
+        ids = [[len(w) for w in t.split()] for t in texts]
+        longest = max(len(i) for i in ids)
+        return [
+            SimpleNamespace(
+                ids=i + [PAD] * (longest - len(i)),
+                attention_mask=[1] * len(i) + [0] * (longest - len(i)),
+                type_ids=[0] * longest,
+            )
+            for i in ids
+        ]
+
+
+class StubSession:
+    """
+    Token embedding [id, 1, position]; padding positions get large values
+    that would skew the mean if the mask were ignored.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def run(self, outputs, feeds):
+        input_ids = feeds["input_ids"]
+        self.batches.append(input_ids.tolist())
+        batch, seq = input_ids.shape
+        out = np.stack(
+            [input_ids, np.ones_like(input_ids), np.broadcast_to(np.arange(seq), (batch, seq))],
+            axis=-1,
+        ).astype(np.float32)
+        out[input_ids == PAD] = 1000.0
+        return [out]
+
+
+def make_embeddings(batch_size: int) -> OnnxEmbeddings:
+    # Skip __init__ (onnxruntime, model files): only the pooling is under test
+    embeddings = OnnxEmbeddings.__new__(OnnxEmbeddings)
+    embeddings.tokenizer = WordTokenizer()
+    embeddings.session = StubSession()
+    embeddings._input_names = {"input_ids", "attention_mask"}
+    embeddings.batch_size = batch_size
+    embeddings.normalize = True
+    return embeddings
+
+
+def expected(text: str) -> np.ndarray:
+    tokens = np.array(
+        [[len(w), 1.0, position] for position, w in enumerate(text.split())], dtype=np.float32
+    )
+    mean = tokens.mean(axis=0)
+    return mean / np.linalg.norm(mean)
+
+
+def test_documents_come_back_in_input_order_mean_pooled_and_unit_norm():
+    texts = [
+        "a much longer sentence with quite a few more words in it",
+        "short one",
+        "middle length text here",
+        "x",
+        "another fairly long sentence for the second batch",
+    ]
+    embeddings = make_embeddings(batch_size=2)
+
+    vectors = np.array(embeddings.embed_documents(texts))
+
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, expected(text), rtol=1e-5)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+    # Batched shortest first, so each batch pads to similar lengths
+    first_batch = embeddings.session.batches[0]
+    assert sorted(len([t for t in row if t != PAD]) for row in first_batch) == [1, 2]
+    assert np.allclose(embeddings.embed_query(texts[2]), vectors[2], rtol=1e-5)
@@ -0,0 +1,78 @@
+# tests/test_pagination.py
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models.document import Document
+from app.models.tenant import Tenant
+from app.models.user import User  # noqa: F401 (registers the users table)
+from app.services.pagination import decode_cursor, encode_cursor, keyset_page
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Tenant(id=1, name="t1"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _add_documents(db, n: int, created_at: str | None = None) -> None:
+    for i in range(n):
+        db.add(Document(tenant_id=1, filename=f"f{i}.txt", storage_path=f"/tmp/f{i}.txt"))
+    db.commit()
+    if created_at:
+        db.execute(text("UPDATE documents SET created_at = :c"), {"c": created_at})
+        db.commit()
+
+
+def _page_through(db, limit: int) -> list[int]:
+    seen, cursor = [], None
+    for _ in range(100):
+        query = db.query(Document).filter(Document.tenant_id == 1)
+        rows, cursor = keyset_page(query, Document.created_at, Document.id, limit=limit, cursor=cursor)
+        seen.extend(r.id for r in rows)
+        if cursor is None:
+            return seen
+    raise AssertionError("pagination did not terminate")
+
+
+def test_cursor_round_trip():
+    from datetime import datetime
+
+    created = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created, 42)) == (created, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_rows_from_the_same_second_page_without_repeats(db):
+    # server_default=func.now() on SQLite: whole seconds, no fraction
+    _add_documents(db, 25, created_at="2024-05-01 12:30:15")
+
+    seen = _page_through(db, limit=10)
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 25
+
+
+def test_pages_follow_created_at_then_id(db):
+    _add_documents(db, 7, created_at="2024-05-01 12:30:15")
+    db.execute(text("UPDATE documents SET created_at = '2024-05-01 12:30:16' WHERE id > 4"))
+    db.commit()
+
+    assert _page_through(db, limit=3) == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_offset_without_cursor(db):
+    _add_documents(db, 5, created_at="2024-05-01 12:30:15")
+    query = db.query(Document).filter(Document.tenant_id == 1)
+
+    rows, cursor = keyset_page(query, Document.created_at, Document.id, limit=2, offset=2)
+
+    assert [r.id for r in rows] == [3, 2]
+    assert cursor is not None
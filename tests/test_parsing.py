@@ -0,0 +1,59 @@
+# tests/test_parsing.py
+import csv
+
+import pytest
+
+from app.services.parsing import CSVBlockLoader, TextBlockLoader, iter_documents, split_documents
+
+
+def test_text_blocks_are_bounded_and_lossless(tmp_path):
+    path = tmp_path / "big.txt"
+    paragraphs = [f"Paragraph {i} " + "word " * (i % 50) for i in range(3000)]
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+    blocks = list(TextBlockLoader(str(path), block_chars=4000).lazy_load())
+
+    assert len(blocks) > 10
+    assert all(len(b.page_content) <= 8000 for b in blocks)
+    assert "".join(b.page_content for b in blocks) == path.read_text(encoding="utf-8")
+
+
+def test_text_blocks_cut_a_single_huge_line(tmp_path):
+    path = tmp_path / "min.json"
+    path.write_text('{"a":"' + "x" * 50_000 + '"}', encoding="utf-8")
+
+    blocks = list(iter_documents(str(path)))
+
+    assert len(blocks) >= 2
+    assert "".join(b.page_content for b in blocks) == path.read_text(encoding="utf-8")
+
+
+def test_csv_rows_stream_in_blocks(tmp_path):
+    path = tmp_path / "rows.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "city"])
+        for i in range(2000):
+            writer.writerow([f"user{i}", f"city{i % 7}"])
+
+    blocks = list(CSVBlockLoader(str(path), block_chars=5000).lazy_load())
+
+    assert len(blocks) > 1
+    assert blocks[0].metadata["row"] == 0
+    assert "name: user0\ncity: city0" in blocks[0].page_content
+    assert sum(b.page_content.count("name: ") for b in blocks) == 2000
+
+    chunks = split_documents(blocks[:1], tenant_id=1, document_id=7)
+    assert all(len(c.page_content) <= 1000 for c in chunks)
+    assert chunks[0].metadata["document_id"] == 7
+
+
+def test_markdown_is_indexed_without_its_syntax(tmp_path):
+    pytest.importorskip("unstructured")
+    path = tmp_path / "notes.md"
+    path.write_text("# Setup\n\nInstall **the** package.\n\n- first step\n- second step\n", encoding="utf-8")
+
+    (block,) = iter_documents(str(path))
+
+    assert "Setup" in block.page_content and "second step" in block.page_content
+    assert "#" not in block.page_content and "**" not in block.page_content
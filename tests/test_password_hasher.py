@@ -0,0 +1,52 @@
+# tests/test_password_hasher.py
+import asyncio
+
+import pytest
+
+from app.services.password_hasher import (
+    PasswordHasher,
+    PasswordHasherBusyError,
+    default_max_pending,
+)
+
+
+@pytest.fixture
+def hasher():
+    h = PasswordHasher(rounds=1000, workers=1, max_pending=2)
+    yield h
+    h.shutdown()
+
+
+def test_default_cap_stays_below_the_threadpool():
+    assert default_max_pending(2) == 4
+    assert default_max_pending(64) == 16
+
+
+def test_hash_and_verify_sync_and_async(hasher):
+    hashed = hasher.hash("correct horse")
+    assert hasher.verify_and_update("correct horse", hashed) == (True, None)
+
+    async def check():
+        async_hash = await hasher.hash_async("battery staple")
+        return await hasher.verify_and_update_async("wrong", async_hash)
+
+    assert asyncio.run(check()) == (False, None)
+    assert hasher.stats()["pending"] == 0
+
+
+def test_rehash_flag_when_rounds_change(hasher):
+    old = PasswordHasher(rounds=2000, workers=1, max_pending=1)
+    try:
+        hashed = old.hash("pw")
+    finally:
+        old.shutdown()
+    valid, new_hash = hasher.verify_and_update("pw", hashed)
+    assert valid and new_hash and new_hash != hashed
+
+
+def test_rejects_past_max_pending(hasher):
+    hasher._pending = hasher.max_pending  # simulate a saturated pool
+    with pytest.raises(PasswordHasherBusyError):
+        hasher.hash("pw")
+    assert hasher.stats()["rejected"] == 1
+    hasher._pending = 0
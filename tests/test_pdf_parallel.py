@@ -0,0 +1,51 @@
+# tests/test_pdf_parallel.py
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from app.services import pdf_parallel
+from app.services.pdf_parallel import ParallelPDFLoader
+
+
+def write_pdf(path, pages: int) -> None:
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for i in range(pages):
+        page = writer.add_blank_page(width=300, height=300)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 20 150 Td (Page number {i}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+@pytest.fixture(autouse=True)
+def shutdown_pool():
+    yield
+    pdf_parallel.shutdown_pool()
+
+
+def test_pages_come_back_in_order_with_pypdf_metadata(tmp_path):
+    path = tmp_path / "big.pdf"
+    write_pdf(path, pages=11)
+
+    loader = ParallelPDFLoader(str(path), workers=2, pages_per_task=3, min_pages=1)
+    pages = list(loader.lazy_load())
+
+    assert [p.metadata["page"] for p in pages] == list(range(11))
+    assert all(p.metadata["total_pages"] == 11 for p in pages)
+    assert all(p.metadata["source"] == str(path) for p in pages)
+    assert [p.page_content.strip() for p in pages] == [f"Page number {i}" for i in range(11)]
+
+
+def test_single_worker_or_small_file_stays_in_process(tmp_path):
+    assert not ParallelPDFLoader("x.pdf", workers=1, min_pages=1)._use_parallel(500)
+    assert not ParallelPDFLoader("x.pdf", workers=4, min_pages=50)._use_parallel(49)
+    assert ParallelPDFLoader("x.pdf", workers=4, min_pages=50)._use_parallel(50)
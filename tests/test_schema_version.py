@@ -0,0 +1,24 @@
+# tests/test_schema_version.py
+import pytest
+from sqlalchemy import create_engine, text
+
+import app.db as db
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    monkeypatch.setattr(db, "engine", engine)
+    return engine
+
+
+def test_mark_schema_current_upserts_one_row(engine):
+    assert db.stored_schema_state() is None
+
+    db.mark_schema_current("a" * 64)
+    db.mark_schema_current("b" * 64, trigram_index=True)
+
+    assert db.stored_schema_state() == ("b" * 64, True)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == 1
+
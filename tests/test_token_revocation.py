@@ -0,0 +1,101 @@
+# tests/test_token_revocation.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps, routes_auth, routes_users
+from app.db import Base
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services import principal_cache
+from app.services.auth_service import create_access_token, hash_password
+from app.services.principal_cache import PrincipalCache
+
+ADMIN_ID, USER_ID = 1, 2
+
+
+def bearer(user_id: int, role: str, version: int = 0) -> dict:
+    token = create_access_token(subject=str(user_id), tenant_id=1, role=role, token_version=version)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def cache(monkeypatch) -> PrincipalCache:
+    cache = PrincipalCache(ttl_seconds=300)
+    monkeypatch.setattr(principal_cache, "cache", cache)
+    return cache
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, cache):
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Tenant(id=1, name="t1"))
+        db.add(User(id=ADMIN_ID, tenant_id=1, email="admin@example.com",
+                    password_hash=hash_password("admin-pw-1"), role="admin"))
+        db.add(User(id=USER_ID, tenant_id=1, email="user@example.com",
+                    password_hash=hash_password("user-pw-1"), role="user"))
+        db.commit()
+    # Cache misses load the principal through deps.SessionLocal
+    monkeypatch.setattr(deps, "SessionLocal", Session)
+
+    def get_db():
+        with Session() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(routes_auth.router)
+    app.include_router(routes_users.router)
+    app.dependency_overrides[deps.get_db] = get_db
+    with TestClient(app) as client:
+        yield client
+
+
+def test_role_change_revokes_issued_tokens(client, cache):
+    user_token = bearer(USER_ID, "user")
+    assert client.get("/auth/me", headers=user_token).status_code == 200
+    assert cache.get(USER_ID).token_version == 0
+
+    # Email-only edits keep existing sessions
+    edited = client.patch(f"/users/{USER_ID}", json={"email": "renamed@example.com"},
+                          headers=bearer(ADMIN_ID, "admin"))
+    assert edited.status_code == 200, edited.text
+    assert client.get("/auth/me", headers=user_token).status_code == 200
+
+    promoted = client.patch(f"/users/{USER_ID}", json={"role": "admin"}, headers=bearer(ADMIN_ID, "admin"))
+    assert promoted.status_code == 200, promoted.text
+
+    # The cached principal was dropped, not left to expire
+    assert cache.get(USER_ID) is None
+    assert client.get("/auth/me", headers=user_token).status_code == 401
+    me = client.get("/auth/me", headers=bearer(USER_ID, "admin", version=1))
+    assert me.status_code == 200 and me.json()["role"] == "admin"
+
+
+def test_password_change_revokes_issued_tokens(client, cache):
+    old_token = bearer(USER_ID, "user")
+
+    changed = client.post(
+        "/auth/change-password",
+        json={"current_password": "user-pw-1", "new_password": "user-pw-2"},
+        headers=old_token,
+    )
+    assert changed.status_code == 200, changed.text
+
+    assert client.get("/auth/me", headers=old_token).status_code == 401
+    fresh = {"Authorization": f"Bearer {changed.json()['access_token']}"}
+    assert client.get("/auth/me", headers=fresh).status_code == 200
+
+
+def test_admin_password_reset_revokes_issued_tokens(client, cache):
+    old_token = bearer(USER_ID, "user")
+    assert client.get("/auth/me", headers=old_token).status_code == 200
+
+    reset = client.patch(f"/users/{USER_ID}", json={"password": "reset-pw-1"}, headers=bearer(ADMIN_ID, "admin"))
+    assert reset.status_code == 200, reset.text
+
+    assert client.get("/auth/me", headers=old_token).status_code == 401
@@ -0,0 +1,78 @@
+# tests/test_tracing.py
+import asyncio
+import contextvars
+
+import pytest
+
+from app.services import tracing
+
+
+@pytest.fixture
+def offered(monkeypatch) -> list:
+    traces = []
+    monkeypatch.setattr(tracing.settings, "tracing_enabled", True)
+    monkeypatch.setattr(tracing.store, "offer", traces.append)
+    return traces
+
+
+def run_request(app) -> None:
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/x"}
+    asyncio.run(tracing.TracingMiddleware(app)(scope, receive, send))
+
+
+def responding(status: int):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+def test_handled_5xx_marks_the_trace_failed(offered):
+    run_request(responding(503))
+    (trace,) = offered
+
+    assert trace.root.error == "HTTP 503"
+    assert trace.root.attributes["http.status_code"] == 503
+
+
+def test_4xx_is_not_an_error(offered):
+    run_request(responding(404))
+    (trace,) = offered
+
+    assert trace.root.error is None
+
+
+def test_raised_exception_keeps_its_message(offered):
+    async def failing(scope, receive, send):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_request(failing)
+    (trace,) = offered
+
+    assert trace.root.error == "RuntimeError: boom"
+
+
+def test_span_held_by_an_abandoned_generator_closes_elsewhere(offered):
+    def generate():
+        with tracing.span("llm.stream"):
+            yield "a"
+            yield "b"
+
+    with tracing.start_trace("request"):
+        stream = generate()
+        next(stream)
+    # The consumer went away; the generator is finalized in another context
+    contextvars.Context().run(stream.close)
+    (trace,) = offered
+
+    (span,) = [s for s in trace.spans if s.name == "llm.stream"]
+    assert span.end_ns is not None
+    assert span.parent_id == trace.root.span_id
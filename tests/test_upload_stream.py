@@ -0,0 +1,168 @@
+# tests/test_upload_stream.py
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app.api import deps, routes_documents
+from app.db import Base
+from app.models.document import Document
+from app.models.tenant import Tenant
+from app.services import bulk_ingest_service, document_service
+from app.services.document_service import FileTooLargeError
+from app.services.principal_cache import Principal
+from app.services.upload_stream import receive_upload
+
+BOUNDARY = "test-boundary"
+
+
+def multipart(filename: str, payload: bytes, field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\nhello\r\n'
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: text/plain\r\n\r\n"
+    ).encode() + payload + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def make_request(chunks: list[bytes], content_length: int | None, received: list) -> Request:
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    pending = list(chunks)
+
+    async def receive():
+        chunk = pending.pop(0)
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(pending)}
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+def test_declared_length_over_limit_is_refused_unread(tmp_path):
+    received = []
+    request = make_request([b"x" * 1024] * 4, content_length=10 * 1024 * 1024, received=received)
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(receive_upload(request, tmp_path / "out", max_bytes=1024 * 1024))
+
+    assert received == []
+    assert not (tmp_path / "out").exists()
+
+
+def test_chunked_body_is_aborted_mid_stream(tmp_path):
+    body = multipart("big.txt", b"a" * 200_000)
+    chunks = [body[i:i + 16_384] for i in range(0, len(body), 16_384)]
+    received = []
+    request = make_request(chunks, content_length=None, received=received)
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(receive_upload(request, tmp_path / "out", max_bytes=50_000))
+
+    assert len(received) < len(chunks)
+    assert not (tmp_path / "out").exists()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_service, "STORAGE_ROOT", tmp_path / "storage")
+    monkeypatch.setattr(bulk_ingest_service, "STORAGE_ROOT", tmp_path / "storage")
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Tenant(id=1, name="t1"))
+        db.commit()
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(routes_documents.router)
+    app.dependency_overrides[deps.get_db] = get_db
+    app.dependency_overrides[deps.require_admin] = lambda: Principal(
+        id=1, tenant_id=1, role="admin", token_version=0
+    )
+    with TestClient(app) as client:
+        client.session_factory = Session
+        yield client
+
+
+def test_upload_streams_file_into_storage(client, tmp_path):
+    payload = b"line\n" * 50_000
+    response = client.post(
+        "/documents/upload",
+        content=multipart("../notes.txt", payload),
+        headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["filename"] == "notes.txt"
+    assert body["size_bytes"] == len(payload)
+    assert body["content_hash"] == hashlib.sha256(payload).hexdigest()
+    with client.session_factory() as db:
+        doc = db.get(Document, body["id"])
+        with open(doc.storage_path, "rb") as f:
+            assert f.read() == payload
+    assert not list((tmp_path / "storage" / "1").glob(".upload-*"))
+
+
+def test_upload_rejects_empty_missing_and_oversized(client, monkeypatch):
+    headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+    empty = client.post("/documents/upload", content=multipart("e.txt", b""), headers=headers)
+    assert empty.status_code == 400
+
+    wrong_field = client.post(
+        "/documents/upload", content=multipart("e.txt", b"data", field="other"), headers=headers
+    )
+    assert wrong_field.status_code == 400
+
+    monkeypatch.setattr(routes_documents, "MAX_FILE_SIZE_BYTES", 1000)
+    too_big = client.post("/documents/upload", content=multipart("b.txt", b"x" * 5000), headers=headers)
+    assert too_big.status_code == 413
+
+    with client.session_factory() as db:
+        assert db.query(Document).count() == 0
+
+
+def test_bulk_refuses_oversized_content_length(client, monkeypatch):
+    monkeypatch.setattr(routes_documents, "BULK_MAX_REQUEST_BYTES", 100)
+    response = client.post(
+        "/documents/bulk",
+        content=multipart("a.txt", b"x" * 1000, field="files"),
+        headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 413
+
+
+def test_bulk_stages_each_file(client, monkeypatch):
+    # Not started: the job stays QUEUED
+    queue = routes_documents.ingestion_jobs.IngestionJobQueue(
+        workers=1, max_jobs_per_tenant=1, max_pending=4
+    )
+    monkeypatch.setattr(routes_documents.ingestion_jobs, "job_queue", queue)
+    response = client.post(
+        "/documents/bulk",
+        files=[("files", ("a.txt", b"alpha")), ("files", ("b.txt", b"beta")), ("files", ("c.exe", b"x"))],
+    )
+
+    assert response.status_code == 202, response.text
+    assert [(i["filename"], i["status"]) for i in response.json()["items"]] == [
+        ("a.txt", "QUEUED"), ("b.txt", "QUEUED"), ("c.exe", "REJECTED"),
+    ]
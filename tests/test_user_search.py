@@ -0,0 +1,59 @@
+# tests/test_user_search.py
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services.pagination import keyset_page
+from app.services.user_search import apply_search
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Tenant(id=1, name="t1"), Tenant(id=2, name="t2")])
+    emails = [f"alice{i}@example.com" for i in range(12)] + [
+        "bob@example.com",
+        "al_x@example.com",
+        "Alfred@Example.com",
+    ]
+    for email in emails:
+        session.add(User(tenant_id=1, email=email, password_hash="x"))
+    session.add(User(tenant_id=2, email="alice-other@example.com", password_hash="x"))
+    session.commit()
+    # All rows share one second, as a burst of inserts on SQLite does
+    session.execute(text("UPDATE users SET created_at = '2024-05-01 12:30:15'"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _emails(db, term: str, match: str) -> set[str]:
+    query = apply_search(db.query(User).filter(User.tenant_id == 1), term, match)
+    return {u.email for u in query.all()}
+
+
+def test_prefix_search_is_case_insensitive_and_exact(db):
+    assert _emails(db, "ALF", "prefix") == {"Alfred@Example.com"}
+    assert len(_emails(db, "alice", "prefix")) == 12
+    # LIKE wildcards in the term are literal
+    assert _emails(db, "al_", "prefix") == {"al_x@example.com"}
+
+
+def test_contains_search(db):
+    assert _emails(db, "ice1", "contains") == {"alice1@example.com", "alice10@example.com", "alice11@example.com"}
+
+
+def test_search_with_keyset_pages_has_no_repeats_or_gaps(db):
+    query = apply_search(db.query(User).filter(User.tenant_id == 1), "alice", "prefix")
+    seen, cursor = [], None
+    for _ in range(20):
+        rows, cursor = keyset_page(query, User.created_at, User.id, limit=5, cursor=cursor)
+        seen.extend(u.email for u in rows)
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 12
@@ -0,0 +1,78 @@
+# tests/test_vectorstore_pool.py
+import threading
+
+from app.services.vectorstore_pool import VectorStorePool
+
+
+class Handle:
+    def __init__(self, tenant_id: int, n: int):
+        self.tenant_id = tenant_id
+        self.n = n
+
+    def estimated_bytes(self) -> int:
+        return 0
+
+
+def make_pool(factory, max_size: int = 2) -> VectorStorePool:
+    return VectorStorePool(max_size=max_size, idle_ttl_seconds=0, memory_budget_bytes=0, factory=factory)
+
+
+def test_open_slots_are_dropped_after_opening_and_eviction():
+    opened = []
+
+    def factory(tenant_id):
+        opened.append(tenant_id)
+        return Handle(tenant_id, len(opened))
+
+    pool = make_pool(factory)
+    for tenant_id in range(50):
+        pool.get(tenant_id)
+
+    stats = pool.stats()
+    assert stats["size"] == 2
+    assert stats["opening"] == 0
+    assert len(opened) == 50
+
+
+def test_invalidate_during_open_does_not_cache_the_stale_handle():
+    pool = None
+    opened = []
+
+    def factory(tenant_id):
+        opened.append(tenant_id)
+        if len(opened) == 1:
+            # Ingestion finishes while this handle is being opened
+            pool.invalidate(tenant_id)
+        return Handle(tenant_id, len(opened))
+
+    pool = make_pool(factory)
+
+    handle = pool.get(1)
+
+    # Reopened after the invalidate; the first (stale) handle was never cached
+    assert handle.n == 2
+    assert pool.get(1) is handle
+    assert len(opened) == 2
+
+
+def test_concurrent_misses_open_once():
+    release = threading.Event()
+    opened = []
+
+    def factory(tenant_id):
+        opened.append(tenant_id)
+        release.wait(timeout=5)
+        return Handle(tenant_id, len(opened))
+
+    pool = make_pool(factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get(7))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(opened) == 1
+    assert len({id(h) for h in results}) == 1
+    assert pool.stats()["opening"] == 0